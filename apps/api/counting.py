@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Model, QuerySet
+
+from apps.core.cache_utils import bump_cache_version, get_cache_version
+
+logger = logging.getLogger(__name__)
+
+EXACT = "exact"
+CACHED = "cached"
+ESTIMATE = "estimate"
+
+
+def exact_count(queryset: QuerySet) -> Tuple[int, str]:
+    return queryset.count(), EXACT
+
+
+def cached_count(queryset: QuerySet) -> Tuple[int, str]:
+    """
+    ``COUNT(*)`` memoised in Redis per SQL statement.
+
+    Entries live under the model's count generation, so
+    :func:`invalidate_counts` drops every cached count of a model in O(1).
+    """
+    model = queryset.model
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+    version = get_cache_version(_generation_key(model))
+    cache_key = f"count:{model._meta.label_lower}:{version}:{digest}"
+
+    total = cache.get(cache_key)
+    if total is None:
+        total = queryset.count()
+        cache.set(cache_key, total, timeout=settings.PAGINATION_COUNT_CACHE_TTL)
+    return total, CACHED
+
+
+def estimated_count(queryset: QuerySet) -> Tuple[int, str]:
+    """
+    Planner estimate on Postgres, exact count below the configured threshold.
+
+    Unfiltered querysets read ``pg_class.reltuples``; filtered ones read the
+    row estimate of ``EXPLAIN``. Small results (or other databases) fall back to
+    :func:`exact_count`, so the estimate only kicks in where counting hurts.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return exact_count(queryset)
+
+    with connection.cursor() as cursor:
+        if queryset.query.where:
+            estimate = _plan_estimate(cursor, queryset)
+        else:
+            estimate = _table_estimate(cursor, queryset)
+
+    if estimate < settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+        # Never analysed (reltuples = -1) or small enough to count for real.
+        return exact_count(queryset)
+    return estimate, ESTIMATE
+
+
+def _table_estimate(cursor, queryset: QuerySet) -> int:
+    cursor.execute(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+        [queryset.model._meta.db_table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+def _plan_estimate(cursor, queryset: QuerySet) -> int:
+    sql, params = queryset.query.sql_with_params()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+COUNT_STRATEGIES: Dict[str, Callable[[QuerySet], Tuple[int, str]]] = {
+    EXACT: exact_count,
+    CACHED: cached_count,
+    ESTIMATE: estimated_count,
+}
+
+
+def count_queryset(queryset: QuerySet, strategy: str | None = None) -> Tuple[int, str]:
+    """
+    Count *queryset* with *strategy* and return ``(total, strategy_used)``.
+    """
+    strategy = strategy or settings.PAGINATION_COUNT_STRATEGY
+    try:
+        counter = COUNT_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown count strategy: {strategy!r}")
+    return counter(queryset)
+
+
+def invalidate_counts(model: type[Model]) -> None:
+    """
+    Drop every cached count of *model*; call it when rows are added or removed.
+    """
+    bump_cache_version(_generation_key(model))
+    logger.debug("Count generation bumped → %s", model._meta.label_lower)
+
+
+def _generation_key(model: type[Model]) -> str:
+    return f"count:{model._meta.label_lower}:generation"
@@ -1,10 +1,27 @@
+import base64
+import binascii
+import json
 from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.pagination import BasePagination, _positive_int
 from rest_framework.pagination import LimitOffsetPagination as BaseLimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from apps.api.counting import count_queryset
+
 
+class EnvelopeMixin:
+    """
+    Shared ``limit`` parsing, counting and response envelope.
+
+    ``total`` is produced by the counting strategy named in the view's
+    ``count_strategy`` (falls back to ``PAGINATION_COUNT_STRATEGY``); the
+    strategy actually used is reported as ``total_strategy``.
+    """
 
-class LimitOffsetPagination(BaseLimitOffsetPagination):
     default_limit = 20
     max_limit = 1000
 
@@ -15,16 +32,22 @@ class LimitOffsetPagination(BaseLimitOffsetPagination):
             return self.default_limit
 
         try:
-            return self._positive_int(raw_value, strict=True, cutoff=self.max_limit)
+            return _positive_int(raw_value, strict=True, cutoff=self.max_limit)
         except (TypeError, ValueError):
             raise NotFound(detail=f"Invalid limit value: {raw_value!r}")
 
+    def get_count(self, queryset):
+        strategy = getattr(self.view, "count_strategy", None)
+        count, self.count_strategy = count_queryset(queryset, strategy=strategy)
+        return count
+
     def get_paginated_response(self, data, extra_context=None):
         extra_context = extra_context or {}
         return Response(
             OrderedDict(
                 {
                     "total": self.count,
+                    "total_strategy": self.count_strategy,
                     "count": len(data),
                     "next": self.get_next_link(),
                     "previous": self.get_previous_link(),
@@ -33,3 +56,164 @@ class LimitOffsetPagination(BaseLimitOffsetPagination):
                 }
             )
         )
+
+
+class LimitOffsetPagination(EnvelopeMixin, BaseLimitOffsetPagination):
+    """
+    Limit/offset pagination whose ``next`` link does not depend on ``total``.
+
+    One extra row is fetched to detect a following page, so cached or estimated
+    totals can never hide or invent pages.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.count = self.get_count(queryset)
+
+        start, end = self.offset, self.offset + self.limit + 1
+        page = list(queryset[start:end])
+        self.has_next = len(page) > self.limit
+        return page[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+
+class CursorPagination(EnvelopeMixin, BasePagination):
+    """
+    Keyset pagination over a deterministic ``(ordering key, id)`` sort.
+
+    Each page is fetched with a ``WHERE (key, id) > (last_key, last_id)``
+    predicate instead of an OFFSET, so page *n* costs the same as page 1 as long
+    as an index on ``(key, id)`` exists. Cursors are opaque, URL-safe tokens and
+    the response keeps the ``total/count/next/previous/results`` envelope of
+    :class:`LimitOffsetPagination`.
+
+    The view may restrict the sortable keys with ``cursor_ordering_fields``
+    (non-nullable model fields only); clients pick one with ``?ordering=``,
+    prefixing it with ``-`` for descending order.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    ordering_query_param = "ordering"
+    default_ordering = "id"
+    tiebreaker = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(request, view)
+        self.count = self.get_count(queryset)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor["d"] == "p")
+
+        queryset = queryset.order_by(*self._order_by(reverse=self.reverse))
+        if cursor is not None:
+            queryset = queryset.filter(self._seek(cursor, reverse=self.reverse))
+
+        page = list(queryset[: self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[: self.limit]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = page
+        return page
+
+    # ------------------------------ query params ---------------------------- #
+    def get_ordering(self, request, view):
+        allowed = getattr(view, "cursor_ordering_fields", (self.default_ordering,))
+        raw_value = request.query_params.get(self.ordering_query_param)
+        if raw_value in (None, ""):
+            return self.default_ordering
+        if raw_value.lstrip("-") not in allowed:
+            raise NotFound(detail=f"Invalid ordering value: {raw_value!r}")
+        return raw_value
+
+    # ------------------------------ keyset logic ---------------------------- #
+    @property
+    def _key(self):
+        return self.ordering.lstrip("-")
+
+    @property
+    def _descending(self):
+        return self.ordering.startswith("-")
+
+    def _order_by(self, reverse):
+        descending = self._descending != reverse
+        sign = "-" if descending else ""
+        if self._key == self.tiebreaker:
+            return [f"{sign}{self.tiebreaker}"]
+        return [f"{sign}{self._key}", f"{sign}{self.tiebreaker}"]
+
+    def _seek(self, cursor, reverse):
+        op = "lt" if self._descending != reverse else "gt"
+        if self._key == self.tiebreaker:
+            return Q(**{f"{self.tiebreaker}__{op}": cursor["id"]})
+        # The leading ``key >= v`` (``<=`` descending) is what lets the database
+        # start a range scan on the (key, id) index at the cursor; the OR then
+        # only drops the rows of that key already seen.
+        bound = Q(**{f"{self._key}__{op}e": cursor["v"]})
+        return bound & (
+            Q(**{f"{self._key}__{op}": cursor["v"]})
+            | Q(**{self._key: cursor["v"], f"{self.tiebreaker}__{op}": cursor["id"]})
+        )
+
+    # -------------------------------- cursors ------------------------------- #
+    def encode_cursor(self, item, direction):
+        payload = {
+            "o": self.ordering,
+            "d": direction,
+            "id": getattr(item, self.tiebreaker),
+        }
+        if self._key != self.tiebreaker:
+            payload["v"] = getattr(item, self._key)
+        raw = json.dumps(payload, separators=(",", ":"), default=str)
+        token = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            valid = (
+                isinstance(cursor, dict)
+                and cursor.get("o") == self.ordering
+                and cursor.get("d") in ("n", "p")
+                and "id" in cursor
+                and (self._key == self.tiebreaker or "v" in cursor)
+            )
+        except (TypeError, ValueError, binascii.Error):
+            valid = False
+        if not valid:
+            raise NotFound(detail=f"Invalid cursor: {token!r}")
+        return cursor
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], "n")
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], "p")
@@ -7,4 +7,5 @@ router = routers.DefaultRouter()
 urlpatterns = [
     path("v1/", include(("apps.api.v1.urls", "apps.api.v1"), namespace="v1")),
     path("status/", views.health_check, name="health-check"),
+    path("metrics/", views.metrics, name="metrics"),
 ] + router.urls
@@ -1,7 +1,19 @@
+from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from apps.core import metrics as core_metrics
+from apps.core.http import circuit_states
+
 
 @api_view(["GET"])
 def health_check(request):
-    return Response({"status": "ok"})
+    return Response({"status": "ok", "circuits": circuit_states()})
+
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(core_metrics.render(), content_type=core_metrics.CONTENT_TYPE)
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import io
 from typing import Any, Dict
 
-
+from django.conf import settings
 from rest_framework import serializers
 
+from apps.books.circulation import ATOMIC, BEST_EFFORT
+from apps.books.importer import read_rows
 from apps.books.models import Book, Borrow
 from apps.books.utils import fetch_google_books_info
 
@@ -26,6 +29,13 @@ class BookListSerializer(serializers.ModelSerializer):
         ]
 
 
+class BookSearchSerializer(BookListSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(BookListSerializer.Meta):
+        fields = BookListSerializer.Meta.fields + ["rank"]
+
+
 class BookDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
@@ -97,5 +107,74 @@ class BorrowSerializer(serializers.ModelSerializer):
             "borrowed_at",
             "due_date",
             "returned_at",
+            "overdue_at",
         ]
         read_only_fields = fields
+
+
+class CirculationSerializer(BorrowSerializer):
+    """
+    A borrow as returned by borrow/return, with the book's copies afterwards.
+    """
+
+    copies = serializers.IntegerField(read_only=True)
+
+    class Meta(BorrowSerializer.Meta):
+        fields = BorrowSerializer.Meta.fields + ["copies"]
+        read_only_fields = fields
+
+
+class CirculationBatchSerializer(serializers.Serializer):
+    book_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+    mode = serializers.ChoiceField(choices=[ATOMIC, BEST_EFFORT], default=ATOMIC)
+
+    def validate_book_ids(self, value):
+        limit = settings.BOOKS_CIRCULATION_BATCH_MAX
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} books per request.")
+        return value
+
+
+class BorrowHistorySerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = Borrow
+        fields = BorrowSerializer.Meta.fields + ["username"]
+        read_only_fields = fields
+
+
+class BookBorrowsSerializer(BookDetailSerializer):
+    borrows = BorrowHistorySerializer(many=True, read_only=True)
+
+    class Meta(BookDetailSerializer.Meta):
+        fields = BookDetailSerializer.Meta.fields + ["borrows"]
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=10)
+
+
+class BookImportSerializer(serializers.Serializer):
+    rows = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_empty=False
+    )
+    file = serializers.FileField(required=False)
+    update = serializers.BooleanField(default=False)
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        if ("rows" in attrs) == ("file" in attrs):
+            raise serializers.ValidationError(
+                {"detail": "Send either 'rows' or a CSV 'file'."}
+            )
+        if "file" in attrs:
+            text = io.TextIOWrapper(attrs.pop("file"), encoding="utf-8-sig")
+            attrs["rows"] = list(read_rows(text))
+        attrs["rows"] = [
+            {"isbn": row.get("isbn"), "copies": row.get("copies")}
+            for row in attrs["rows"]
+        ]
+        return attrs
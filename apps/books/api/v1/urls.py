@@ -1,9 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from apps.books.api.v1.views import BookViewSet
+from apps.books.api.v1.views import BookViewSet, autocomplete
 
 router = DefaultRouter()
 router.register("books", BookViewSet, basename="book")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("autocomplete/", autocomplete, name="book-autocomplete"),
+    path("", include(router.urls)),
+]
@@ -1,54 +1,181 @@
 from __future__ import annotations
 
-from datetime import timedelta
-from django.db import models, transaction
-from django.db.models import F
-from django.utils import timezone
+from collections import Counter
+
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from celery.result import AsyncResult
+from django.conf import settings
+from django.db import models
+from django.urls import reverse
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+)
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
+from apps.api.pagination import CursorPagination, LimitOffsetPagination
+from apps.books.cache import book_cache_prefix, catalog_cache_prefix
+from apps.books.circulation import (
+    ATOMIC,
+    FAILED as BATCH_FAILED,
+    BookNotFound,
+    CirculationError,
+    InventoryUnavailable,
+    borrow_book,
+    borrow_books,
+    return_book,
+    return_books,
+)
 from apps.books.models import Book, Borrow
-from apps.books.permissions import IsClientUser
-from apps.books.choices import BorrowStatus
+from apps.core.cache_utils import versioned_cache_page
+from apps.books.permissions import IsClientUser, IsStaffUser
+from apps.books.search import get_search_backend, suggest
+from apps.books.tasks import FAILED, enrich_book, import_books
 from apps.books.api.v1.serializers import (
+    AutocompleteQuerySerializer,
+    BookImportSerializer,
     BookListSerializer,
     BookDetailSerializer,
     BookCreateSerializer,
-    BorrowSerializer,
+    BookBorrowsSerializer,
+    BookSearchSerializer,
+    CirculationBatchSerializer,
+    CirculationSerializer,
 )
 
-CACHE_ONE_HOUR = cache_page(60 * 60)
+CACHE_ONE_DAY = 60 * 60 * 24
 
 
-@method_decorator(CACHE_ONE_HOUR, name="retrieve")
+@method_decorator(
+    versioned_cache_page(CACHE_ONE_DAY, key_prefix=book_cache_prefix, local=True),
+    name="retrieve",
+)
 class BookViewSet(viewsets.ModelViewSet):
-    queryset = Book.objects.all().prefetch_related(
-        models.Prefetch("borrows", queryset=Borrow.objects.select_related("user"))
-    )
+    queryset = Book.objects.all()
     http_method_names = ["get", "post", "delete", "options", "head"]
+    pagination_classes = {
+        "offset": LimitOffsetPagination,
+        "cursor": CursorPagination,
+    }
+    pagination_query_param = "pagination"
+    cursor_ordering_fields = ("id", "title", "author")
+
+    @property
+    def paginator(self):
+        """
+        Pick the paginator from ``?pagination=offset|cursor`` (default: offset).
+
+        Search results are ordered by rank, so they always use offsets.
+        """
+        if not hasattr(self, "_paginator"):
+            mode = self.request.query_params.get(self.pagination_query_param)
+            if mode in (None, "") or self.action == "search":
+                mode = "offset"
+            if mode not in self.pagination_classes:
+                raise NotFound(detail=f"Invalid pagination value: {mode!r}")
+            self._paginator = self.pagination_classes[mode]()
+        return self._paginator
+
+    def get_queryset(self):
+        """
+        Build the query per action so each one loads only what it serializes.
+        """
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return queryset.only(*BookListSerializer.Meta.fields).order_by("id")
+        elif self.action == "search":
+            return queryset.only(*BookListSerializer.Meta.fields)
+        elif self.action == "retrieve":
+            return queryset.only(*BookDetailSerializer.Meta.fields)
+        elif self.action == "borrows":
+            return queryset.prefetch_related(
+                models.Prefetch(
+                    "borrows",
+                    queryset=Borrow.objects.select_related("user").order_by(
+                        "-borrowed_at"
+                    ),
+                )
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
             return BookCreateSerializer
         elif self.action == "list":
             return BookListSerializer
+        elif self.action == "search":
+            return BookSearchSerializer
         elif self.action in ("borrow", "return_it"):
             return
+        elif self.action == "borrows":
+            return BookBorrowsSerializer
+        elif self.action == "bulk_import":
+            return BookImportSerializer
+        elif self.action in ("batch_borrow", "batch_return"):
+            return CirculationBatchSerializer
         return BookDetailSerializer
 
     @swagger_auto_schema(request_body=None)
-    @method_decorator(CACHE_ONE_HOUR)
+    @method_decorator(
+        versioned_cache_page(CACHE_ONE_DAY, key_prefix=catalog_cache_prefix, local=True)
+    )
     def list(self, request: Request, *args, **kwargs) -> Response:
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="Search terms (websearch syntax: quotes, OR, -word).",
+                type=openapi.TYPE_STRING,
+                required=True,
+            )
+        ],
+        responses={200: BookSearchSerializer(many=True), 400: "Bad Request"},
+    )
+    @action(detail=False, methods=["get"])
+    @method_decorator(
+        versioned_cache_page(CACHE_ONE_DAY, key_prefix=catalog_cache_prefix)
+    )
+    def search(self, request: Request) -> Response:
+        """
+        Ranked full-text search across title, author, publisher and description.
+        """
+        terms = request.query_params.get("q", "").strip()
+        if not terms:
+            return Response(
+                {"detail": "Query parameter 'q' is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = get_search_backend().search(self.get_queryset(), terms)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @swagger_auto_schema(
         request_body=BookCreateSerializer,
-        responses={200: BookDetailSerializer, 400: "Bad Request"},
+        manual_parameters=[
+            openapi.Parameter(
+                "async",
+                openapi.IN_QUERY,
+                description="Enrich in the background and answer 202 with a job.",
+                type=openapi.TYPE_BOOLEAN,
+            )
+        ],
+        responses={
+            200: BookDetailSerializer,
+            202: "Enrichment job accepted",
+            400: "Bad Request",
+        },
     )
     def create(self, request: Request, *args, **kwargs) -> Response:
         if not (request.user and request.user.user_type == "staff"):
@@ -58,33 +185,119 @@ class BookViewSet(viewsets.ModelViewSet):
             )
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        if request.query_params.get("async") in ("1", "true", "True"):
+            return self._enqueue_enrichment(serializer.validated_data)
         book = serializer.save()
         out = BookDetailSerializer(book)
         headers = self.get_success_headers(out.data)
         return Response(out.data, status=status.HTTP_200_OK, headers=headers)
 
-    @swagger_auto_schema(request_body=None, responses={200: BorrowSerializer})
+    @swagger_auto_schema(
+        request_body=BookImportSerializer,
+        responses={202: "Import job accepted", 400: "Bad Request"},
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request: Request) -> Response:
+        """
+        Import many ISBNs (JSON ``rows`` or a CSV ``file``) as one background job.
+
+        The job result holds a ``summary`` and one entry per input row.
+        """
+        if not (request.user and request.user.user_type == "staff"):
+            return Response(
+                {"detail": "You do not have permission to perform this action."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = import_books.delay(
+            serializer.validated_data["rows"], serializer.validated_data["update"]
+        )
+        return self._job_accepted(job)
+
+    def _enqueue_enrichment(self, validated_data) -> Response:
+        job = enrich_book.delay(validated_data["isbn"], validated_data.get("copies", 1))
+        return self._job_accepted(job)
+
+    def _job_accepted(self, job) -> Response:
+        status_url = self.request.build_absolute_uri(
+            reverse(
+                f"{self.request.resolver_match.namespace}:book-job",
+                kwargs={"job_id": job.id},
+            )
+        )
+        return Response(
+            {"job_id": job.id, "status": "pending", "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "wait",
+                openapi.IN_QUERY,
+                description="Seconds to wait for the job to finish (capped).",
+                type=openapi.TYPE_NUMBER,
+            )
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path=r"jobs/(?P<job_id>[^/.]+)")
+    def job(self, request: Request, job_id: str) -> Response:
+        """
+        Status of an asynchronous enrichment or import job; ``?wait=`` long-polls.
+        """
+        if not (request.user and request.user.user_type == "staff"):
+            return Response(
+                {"detail": "You do not have permission to perform this action."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        result = AsyncResult(job_id, app=enrich_book.app)
+        try:
+            wait = float(request.query_params.get("wait", 0))
+        except ValueError:
+            wait = 0
+        wait = min(max(wait, 0), settings.BOOKS_ENRICHMENT_MAX_WAIT)
+        if wait and not result.ready():
+            try:
+                result.get(timeout=wait, propagate=False)
+            except CeleryTimeoutError:
+                pass
+
+        body = {"job_id": job_id}
+        if result.state == "SUCCESS":
+            body.update(result.result)
+            book = Book.objects.filter(pk=body.pop("book_id", None)).first()
+            if book is not None:
+                body["book"] = BookDetailSerializer(book).data
+        elif result.state == "FAILURE":
+            body.update(status=FAILED, errors={"detail": "Enrichment job crashed."})
+        elif result.state == "STARTED":
+            body["status"] = "running"
+        else:
+            body["status"] = "pending"
+        return Response(body)
+
+    @swagger_auto_schema(request_body=None, responses={200: CirculationSerializer})
     @action(
         detail=True,
         methods=["post"],
         permission_classes=[permissions.IsAuthenticated, IsClientUser],
     )
     def borrow(self, request: Request, pk: str | None = None) -> Response:
-        book: Book = self.get_object()
-        with transaction.atomic():
-            updated = Book.objects.filter(pk=book.pk, copies__gt=0).update(
-                copies=F("copies") - 1
-            )
-            if updated == 0:
-                return Response({"detail": "No copies available."}, status=400)
-            borrow = Borrow.objects.create(
-                user=request.user,
-                book=book,
-                due_date=timezone.now().date() + timedelta(days=14),
+        try:
+            borrow = borrow_book(request.user.pk, self._book_id(pk))
+        except BookNotFound:
+            raise NotFound()
+        except InventoryUnavailable as exc:
+            return Response(
+                {"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
-        return Response(BorrowSerializer(borrow).data, status=200)
+        except CirculationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(CirculationSerializer(borrow).data, status=200)
 
-    @swagger_auto_schema(request_body=None)
+    @swagger_auto_schema(request_body=None, responses={200: CirculationSerializer})
     @action(
         detail=True,
         methods=["post"],
@@ -92,17 +305,94 @@ class BookViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated, IsClientUser],
     )
     def return_it(self, request: Request, pk: str | None = None) -> Response:
-        book = self.get_object()
         try:
-            borrow = Borrow.objects.get(
-                user=request.user,
-                book=book,
-                status=BorrowStatus.BORROWED,
-            )
-        except Borrow.DoesNotExist:
+            borrow = return_book(request.user.pk, self._book_id(pk))
+        except BookNotFound:
+            raise NotFound()
+        except InventoryUnavailable as exc:
             return Response(
-                {"detail": "No active borrow for this book."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
-        borrow.mark_returned()
-        return Response(BorrowSerializer(borrow).data)
+        except CirculationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(CirculationSerializer(borrow).data)
+
+    def _book_id(self, pk: str | None) -> int:
+        # borrow/return skip get_object(): the book is only touched by the
+        # single UPDATE statement in apps.books.circulation.
+        try:
+            return int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated, IsClientUser],
+    )
+    def batch_borrow(self, request: Request) -> Response:
+        """
+        Borrow a stack of books at once; one result per book.
+
+        ``mode=atomic`` (default) borrows all of them or none,
+        ``mode=best_effort`` borrows whichever are available.
+        """
+        return self._batch(request, borrow_books)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated, IsClientUser],
+    )
+    def batch_return(self, request: Request) -> Response:
+        """
+        Return a stack of borrowed books at once; modes as in ``batch_borrow``.
+        """
+        return self._batch(request, return_books)
+
+    def _batch(self, request: Request, operation) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        atomic = serializer.validated_data["mode"] == ATOMIC
+        results = operation(
+            request.user.pk, serializer.validated_data["book_ids"], atomic=atomic
+        )
+        for result in results:
+            if "borrow" in result:
+                result["borrow"] = CirculationSerializer(result["borrow"]).data
+        body = {
+            "summary": dict(Counter(result["status"] for result in results)),
+            "results": results,
+        }
+        if atomic and body["summary"].get(BATCH_FAILED):
+            body["detail"] = "Nothing was changed; see the failed books."
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+        return Response(body)
+
+    @swagger_auto_schema(request_body=None, responses={200: BookBorrowsSerializer})
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, IsStaffUser],
+    )
+    def borrows(self, request: Request, pk: str | None = None) -> Response:
+        """
+        Staff-only view of a book together with its full borrow history.
+        """
+        book = self.get_object()
+        return Response(self.get_serializer(book).data)
+
+
+@swagger_auto_schema(method="get", query_serializer=AutocompleteQuerySerializer)
+@api_view(["GET"])
+@authentication_classes([JWTStatelessUserAuthentication])
+def autocomplete(request: Request) -> Response:
+    """
+    Title and author suggestions for a typed prefix or fragment.
+
+    Authenticates from the JWT claims alone (no user query) and answers from a
+    short-lived Redis cache, so each keystroke stays cheap.
+    """
+    params = AutocompleteQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return Response(suggest(params.validated_data["q"], params.validated_data["limit"]))
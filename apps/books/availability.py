@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+from weakref import WeakKeyDictionary
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/v1/books/availability/stream/"
+
+
+# -------------------------------- publishing ------------------------------- #
+def publish_availability(changes: Dict[int, int]) -> None:
+    """
+    Announce the new ``copies`` of each book in *changes* once the current
+    transaction commits.
+
+    Events are best effort: a Redis failure is logged, never raised, and
+    subscribers resynchronise from the database when their stream reconnects.
+    """
+    if not settings.BOOKS_AVAILABILITY_EVENTS or not changes:
+        return
+    payloads = [
+        json.dumps({"book": pk, "copies": copies}) for pk, copies in changes.items()
+    ]
+
+    def send() -> None:
+        try:
+            pipe = get_redis_connection("default").pipeline(transaction=False)
+            for payload in payloads:
+                pipe.publish(settings.BOOKS_AVAILABILITY_CHANNEL, payload)
+            pipe.execute()
+        except RedisError:
+            logger.warning("Could not publish availability events", exc_info=True)
+
+    transaction.on_commit(send)
+
+
+# ------------------------------- subscribing ------------------------------- #
+class Subscription:
+    """
+    One client's interest in a set of books.
+
+    Holds only the latest ``copies`` per book until the client reads them, so
+    a slow client costs a small dict instead of an ever-growing queue.
+    """
+
+    def __init__(self, book_ids: Iterable[int]):
+        self.book_ids: FrozenSet[int] = frozenset(book_ids)
+        self.resync = False
+        self._pending: Dict[int, int] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, book_id: int, copies: int) -> None:
+        self._pending[book_id] = copies
+        self._ready.set()
+
+    def request_resync(self) -> None:
+        # Events may have been missed; the reader reloads from the database.
+        self.resync = True
+        self._ready.set()
+
+    async def wait(self) -> None:
+        await self._ready.wait()
+
+    def drain(self) -> Dict[int, int]:
+        self._ready.clear()
+        changes, self._pending = self._pending, {}
+        return changes
+
+
+class AvailabilityHub:
+    """
+    Fans availability events out to in-process subscriptions.
+
+    A hub holds one Redis pub/sub connection for any number of subscriptions,
+    which are plain objects waited on by the event loop, so idle streams cost
+    neither a thread nor a Redis connection each. The connection is reopened
+    with backoff when it drops; whenever it (re)connects, every subscription
+    is asked to resynchronise, since events may have been missed meanwhile.
+    """
+
+    def __init__(self):
+        self.ready = asyncio.Event()
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, book_ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(book_ids)
+        for pk in subscription.book_ids:
+            self._subscriptions[pk].add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for pk in subscription.book_ids:
+            subscriptions = self._subscriptions.get(pk)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[pk]
+
+    def subscriber_count(self) -> int:
+        return len(set().union(*self._subscriptions.values()))
+
+    def dispatch(self, data: bytes | str) -> None:
+        try:
+            event = json.loads(data)
+            book_id, copies = int(event["book"]), int(event["copies"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed availability event %r", data)
+            return
+        for subscription in self._subscriptions.get(book_id, ()):
+            subscription.push(book_id, copies)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        delay = 0.5
+        while True:
+            client = aioredis.from_url(settings.BOOKS_AVAILABILITY_REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(settings.BOOKS_AVAILABILITY_CHANNEL)
+                for subscriptions in list(self._subscriptions.values()):
+                    for subscription in subscriptions:
+                        subscription.request_resync()
+                delay = 0.5
+                self.ready.set()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(message["data"])
+            except (RedisError, OSError):
+                logger.warning(
+                    "Availability events lost Redis; retrying in %.1fs",
+                    delay,
+                    exc_info=True,
+                )
+            finally:
+                self.ready.clear()
+                await pubsub.aclose()
+                await client.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+_hubs: "WeakKeyDictionary[asyncio.AbstractEventLoop, AvailabilityHub]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_hub() -> AvailabilityHub:
+    """
+    The hub of the running event loop (one per server process in practice).
+    """
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = AvailabilityHub()
+    return hub
+
+
+# ------------------------------ SSE endpoint ------------------------------- #
+async def availability_stream(scope, receive, send) -> None:
+    """
+    ASGI app: ``GET …/availability/stream/?books=1,2,3`` streams
+    ``availability`` events (``{"book": id, "copies": n}``) as server-sent
+    events, starting with the current copies of every requested book.
+    Needs an access token, as a Bearer header or ``?token=``.
+    """
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if not _authenticated(scope, query):
+        await _respond(
+            send, 401, {"detail": "Authentication credentials were not provided."}
+        )
+        return
+    try:
+        book_ids = _parse_book_ids(query)
+    except ValueError as exc:
+        await _respond(send, 400, {"detail": str(exc)})
+        return
+
+    hub = get_hub()
+    subscription = hub.subscribe(book_ids)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        # Read the snapshot only once the hub listens, so no change can fall
+        # in between. If Redis is down, the hub asks for a resync later.
+        try:
+            await asyncio.wait_for(
+                hub.ready.wait(), settings.BOOKS_AVAILABILITY_HEARTBEAT
+            )
+        except asyncio.TimeoutError:
+            pass
+        subscription.drain()
+        subscription.resync = False
+        await _send(send, b"retry: 5000\n\n" + _events(await _snapshot(book_ids)))
+
+        while not disconnected.done():
+            waiter = asyncio.ensure_future(subscription.wait())
+            done, _ = await asyncio.wait(
+                {waiter, disconnected},
+                timeout=settings.BOOKS_AVAILABILITY_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if waiter not in done:
+                waiter.cancel()
+                if not disconnected.done():
+                    await _send(send, b": keepalive\n\n")
+                continue
+            changes = subscription.drain()
+            if subscription.resync:
+                subscription.resync = False
+                changes = await _snapshot(book_ids)
+            if changes:
+                await _send(send, _events(changes))
+    finally:
+        hub.unsubscribe(subscription)
+        disconnected.cancel()
+
+
+def _authenticated(scope, query: Dict[str, List[str]]) -> bool:
+    # EventSource cannot set headers, so the access token may also come as
+    # ?token=. Verified statelessly, like autocomplete: no database query.
+    headers = dict(scope.get("headers", []))
+    token = headers.get(b"authorization", b"").decode("latin-1")
+    token = token.removeprefix("Bearer ") if token.startswith("Bearer ") else ""
+    token = token or query.get("token", [""])[0]
+    if not token:
+        return False
+    try:
+        AccessToken(token)
+    except TokenError:
+        return False
+    return True
+
+
+def _parse_book_ids(query: Dict[str, List[str]]) -> List[int]:
+    raw = query.get("books", [""])[0]
+    try:
+        book_ids = list(dict.fromkeys(int(pk) for pk in raw.split(",") if pk))
+    except ValueError:
+        raise ValueError("'books' must be a comma-separated list of book ids.")
+    if not book_ids:
+        raise ValueError("Pass the books to watch as ?books=1,2,3.")
+    limit = settings.BOOKS_AVAILABILITY_MAX_BOOKS
+    if len(book_ids) > limit:
+        raise ValueError(f"At most {limit} books per stream.")
+    return book_ids
+
+
+async def _snapshot(book_ids: List[int]) -> Dict[int, int]:
+    from apps.books.models import Book
+
+    queryset = Book.objects.filter(pk__in=book_ids).values_list("pk", "copies")
+    return {pk: copies async for pk, copies in queryset}
+
+
+def _events(changes: Dict[int, int]) -> bytes:
+    return b"".join(
+        b"event: availability\ndata: "
+        + json.dumps({"book": pk, "copies": copies}).encode()
+        + b"\n\n"
+        for pk, copies in changes.items()
+    )
+
+
+async def _send(send, body: bytes) -> None:
+    await send({"type": "http.response.body", "body": body, "more_body": True})
+
+
+async def _disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _respond(send, status: int, body: dict) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
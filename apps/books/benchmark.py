@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import platform
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest.mock import patch
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.books.cache import CATALOG_VERSION_KEY, book_version_key
+from apps.books.models import Book
+from apps.books.seeding import can_copy, seed_books, seed_borrows, seed_users
+from apps.core.cache_utils import bump_cache_version
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+LIST_LIMITS = (10, 100)
+BOOKS_URL = "/v1/books/books/"
+# ISBN prefix of books made by the "create" scenario (removed after each size).
+CREATE_ISBN_PREFIX = "977"
+ENRICHMENT_STUB = {
+    "title": "Benchmark Book",
+    "author": "Bench Mark",
+    "description": "Stubbed Google Books payload.",
+    "published_date": "2024",
+    "publisher": "Bench Press",
+    "page_count": 320,
+}
+
+
+class BenchmarkError(Exception):
+    """
+    A benchmarked request did not succeed, so its timing would be meaningless.
+    """
+
+
+def measure(
+    name: str,
+    iterations: int,
+    request: Callable[[int], Any],
+    before: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Call ``request(i)`` *iterations* times and summarise latency and queries.
+
+    ``before(i)`` runs outside the timed section (e.g. to drop a cached page).
+    """
+    durations: List[float] = []
+    queries: List[int] = []
+    for i in range(iterations):
+        if before is not None:
+            before(i)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request(i)
+            durations.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f"{name}: HTTP {response.status_code} {response.content[:200]!r}"
+            )
+        queries.append(len(captured.captured_queries))
+
+    durations.sort()
+    ms = [d * 1000 for d in durations]
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+        "queries": int(statistics.median(queries)),
+        "queries_max": max(queries),
+    }
+
+
+def seed_catalog(
+    size: int,
+    *,
+    borrows_per_book: float = 1.0,
+    users: int = 100,
+    batch_size: int = 5_000,
+    seed: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Top the catalog up to *size* books, giving only the new ones a borrow
+    history, so growing 10k → 100k → 1M reuses the rows already there.
+    """
+    missing = size - Book.objects.count()
+    if missing <= 0:
+        return {"books": 0, "borrows": 0}
+    use_copy = can_copy(Book)
+    last_id = Book.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    books = seed_books(missing, batch_size=batch_size, seed=seed, use_copy=use_copy)
+    new_ids = Book.objects.filter(pk__gt=last_id).values_list("pk", flat=True)
+    borrows = seed_borrows(
+        new_ids.iterator(chunk_size=batch_size),
+        seed_users(users),
+        per_book=borrows_per_book,
+        batch_size=batch_size,
+        seed=seed,
+        use_copy=use_copy,
+    )
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book, books_borrow")
+    return {"books": books, "borrows": borrows}
+
+
+def _client_for(user) -> APIClient:
+    client = APIClient()
+    token = RefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def _bench_users():
+    User = get_user_model()
+    reader, _ = User.objects.get_or_create(
+        username="bench-reader", defaults={"user_type": "client"}
+    )
+    staff, _ = User.objects.get_or_create(
+        username="bench-staff",
+        defaults={"user_type": "staff", "is_staff": True},
+    )
+    return reader, staff
+
+
+def run_size(
+    size: int, *, iterations: int = 20, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Time every scenario against the current catalog (assumed to hold *size*
+    books) through the full Django/DRF stack, JWT authentication included.
+    """
+    rng = random.Random(seed)
+    reader, staff = _bench_users()
+    # Seeded open borrows can leave a book without copies to borrow.
+    ids = list(Book.objects.filter(copies__gt=0).values_list("pk", flat=True))
+    sample = rng.sample(ids, min(iterations, len(ids)))
+    pick = lambda i: sample[i % len(sample)]  # noqa: E731
+    results = []
+
+    def run(name, request, before=None, count=iterations):
+        results.append(measure(name, count, request, before))
+
+    def drop_list_pages(i):
+        bump_cache_version(CATALOG_VERSION_KEY)
+
+    def drop_detail_page(i):
+        bump_cache_version(book_version_key(pick(i)))
+
+    client = _client_for(reader)
+    for limit in LIST_LIMITS:
+        for offset in (0, max(0, size // 2)):
+            url = f"{BOOKS_URL}?limit={limit}&offset={offset}"
+            name = f"list limit={limit} offset={offset}"
+            run(f"{name} (cold)", lambda i: client.get(url), drop_list_pages)
+            run(f"{name} (cached)", lambda i: client.get(url))
+
+    run(
+        "retrieve (cold)",
+        lambda i: client.get(f"{BOOKS_URL}{pick(i)}/"),
+        drop_detail_page,
+    )
+    run("retrieve (cached)", lambda i: client.get(f"{BOOKS_URL}{pick(i)}/"))
+
+    # Borrow distinct books, then return them, so copies end where they started.
+    run(
+        "borrow",
+        lambda i: client.post(f"{BOOKS_URL}{sample[i]}/borrow/"),
+        count=len(sample),
+    )
+    run(
+        "return",
+        lambda i: client.post(f"{BOOKS_URL}{sample[i]}/return_it/"),
+        count=len(sample),
+    )
+
+    staff_client = _client_for(staff)
+    stamp = int(time.time() * 1000) % 10**6
+    with patch(
+        "apps.books.api.v1.serializers.fetch_google_books_info",
+        return_value=ENRICHMENT_STUB,
+    ):
+        run(
+            "create (enrichment stubbed)",
+            lambda i: staff_client.post(
+                BOOKS_URL,
+                {"isbn": f"{CREATE_ISBN_PREFIX}{stamp:06d}{i:04d}", "copies": 1},
+                format="json",
+            ),
+        )
+    Book.objects.filter(isbn__startswith=f"{CREATE_ISBN_PREFIX}{stamp:06d}").delete()
+
+    for row in results:
+        row["size"] = size
+    return results
+
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    *,
+    iterations: int = 20,
+    borrows_per_book: float = 1.0,
+    batch_size: int = 5_000,
+    seed: Optional[int] = 0,
+    log: Callable[[str], None] = lambda message: None,
+) -> Dict[str, Any]:
+    """
+    Seed and benchmark each catalog size in ascending order.
+    """
+    report: Dict[str, Any] = {
+        "meta": {
+            "started_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "database_version": ".".join(map(str, connection.get_database_version())),
+            "iterations": iterations,
+            "borrows_per_book": borrows_per_book,
+            "seed": seed,
+        },
+        "results": [],
+    }
+    for size in sorted(sizes):
+        started = time.perf_counter()
+        seeded = seed_catalog(
+            size, borrows_per_book=borrows_per_book, batch_size=batch_size, seed=seed
+        )
+        log(
+            f"size={size}: seeded {seeded['books']} books / {seeded['borrows']} "
+            f"borrows in {time.perf_counter() - started:.1f}s"
+        )
+        report["results"].extend(run_size(size, iterations=iterations, seed=seed))
+    return report
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], *, tolerance: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    Match results to *baseline* by size and scenario.
+
+    A row regresses when its median latency grew by more than *tolerance*
+    (0.2 = 20%) or it runs more queries than before.
+    """
+    previous = {(row["size"], row["scenario"]): row for row in baseline["results"]}
+    rows = []
+    for row in report["results"]:
+        base = previous.get((row["size"], row["scenario"]))
+        if base is None:
+            continue
+        ratio = row["p50_ms"] / base["p50_ms"] if base["p50_ms"] else None
+        rows.append(
+            {
+                "size": row["size"],
+                "scenario": row["scenario"],
+                "p50_ms": row["p50_ms"],
+                "baseline_p50_ms": base["p50_ms"],
+                "ratio": round(ratio, 3) if ratio is not None else None,
+                "queries": row["queries"],
+                "baseline_queries": base["queries"],
+                "regression": bool(
+                    (ratio is not None and ratio > 1 + tolerance)
+                    or row["queries"] > base["queries"]
+                ),
+            }
+        )
+    return rows
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from django.db import transaction
+
+from apps.core.cache_utils import bump_cache_version, get_cache_version
+
+CATALOG_VERSION_KEY = "books:catalog:version"
+
+
+def book_version_key(pk: int | str) -> str:
+    return f"books:book:{pk}:version"
+
+
+def catalog_cache_prefix(request, *args, **kwargs) -> str:
+    """
+    Page-cache prefix for the book list; changes whenever any book changes.
+    """
+    return f"books:list:{get_cache_version(CATALOG_VERSION_KEY, memo=True)}"
+
+
+def book_cache_prefix(request, *args, pk: str | None = None, **kwargs) -> str:
+    """
+    Page-cache prefix for one book; changes whenever that book changes.
+    """
+    version = get_cache_version(book_version_key(pk), memo=True)
+    return f"books:detail:{pk}:{version}"
+
+
+def invalidate_books(*pks: int) -> None:
+    """
+    Retire the cached list pages and the detail pages of *pks*.
+
+    Runs once the current transaction commits so a concurrent reader cannot
+    re-cache the pre-commit state under the new versions.
+    """
+
+    def bump() -> None:
+        bump_cache_version(CATALOG_VERSION_KEY)
+        for pk in pks:
+            bump_cache_version(book_version_key(pk))
+
+    transaction.on_commit(bump)
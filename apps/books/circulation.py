@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.books import inventory
+from apps.books.availability import publish_availability
+from apps.books.cache import invalidate_books
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+
+LOAN_DAYS = 14
+ACTIVE_BORROW_CONSTRAINT = "borrow_one_active_per_user_book"
+
+# Batch modes and per-book result statuses.
+ATOMIC = "atomic"
+BEST_EFFORT = "best_effort"
+BORROWED = BorrowStatus.BORROWED.value
+RETURNED = BorrowStatus.RETURNED.value
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class CirculationError(Exception):
+    """
+    A borrow or return that cannot happen; the message is user-facing.
+    """
+
+
+class BookNotFound(CirculationError):
+    def __init__(self):
+        super().__init__("Not found.")
+
+
+class NoCopiesAvailable(CirculationError):
+    def __init__(self):
+        super().__init__("No copies available.")
+
+
+class AlreadyBorrowed(CirculationError):
+    def __init__(self):
+        super().__init__("You already have an active borrow of this book.")
+
+
+class NotBorrowed(CirculationError):
+    def __init__(self):
+        super().__init__("No active borrow for this book.")
+
+
+class HotInventoryBook(CirculationError):
+    def __init__(self):
+        super().__init__("This book is in high demand; borrow or return it on its own.")
+
+
+class InventoryUnavailable(CirculationError):
+    """
+    A hot book whose Redis counter is missing or being rebuilt.
+    """
+
+    def __init__(self):
+        super().__init__("This book is temporarily unavailable; try again shortly.")
+
+
+# On Postgres each operation is one statement: data-modifying CTEs update the
+# book row and the borrow row and hand back the new state, so the hot book row
+# is locked for a single round trip. Every CTE runs even if nothing reads it.
+# Books flagged ``hot_inventory`` are counted in Redis and refused here; the
+# first column is that flag, or NULL when the book does not exist. A return
+# locks the book before its borrow, so it cannot slip in while inventory.enable()
+# copies the open borrows into Redis.
+BORROW_SQL = """
+WITH book AS (
+    UPDATE {book} SET copies = copies - 1
+    WHERE id = %(book_id)s AND copies > 0 AND NOT hot_inventory
+    RETURNING id, copies
+), borrow AS (
+    INSERT INTO {borrow} (user_id, book_id, status, borrowed_at, due_date)
+    SELECT %(user_id)s, id, %(borrowed)s, %(now)s, %(due_date)s FROM book
+    RETURNING id
+)
+SELECT
+    (SELECT hot_inventory FROM {book} WHERE id = %(book_id)s),
+    (SELECT copies FROM book),
+    (SELECT id FROM borrow)
+"""
+
+RETURN_SQL = """
+WITH borrow AS (
+    UPDATE {borrow} SET status = %(returned)s, returned_at = %(now)s
+    WHERE user_id = %(user_id)s AND book_id = %(book_id)s
+        AND status = %(borrowed)s
+        AND EXISTS (
+            SELECT 1 FROM {book} WHERE id = %(book_id)s AND NOT hot_inventory
+            FOR UPDATE
+        )
+    RETURNING id, borrowed_at, due_date, overdue_at
+), book AS (
+    UPDATE {book} SET copies = copies + 1
+    WHERE id = %(book_id)s AND EXISTS (SELECT 1 FROM borrow)
+    RETURNING copies
+)
+SELECT
+    (SELECT hot_inventory FROM {book} WHERE id = %(book_id)s),
+    (SELECT copies FROM book),
+    borrow.id,
+    borrow.borrowed_at,
+    borrow.due_date,
+    borrow.overdue_at
+FROM (SELECT 1) AS one LEFT JOIN borrow ON true
+"""
+
+_FIELDS = [
+    "id",
+    "user_id",
+    "book_id",
+    "status",
+    "borrowed_at",
+    "due_date",
+    "returned_at",
+    "overdue_at",
+]
+
+
+def borrow_book(user_id: int, book_id: int) -> Borrow:
+    """
+    Take one copy of *book_id* for *user_id*.
+
+    Raises :class:`BookNotFound`, :class:`NoCopiesAvailable`,
+    :class:`AlreadyBorrowed` or :class:`InventoryUnavailable`. The returned
+    borrow carries the remaining ``copies`` of the book; for a hot book it is
+    taken from the Redis counter and has no ``id`` until reconciled.
+    """
+    now = timezone.now()
+    params = {
+        "user_id": user_id,
+        "book_id": book_id,
+        "now": now,
+        "due_date": now.date() + timedelta(days=LOAN_DAYS),
+        "borrowed": BorrowStatus.BORROWED.value,
+    }
+    if settings.BOOKS_HOT_INVENTORY:
+        borrow = _borrow_hot(params)
+        if borrow is not None:
+            return borrow
+
+    if _single_statement():
+        try:
+            hot, copies, borrow_id = _fetch(BORROW_SQL, params)
+        except IntegrityError as exc:
+            if ACTIVE_BORROW_CONSTRAINT in str(exc):
+                raise AlreadyBorrowed() from exc
+            raise
+    else:
+        hot, copies, borrow_id = _borrow_with_orm(params)
+    if borrow_id is None:
+        if hot is None:
+            raise BookNotFound()
+        # The flag is read as of the statement's start: the book may have
+        # switched to Redis while we waited for its lock, so look there again.
+        borrow = _borrow_hot(params) if settings.BOOKS_HOT_INVENTORY else None
+        if borrow is not None:
+            return borrow
+        raise InventoryUnavailable() if hot else NoCopiesAvailable()
+
+    invalidate_books(book_id)
+    publish_availability({book_id: copies})
+    return _borrow(
+        params,
+        copies,
+        id=borrow_id,
+        status=BorrowStatus.BORROWED,
+        borrowed_at=now,
+        due_date=params["due_date"],
+        returned_at=None,
+    )
+
+
+def return_book(user_id: int, book_id: int) -> Borrow:
+    """
+    Close *user_id*'s open borrow of *book_id* and put the copy back.
+
+    Raises :class:`BookNotFound`, :class:`NotBorrowed` or
+    :class:`InventoryUnavailable`. The returned borrow carries the book's
+    ``copies`` afterwards.
+    """
+    params = {
+        "user_id": user_id,
+        "book_id": book_id,
+        "now": timezone.now(),
+        "borrowed": BorrowStatus.BORROWED.value,
+        "returned": BorrowStatus.RETURNED.value,
+    }
+    if settings.BOOKS_HOT_INVENTORY:
+        borrow = _return_hot(params)
+        if borrow is not None:
+            return borrow
+
+    if _single_statement():
+        row = _fetch(RETURN_SQL, params)
+    else:
+        row = _return_with_orm(params)
+    hot, copies, borrow_id, borrowed_at, due_date, overdue_at = row
+    if borrow_id is None:
+        if hot is None:
+            raise BookNotFound()
+        borrow = _return_hot(params) if settings.BOOKS_HOT_INVENTORY else None
+        if borrow is not None:
+            return borrow
+        raise InventoryUnavailable() if hot else NotBorrowed()
+
+    invalidate_books(book_id)
+    publish_availability({book_id: copies})
+    return _borrow(
+        params,
+        copies,
+        id=borrow_id,
+        status=BorrowStatus.RETURNED,
+        borrowed_at=borrowed_at,
+        due_date=due_date,
+        returned_at=params["now"],
+        overdue_at=overdue_at,
+    )
+
+
+def _borrow_hot(params: Dict[str, Any]) -> Optional[Borrow]:
+    # None when the book has no Redis counter, i.e. is not hot.
+    copies = inventory.take_copy(
+        params["user_id"], params["book_id"], params["now"], params["due_date"]
+    )
+    if copies == inventory.NOT_HOT:
+        return None
+    if copies == inventory.NO_COPIES:
+        raise NoCopiesAvailable()
+    if copies == inventory.HELD:
+        raise AlreadyBorrowed()
+    publish_availability({params["book_id"]: copies})
+    return _borrow(
+        params,
+        copies,
+        id=None,
+        status=BorrowStatus.BORROWED,
+        borrowed_at=params["now"],
+        due_date=params["due_date"],
+        returned_at=None,
+    )
+
+
+def _return_hot(params: Dict[str, Any]) -> Optional[Borrow]:
+    copies, held = inventory.give_back(
+        params["user_id"], params["book_id"], params["now"]
+    )
+    if copies == inventory.NOT_HOT:
+        return None
+    if copies == inventory.NOT_HELD:
+        raise NotBorrowed()
+    publish_availability({params["book_id"]: copies})
+    return _borrow(
+        params,
+        copies,
+        id=None,
+        status=BorrowStatus.RETURNED,
+        borrowed_at=held[0],
+        due_date=held[1],
+        returned_at=params["now"],
+    )
+
+
+def _single_statement() -> bool:
+    return connections[Borrow.objects.db].vendor == "postgresql"
+
+
+def _fetch(sql: str, params: Dict[str, Any]) -> Tuple:
+    connection = connections[Borrow.objects.db]
+    quote = connection.ops.quote_name
+    sql = sql.format(
+        book=quote(Book._meta.db_table), borrow=quote(Borrow._meta.db_table)
+    )
+    # Inside a transaction a failed statement must not poison the caller's
+    # block; on its own, one statement is atomic already.
+    block = transaction.atomic() if connection.in_atomic_block else nullcontext()
+    with block, connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def _borrow(params: Dict[str, Any], copies: int, **values: Any) -> Borrow:
+    values.setdefault("overdue_at", None)
+    values.update(user_id=params["user_id"], book_id=params["book_id"])
+    borrow = Borrow.from_db(
+        Borrow.objects.db, _FIELDS, [values[name] for name in _FIELDS]
+    )
+    borrow.copies = copies
+    return borrow
+
+
+# --------------------------------- batches -------------------------------- #
+def borrow_books(
+    user_id: int, book_ids: Iterable[int], *, atomic: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Borrow several books for *user_id* in one transaction.
+
+    The books are locked in id order, so concurrent batches over overlapping
+    books cannot deadlock; copies are decremented with one ``UPDATE`` and the
+    borrows written with one bulk insert. Returns one result per distinct
+    book id, in input order: ``{"book", "status", "borrow"}`` when borrowed,
+    ``{"book", "status", "detail"}`` otherwise. When *atomic*, one failure
+    leaves every book untouched and marks the others ``skipped``.
+    """
+    results = {book_id: {"book": book_id} for book_id in book_ids}
+    now = timezone.now()
+    due_date = now.date() + timedelta(days=LOAN_DAYS)
+    with transaction.atomic():
+        copies, hot = _lock_books(results)
+        held = set(
+            Borrow.objects.filter(
+                user_id=user_id, book_id__in=copies, status=BorrowStatus.BORROWED
+            ).values_list("book_id", flat=True)
+        )
+        for book_id, result in results.items():
+            if book_id not in copies:
+                _fail(result, BookNotFound())
+            elif book_id in hot:
+                _fail(result, HotInventoryBook())
+            elif book_id in held:
+                _fail(result, AlreadyBorrowed())
+            elif copies[book_id] < 1:
+                _fail(result, NoCopiesAvailable())
+
+        ready = _ready(results, atomic)
+        if ready:
+            Book.objects.filter(pk__in=ready).update(copies=F("copies") - 1)
+            borrows = Borrow.objects.bulk_create(
+                Borrow(
+                    user_id=user_id,
+                    book_id=book_id,
+                    borrowed_at=now,
+                    due_date=due_date,
+                )
+                for book_id in ready
+            )
+            invalidate_books(*ready)
+            for borrow in borrows:
+                borrow.copies = copies[borrow.book_id] - 1
+                results[borrow.book_id].update(status=BORROWED, borrow=borrow)
+            publish_availability({pk: copies[pk] - 1 for pk in ready})
+    return list(results.values())
+
+
+def return_books(
+    user_id: int, book_ids: Iterable[int], *, atomic: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Return several books of *user_id* in one transaction.
+
+    Locks the books, then the open borrows, each in book id order (the same
+    order as :func:`return_book`). Results are shaped as in
+    :func:`borrow_books`.
+    """
+    results = {book_id: {"book": book_id} for book_id in book_ids}
+    now = timezone.now()
+    with transaction.atomic():
+        copies, hot = _lock_books(results)
+        borrows = {
+            borrow.book_id: borrow
+            for borrow in Borrow.objects.select_for_update()
+            .filter(user_id=user_id, book_id__in=results, status=BorrowStatus.BORROWED)
+            .order_by("book_id")
+        }
+        for book_id, result in results.items():
+            if book_id not in copies:
+                _fail(result, BookNotFound())
+            elif book_id in hot:
+                _fail(result, HotInventoryBook())
+            elif book_id not in borrows:
+                _fail(result, NotBorrowed())
+
+        ready = _ready(results, atomic)
+        if ready:
+            Borrow.objects.filter(pk__in=[borrows[pk].pk for pk in ready]).update(
+                status=BorrowStatus.RETURNED, returned_at=now
+            )
+            Book.objects.filter(pk__in=ready).update(copies=F("copies") + 1)
+            invalidate_books(*ready)
+            for book_id in ready:
+                borrow = borrows[book_id]
+                borrow.status = BorrowStatus.RETURNED
+                borrow.returned_at = now
+                borrow.copies = copies[book_id] + 1
+                results[book_id].update(status=RETURNED, borrow=borrow)
+            publish_availability({pk: copies[pk] + 1 for pk in ready})
+    return list(results.values())
+
+
+def _lock_books(book_ids: Iterable[int]) -> Tuple[Dict[int, int], set]:
+    # Hot books are counted in Redis, one borrow at a time; batches skip them.
+    rows = (
+        Book.objects.select_for_update()
+        .filter(pk__in=list(book_ids))
+        .order_by("pk")
+        .values_list("pk", "copies", "hot_inventory")
+    )
+    copies, hot = {}, set()
+    for pk, count, is_hot in rows:
+        copies[pk] = count
+        if is_hot:
+            hot.add(pk)
+    return copies, hot
+
+
+def _fail(result: Dict[str, Any], error: CirculationError) -> None:
+    result.update(status=FAILED, detail=str(error))
+
+
+def _ready(results: Dict[int, Dict[str, Any]], atomic: bool) -> List[int]:
+    ready = [book_id for book_id, result in results.items() if "status" not in result]
+    if atomic and len(ready) < len(results):
+        for book_id in ready:
+            results[book_id]["status"] = SKIPPED
+        return []
+    return ready
+
+
+# ------------------------------ ORM fallback ------------------------------ #
+def _borrow_with_orm(params: Dict[str, Any]) -> Tuple:
+    # Shaped like BORROW_SQL's row: (hot_inventory, copies, borrow id).
+    with transaction.atomic():
+        book_id = params["book_id"]
+        updated = Book.objects.filter(
+            pk=book_id, copies__gt=0, hot_inventory=False
+        ).update(copies=F("copies") - 1)
+        if not updated:
+            return _hot_flag(book_id), None, None
+        try:
+            with transaction.atomic():
+                borrow = Borrow.objects.create(
+                    user_id=params["user_id"],
+                    book_id=book_id,
+                    borrowed_at=params["now"],
+                    due_date=params["due_date"],
+                )
+        except IntegrityError as exc:
+            raise AlreadyBorrowed() from exc
+        copies = Book.objects.values_list("copies", flat=True).get(pk=book_id)
+    return False, copies, borrow.pk
+
+
+def _return_with_orm(params: Dict[str, Any]) -> Tuple:
+    with transaction.atomic():
+        borrow = (
+            Borrow.objects.select_for_update()
+            .filter(
+                user_id=params["user_id"],
+                book_id=params["book_id"],
+                status=BorrowStatus.BORROWED,
+                book__hot_inventory=False,
+            )
+            .first()
+        )
+        if borrow is None:
+            return _hot_flag(params["book_id"]), None, None, None, None, None
+        borrow.status = BorrowStatus.RETURNED
+        borrow.returned_at = params["now"]
+        borrow.save(update_fields=["status", "returned_at"])
+        Book.objects.filter(pk=borrow.book_id).update(copies=F("copies") + 1)
+        copies = Book.objects.values_list("copies", flat=True).get(pk=borrow.book_id)
+    return (
+        False,
+        copies,
+        borrow.pk,
+        borrow.borrowed_at,
+        borrow.due_date,
+        borrow.overdue_at,
+    )
+
+
+def _hot_flag(book_id: int) -> Optional[bool]:
+    return (
+        Book.objects.filter(pk=book_id).values_list("hot_inventory", flat=True).first()
+    )
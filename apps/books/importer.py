@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import csv
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from apps.api.counting import invalidate_counts
+from apps.books.cache import invalidate_books
+from apps.books.models import Book
+from apps.books.utils import fetch_google_books_info
+
+CREATED = "created"
+UPDATED = "updated"
+EXISTS = "exists"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+NOT_FOUND = "not_found"
+
+ENRICHED_FIELDS = [
+    "title",
+    "author",
+    "description",
+    "published_date",
+    "cover_thumbnail",
+    "publisher",
+    "page_count",
+]
+REQUIRED_FIELDS = ["title", "author", "description", "published_date"]
+
+
+class RateLimiter:
+    """
+    Thread-safe pacing of calls to at most *rate* per second (``None``: off).
+    """
+
+    def __init__(self, rate: float | None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_rows(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse CSV *lines* into import rows.
+
+    A header naming an ``isbn`` column is honoured (``copies`` optional);
+    otherwise every line is read as ``isbn[,copies]``.
+    """
+    lines = iter(lines)
+    reader = csv.reader(lines)
+    for record in reader:
+        if not record or not record[0].strip():
+            continue
+        if reader.line_num == 1 and record[0].strip().lower() == "isbn":
+            yield from csv.DictReader(
+                lines, fieldnames=[c.strip().lower() for c in record]
+            )
+            return
+        yield {"isbn": record[0], "copies": record[1] if len(record) > 1 else None}
+
+
+def import_isbns(rows: Iterable[Mapping[str, Any]], **options) -> List[Dict[str, Any]]:
+    """
+    Import *rows* (``{"isbn": ..., "copies": ...}``) and return one result each.
+
+    See :func:`iter_import` for the options.
+    """
+    return list(iter_import(rows, **options))
+
+
+def iter_import(
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    update: bool = False,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    rate_limit: float | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream an ISBN import, yielding a result per input row in input order.
+
+    Rows are handled in batches of *batch_size*: one query finds the ISBNs that
+    already exist, the rest are enriched with one batched cache lookup, uncached
+    ISBNs being fetched concurrently by *workers* threads (paced to
+    *rate_limit* upstream calls per second), and written with a single
+    ``bulk_create``. With *update*, existing books are re-enriched and
+    upserted instead of being reported as ``exists``.
+    """
+    workers = workers or settings.BOOKS_IMPORT_WORKERS
+    batch_size = batch_size or settings.BOOKS_IMPORT_BATCH_SIZE
+    limiter = RateLimiter(
+        rate_limit if rate_limit is not None else settings.BOOKS_IMPORT_RATE_LIMIT
+    )
+    seen: set[str] = set()
+
+    numbered = enumerate(rows, start=1)
+    while batch := list(islice(numbered, batch_size)):
+        yield from _import_batch(batch, seen, update, workers, limiter)
+
+
+def summarize(results: Iterable[Mapping[str, Any]]) -> Dict[str, int]:
+    return dict(Counter(result["status"] for result in results))
+
+
+def _import_batch(batch, seen, update, workers, limiter) -> List[Dict[str, Any]]:
+    results, pending = [], []
+    for number, row in batch:
+        result = _parse(number, row)
+        results.append(result)
+        if result.get("status") == INVALID:
+            continue
+        if result["isbn"] in seen:
+            result["status"] = DUPLICATE
+            continue
+        seen.add(result["isbn"])
+        pending.append(result)
+
+    # isbn -> hot_inventory
+    existing = dict(
+        Book.objects.filter(isbn__in=[r["isbn"] for r in pending]).values_list(
+            "isbn", "hot_inventory"
+        )
+    )
+    to_enrich = []
+    for result in pending:
+        if result["isbn"] in existing and not update:
+            result["status"] = EXISTS
+        elif existing.get(result["isbn"]):
+            # Its availability lives in Redis (apps/books/inventory.py).
+            result.update(status=EXISTS, detail="Hot inventory book; not updated.")
+        else:
+            to_enrich.append(result)
+
+    # Cached ISBNs come back in one round trip; only misses hit Google Books
+    # and wait for the rate limiter.
+    enriched = fetch_google_books_info.many(
+        [r["isbn"] for r in to_enrich], workers=workers, throttle=limiter.wait
+    )
+    books_new: Dict[str, Book] = {}
+    new_results: Dict[str, Dict[str, Any]] = {}
+    books_existing: Dict[tuple, List[Book]] = {}
+    for result, data in zip(to_enrich, enriched):
+        fields = {f: data[f] for f in ENRICHED_FIELDS if data.get(f)}
+        missing = [f for f in REQUIRED_FIELDS if not fields.get(f)]
+        if missing:
+            result["status"] = NOT_FOUND
+            result["detail"] = f"Missing from Google Books: {', '.join(missing)}"
+            continue
+        book = Book(isbn=result["isbn"], copies=result.pop("copies"), **fields)
+        if result["isbn"] in existing:
+            result["status"] = UPDATED
+            # Only fields Google Books returned are written, one upsert per
+            # combination of them.
+            books_existing.setdefault(tuple(fields), []).append(book)
+        else:
+            result["status"] = CREATED
+            books_new[result["isbn"]] = book
+            new_results[result["isbn"]] = result
+
+    # bulk_create sends no signals, so counts and page caches are retired here.
+    for isbn in _create(books_new):
+        new_results[isbn].update(
+            status=EXISTS, detail="Imported concurrently; not updated."
+        )
+    if books_new:
+        invalidate_counts(Book)
+        invalidate_books()
+    # ``copies`` is the live available count, which borrows decrement, so
+    # an update never writes it.
+    for update_fields, books in books_existing.items():
+        Book.objects.bulk_create(
+            books,
+            update_conflicts=True,
+            unique_fields=["isbn"],
+            update_fields=list(update_fields),
+        )
+    if books_existing:
+        invalidate_books(
+            *Book.objects.filter(
+                isbn__in=[b.isbn for books in books_existing.values() for b in books]
+            ).values_list("pk", flat=True)
+        )
+    for result in results:
+        result.pop("copies", None)
+    return results
+
+
+def _create(books: Dict[str, Book]) -> List[str]:
+    """
+    Insert *books* (keyed by ISBN) in one statement and return the ISBNs a
+    concurrent import inserted first; those are removed from *books*, which
+    is left holding what was actually created.
+    """
+    taken: List[str] = []
+    while books:
+        try:
+            with transaction.atomic():
+                Book.objects.bulk_create(books.values())
+            break
+        except IntegrityError:
+            # The unique index waited for the other import to commit, so its
+            # rows are visible now.
+            clash = list(
+                Book.objects.filter(isbn__in=list(books)).values_list("isbn", flat=True)
+            )
+            if not clash:
+                raise
+            for isbn in clash:
+                taken.append(isbn)
+                del books[isbn]
+    return taken
+
+
+def _parse(number: int, row: Mapping[str, Any]) -> Dict[str, Any]:
+    isbn = "".join(str(row.get("isbn") or "").replace("-", "").split())
+    result: Dict[str, Any] = {"row": number, "isbn": isbn}
+    if not isbn or len(isbn) > Book._meta.get_field("isbn").max_length:
+        result.update(status=INVALID, detail="Invalid ISBN.")
+        return result
+    copies = row.get("copies")
+    try:
+        copies = int(copies) if copies not in (None, "") else 1
+    except (TypeError, ValueError):
+        copies = 0
+    if copies < 1:
+        result.update(status=INVALID, detail="copies must be a positive integer.")
+        return result
+    result["copies"] = copies
+    return result
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date, datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django_redis import get_redis_connection
+
+from apps.books.cache import invalidate_books
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow, InventoryCheckpoint
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_KEY = "inventory:journal"
+CHECKPOINT = "hot-inventory"
+
+# Results of the Lua scripts below other than a copy count (>= 0).
+NO_COPIES = -1
+NOT_HOT = -2
+HELD = -3
+NOT_HELD = -4
+
+
+def copies_key(book_id: int) -> str:
+    return f"inventory:book:{book_id}:copies"
+
+
+def holders_key(book_id: int) -> str:
+    return f"inventory:book:{book_id}:holders"
+
+
+# Every change to a counter appends the resulting state to one journal
+# stream in the same script, so the database can always be brought up to
+# date from the journal (see reconcile()). Holders map user id to
+# "<borrowed_at> <due_date>" for the borrows a book's counter accounts for.
+TAKE_SCRIPT = """
+local copies = redis.call('GET', KEYS[1])
+if not copies then return -2 end
+if redis.call('HEXISTS', KEYS[2], ARGV[2]) == 1 then return -3 end
+if tonumber(copies) <= 0 then return -1 end
+local left = redis.call('DECR', KEYS[1])
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3] .. ' ' .. ARGV[4])
+redis.call('XADD', KEYS[3], '*', 'op', 'borrow', 'book', ARGV[1],
+    'user', ARGV[2], 'at', ARGV[3], 'due', ARGV[4], 'copies', left)
+return left
+"""
+
+GIVE_BACK_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return {-2} end
+local held = redis.call('HGET', KEYS[2], ARGV[2])
+if not held then return {-4} end
+redis.call('HDEL', KEYS[2], ARGV[2])
+local left = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[3], '*', 'op', 'return', 'book', ARGV[1],
+    'user', ARGV[2], 'at', ARGV[3], 'copies', left)
+return {left, held}
+"""
+
+# ARGV: copies, then user/held pairs.
+LOAD_SCRIPT = """
+redis.call('DEL', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[1])
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# KEYS: journal, then copies/holders per book. Returns the last journal id
+# and, per book, its counter ('' when missing) and holder ids, atomically.
+SNAPSHOT_SCRIPT = """
+local last = redis.call('XREVRANGE', KEYS[1], '+', '-', 'COUNT', 1)
+local out = {last[1] and last[1][1] or '0-0'}
+for i = 2, #KEYS, 2 do
+    out[#out + 1] = redis.call('GET', KEYS[i]) or ''
+    out[#out + 1] = redis.call('HKEYS', KEYS[i + 1])
+end
+return out
+"""
+
+_scripts: Dict[str, Any] = {}
+
+
+def _redis():
+    return get_redis_connection(settings.BOOKS_HOT_INVENTORY_CACHE)
+
+
+def _run(script: str, keys: List[str], args: List[Any]) -> Any:
+    client = _redis()
+    if script not in _scripts:
+        _scripts[script] = client.register_script(script)
+    return _scripts[script](keys=keys, args=args, client=client)
+
+
+def _keys(book_id: int) -> List[str]:
+    return [copies_key(book_id), holders_key(book_id), JOURNAL_KEY]
+
+
+# ------------------------------- hot path ---------------------------------- #
+def take_copy(user_id: int, book_id: int, at: datetime, due_date: date) -> int:
+    """
+    Borrow from the Redis counter: copies left, or :data:`NO_COPIES`,
+    :data:`HELD` (the user already has this book) or :data:`NOT_HOT` (no
+    counter for this book).
+    """
+    return int(
+        _run(
+            TAKE_SCRIPT,
+            _keys(book_id),
+            [book_id, user_id, at.isoformat(), due_date.isoformat()],
+        )
+    )
+
+
+def give_back(
+    user_id: int, book_id: int, at: datetime
+) -> Tuple[int, Optional[Tuple[datetime, date]]]:
+    """
+    Return to the Redis counter: ``(copies, (borrowed_at, due_date))``, or
+    ``(NOT_HELD, None)`` when the user does not hold the book and
+    ``(NOT_HOT, None)`` when it has no counter.
+    """
+    result = _run(GIVE_BACK_SCRIPT, _keys(book_id), [book_id, user_id, at.isoformat()])
+    if len(result) == 1:
+        return int(result[0]), None
+    return int(result[0]), _parse_held(result[1])
+
+
+def _parse_held(value: bytes) -> Tuple[datetime, date]:
+    borrowed_at, due_date = value.decode().split(" ")
+    return datetime.fromisoformat(borrowed_at), date.fromisoformat(due_date)
+
+
+# -------------------------------- switching -------------------------------- #
+def enable(book_ids: Iterable[int]) -> List[int]:
+    """
+    Move the availability of *book_ids* into Redis. Returns the books switched.
+
+    The book rows stay locked while the counters are loaded, so a database
+    borrow in flight either commits first (and is counted) or sees the flag
+    and is refused.
+    """
+    with transaction.atomic():
+        books = _lock(book_ids, hot=False)
+        _load(books)
+        Book.objects.filter(pk__in=books).update(hot_inventory=True)
+    return list(books)
+
+
+def disable(book_ids: Iterable[int]) -> List[int]:
+    """
+    Move the availability of *book_ids* back to the database.
+
+    Drops the counters with the book rows locked, applies the rest of the
+    journal, then clears the flag, all in one transaction.
+    """
+    with transaction.atomic():
+        books = _lock(book_ids, hot=True)
+        _drain(books)
+        Book.objects.filter(pk__in=books).update(hot_inventory=False)
+    return list(books)
+
+
+def rebuild(book_ids: Iterable[int]) -> List[int]:
+    """
+    Reload the counters of hot *book_ids* from the database, e.g. after Redis
+    lost them or :func:`check` found drift.
+
+    Like :func:`disable` followed by :func:`enable` in one transaction: while
+    it runs, borrows of these books are refused rather than miscounted.
+    """
+    with transaction.atomic():
+        books = _lock(book_ids, hot=True)
+        _drain(books)
+        _load(dict(Book.objects.filter(pk__in=books).values_list("pk", "copies")))
+    return list(books)
+
+
+def _lock(book_ids: Iterable[int], *, hot: bool) -> Dict[int, int]:
+    # Checkpoint first, then books by id: the order reconcile() locks them in.
+    _checkpoint()
+    return dict(
+        Book.objects.select_for_update()
+        .filter(pk__in=list(book_ids), hot_inventory=hot)
+        .order_by("pk")
+        .values_list("pk", "copies")
+    )
+
+
+def _load(books: Dict[int, int]) -> None:
+    holders = _holders(books)
+    for pk, copies in books.items():
+        _run(LOAD_SCRIPT, _keys(pk), [copies, *holders.get(pk, [])])
+
+
+def _drain(books: Iterable[int]) -> None:
+    keys = [key for pk in books for key in _keys(pk)[:2]]
+    if keys:
+        # No new journal entries for these books after this, so reconcile()
+        # brings their rows fully up to date.
+        _redis().delete(*keys)
+        reconcile()
+
+
+def _holders(book_ids: Iterable[int]) -> Dict[int, List[Any]]:
+    holders: Dict[int, List[Any]] = {}
+    for book_id, user_id, borrowed_at, due_date in Borrow.objects.filter(
+        book_id__in=list(book_ids), status=BorrowStatus.BORROWED
+    ).values_list("book_id", "user_id", "borrowed_at", "due_date"):
+        holders.setdefault(book_id, []).extend(
+            [user_id, f"{borrowed_at.isoformat()} {due_date.isoformat()}"]
+        )
+    return holders
+
+
+# ------------------------------- reconciling ------------------------------- #
+def reconcile(
+    *, until: Optional[str] = None, batch_size: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Apply journaled borrows and returns to the database, oldest first.
+
+    Each batch writes its ``Borrow`` rows, the latest copies of its books and
+    the checkpoint in one transaction, so a crash at any point neither loses
+    nor repeats an entry. Applied entries are then trimmed from the stream.
+    Stops at journal id *until* when given.
+    """
+    batch_size = batch_size or settings.BOOKS_HOT_INVENTORY_RECONCILE_BATCH
+    client = _redis()
+    stats: Counter = Counter()
+    while True:
+        with transaction.atomic():
+            checkpoint = _checkpoint()
+            entries = client.xrange(
+                JOURNAL_KEY,
+                min=f"({checkpoint.last_id}",
+                max=until or "+",
+                count=batch_size,
+            )
+            if not entries:
+                break
+            stats.update(_apply(entries))
+            checkpoint.last_id = entries[-1][0].decode()
+            checkpoint.save(update_fields=["last_id", "updated_at"])
+            # Trim only once the checkpoint is durable: inside an outer
+            # transaction (disable, rebuild) that may still roll back.
+            transaction.on_commit(partial(_trim, checkpoint.last_id))
+        if len(entries) < batch_size:
+            break
+    return dict(stats)
+
+
+def _trim(last_id: str) -> None:
+    _redis().xtrim(JOURNAL_KEY, minid=_next_id(last_id), approximate=False)
+
+
+def pending() -> int:
+    """
+    Journal entries not yet applied to the database.
+    """
+    return _redis().xlen(JOURNAL_KEY)
+
+
+def _next_id(stream_id: str) -> str:
+    # MINID keeps its own id; trim through the applied entry itself.
+    ms, seq = stream_id.split("-")
+    return f"{ms}-{int(seq) + 1}"
+
+
+def _apply(entries: List[Tuple[bytes, Dict[bytes, bytes]]]) -> Counter:
+    stats: Counter = Counter()
+    created: List[Borrow] = []
+    opened: Dict[Tuple[int, int], Borrow] = {}
+    returns: Dict[Tuple[int, int], datetime] = {}
+    copies: Dict[int, int] = {}
+    for _, raw in entries:
+        entry = {key.decode(): value.decode() for key, value in raw.items()}
+        pair = (int(entry["user"]), int(entry["book"]))
+        at = datetime.fromisoformat(entry["at"])
+        copies[pair[1]] = int(entry["copies"])
+        if entry["op"] == "borrow":
+            opened[pair] = Borrow(
+                user_id=pair[0],
+                book_id=pair[1],
+                borrowed_at=at,
+                due_date=date.fromisoformat(entry["due"]),
+            )
+            created.append(opened[pair])
+            stats["borrowed"] += 1
+        elif pair in opened:
+            # Borrowed and returned within the batch: insert it returned.
+            borrow = opened.pop(pair)
+            borrow.status = BorrowStatus.RETURNED
+            borrow.returned_at = at
+            stats["returned"] += 1
+        else:
+            returns[pair] = at
+
+    if returns:
+        open_rows = Borrow.objects.filter(
+            status=BorrowStatus.BORROWED,
+            user_id__in={user for user, _ in returns},
+            book_id__in={book for _, book in returns},
+        )
+        closed = []
+        for borrow in open_rows:
+            at = returns.pop((borrow.user_id, borrow.book_id), None)
+            if at is not None:
+                borrow.status = BorrowStatus.RETURNED
+                borrow.returned_at = at
+                closed.append(borrow)
+        Borrow.objects.bulk_update(closed, ["status", "returned_at"])
+        stats["returned"] += len(closed)
+        if returns:
+            stats["missing"] += len(returns)
+            logger.warning("Hot inventory returns without an open borrow: %s", returns)
+    Borrow.objects.bulk_create(created)
+    list(
+        Book.objects.select_for_update()
+        .filter(pk__in=copies)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    Book.objects.filter(pk__in=copies).update(
+        copies=Case(*[When(pk=pk, then=Value(n)) for pk, n in copies.items()])
+    )
+    invalidate_books(*copies)
+    return stats
+
+
+def _checkpoint() -> InventoryCheckpoint:
+    return InventoryCheckpoint.objects.select_for_update().get_or_create(
+        name=CHECKPOINT
+    )[0]
+
+
+# --------------------------------- checking -------------------------------- #
+def check(book_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Compare the Redis counters of hot books with the database.
+
+    Takes one atomic snapshot of the counters, applies the journal up to that
+    snapshot, and reports every book whose copies or holders differ (or whose
+    counter is missing, e.g. after Redis lost its data). :func:`rebuild`
+    repairs them.
+    """
+    books = Book.objects.filter(hot_inventory=True).order_by("pk")
+    if book_ids is not None:
+        books = books.filter(pk__in=list(book_ids))
+    ids = list(books.values_list("pk", flat=True))
+    if not ids:
+        return []
+    snapshot = _run(
+        SNAPSHOT_SCRIPT,
+        [JOURNAL_KEY] + [key for pk in ids for key in _keys(pk)[:2]],
+        [],
+    )
+    last_id = snapshot[0].decode()
+    reconcile(until=last_id)
+
+    db_copies = dict(Book.objects.filter(pk__in=ids).values_list("pk", "copies"))
+    db_holders: Dict[int, set] = {pk: set() for pk in ids}
+    for book_id, user_id in Borrow.objects.filter(
+        book_id__in=ids, status=BorrowStatus.BORROWED
+    ).values_list("book_id", "user_id"):
+        db_holders[book_id].add(user_id)
+
+    report = []
+    for index, pk in enumerate(ids):
+        raw_copies, raw_holders = snapshot[1 + 2 * index], snapshot[2 + 2 * index]
+        redis_copies = int(raw_copies) if raw_copies else None
+        redis_holders = {int(user) for user in raw_holders}
+        if redis_copies is None:
+            problem = "missing"
+        elif redis_copies != db_copies[pk] or redis_holders != db_holders[pk]:
+            problem = "drift"
+        else:
+            continue
+        report.append(
+            {
+                "book": pk,
+                "problem": problem,
+                "redis_copies": redis_copies,
+                "db_copies": db_copies[pk],
+                "only_in_redis": sorted(redis_holders - db_holders[pk]),
+                "only_in_db": sorted(db_holders[pk] - redis_holders),
+            }
+        )
+    return report
@@ -0,0 +1,128 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from apps.books.benchmark import DEFAULT_SIZES, compare, run_benchmark
+
+
+def isolated_caches():
+    """
+    The configured caches under their own key prefix, so benchmark pages and
+    counters never mix with the real ones in a shared Redis.
+    """
+    return {
+        alias: {**config, "KEY_PREFIX": "bench_api:" + config.get("KEY_PREFIX", "")}
+        for alias, config in settings.CACHES.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the books API (list, retrieve, create, borrow, return) "
+        "through the DRF stack on seeded catalogs of increasing size, in a "
+        "throwaway test database. Writes JSON results and compares them with "
+        "a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=list(DEFAULT_SIZES),
+            help="Catalog sizes to benchmark (default: 10k, 100k, 1M books)",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--borrows-per-book",
+            type=float,
+            default=1.0,
+            help="Average borrow history length of each seeded book",
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--baseline", help="JSON report to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed median slowdown before a result counts as a regression",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when any result regressed",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database (and its seeded rows) between runs",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as stream:
+                baseline = json.load(stream)
+
+        verbosity = options["verbosity"]
+        old_config = setup_databases(
+            verbosity, interactive=False, keepdb=options["keepdb"], aliases={"default"}
+        )
+        try:
+            # APIClient requests come from "testserver", which only the test
+            # runner's environment setup would otherwise allow.
+            with override_settings(
+                CACHES=isolated_caches(),
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                report = run_benchmark(
+                    options["sizes"],
+                    iterations=options["iterations"],
+                    borrows_per_book=options["borrows_per_book"],
+                    batch_size=options["batch_size"],
+                    seed=options["seed"],
+                    log=self.stderr.write,
+                )
+        finally:
+            teardown_databases(old_config, verbosity, keepdb=options["keepdb"])
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, indent=2)
+        self._print_results(report)
+
+        if baseline is not None:
+            rows = compare(report, baseline, tolerance=options["tolerance"])
+            self._print_comparison(rows)
+            regressions = [row for row in rows if row["regression"]]
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed")
+
+    def _print_results(self, report):
+        self.stdout.write(
+            f"{'size':>9}  {'scenario':<36}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}"
+        )
+        for row in report["results"]:
+            self.stdout.write(
+                f"{row['size']:>9}  {row['scenario']:<36}{row['p50_ms']:>9.2f}"
+                f"{row['p95_ms']:>9.2f}{row['queries']:>9}"
+            )
+
+    def _print_comparison(self, rows):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'size':>9}  {'scenario':<36}{'p50 ms':>9}{'baseline':>10}"
+            f"{'ratio':>7}{'queries':>10}"
+        )
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+            self.stdout.write(
+                f"{row['size']:>9}  {row['scenario']:<36}{row['p50_ms']:>9.2f}"
+                f"{row['baseline_p50_ms']:>10.2f}{ratio:>7}"
+                f"{row['baseline_queries']:>5}→{row['queries']:<4}{flag}"
+            )
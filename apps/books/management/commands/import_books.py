@@ -0,0 +1,58 @@
+import json
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from apps.books.importer import CREATED, UPDATED, iter_import, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import books from a CSV of ISBNs (`isbn[,copies]`, optional header). "
+        "Prints one JSON line per row that was not imported and a summary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to read, or '-' for stdin")
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Re-enrich the catalogue fields of ISBNs that already exist",
+        )
+        parser.add_argument("--workers", type=int, help="Concurrent enrichments")
+        parser.add_argument("--batch-size", type=int, help="Rows per bulk insert")
+        parser.add_argument(
+            "--rate", type=float, help="Max Google Books calls per second"
+        )
+
+    def handle(self, *args, **options):
+        # stdin is not ours to close.
+        source = (
+            nullcontext(sys.stdin)
+            if options["path"] == "-"
+            else open(options["path"], newline="", encoding="utf-8-sig")
+        )
+        summary = {}
+        with source as stream:
+            results = iter_import(
+                read_rows(stream),
+                update=options["update"],
+                workers=options["workers"],
+                batch_size=options["batch_size"],
+                rate_limit=options["rate"],
+            )
+            for result in results:
+                summary[result["status"]] = summary.get(result["status"], 0) + 1
+                if options["verbosity"] > 1 or result["status"] not in (
+                    CREATED,
+                    UPDATED,
+                ):
+                    self.stdout.write(json.dumps(result))
+
+        self.stdout.write(
+            "Import finished: "
+            + ", ".join(
+                f"{status}={count}" for status, count in sorted(summary.items())
+            )
+        )
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.books import inventory
+from apps.books.models import Book, InventoryCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage hot inventory: move books' available copies into Redis "
+        "(`enable`) or back (`disable`), write the journal back to the database "
+        "(`reconcile`), and detect or repair drift after a Redis crash (`check`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action", choices=["enable", "disable", "reconcile", "check", "status"]
+        )
+        parser.add_argument("book_ids", nargs="*", type=int, metavar="book_id")
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="With check: rebuild the counters of books that drifted",
+        )
+
+    def handle(self, *args, **options):
+        action, book_ids = options["action"], options["book_ids"]
+        if action in ("enable", "disable") and not book_ids:
+            raise CommandError(f"{action} needs at least one book id.")
+
+        if action == "enable":
+            self._report("Enabled", inventory.enable(book_ids))
+        elif action == "disable":
+            self._report("Disabled", inventory.disable(book_ids))
+        elif action == "reconcile":
+            stats = inventory.reconcile()
+            self.stdout.write(
+                "Reconciled: "
+                + (", ".join(f"{k}={v}" for k, v in sorted(stats.items())) or "nothing")
+            )
+        elif action == "check":
+            self._check(book_ids or None, options["repair"])
+        else:
+            self._status()
+
+    def _report(self, verb, books):
+        self.stdout.write(f"{verb} {len(books)} book(s): {books}")
+
+    def _check(self, book_ids, repair):
+        report = inventory.check(book_ids)
+        for row in report:
+            self.stdout.write(json.dumps(row))
+        if not report:
+            self.stdout.write("No drift.")
+        elif repair:
+            self._report("Rebuilt", inventory.rebuild(row["book"] for row in report))
+        else:
+            raise CommandError(
+                f"{len(report)} book(s) drifted; rerun with --repair to rebuild them."
+            )
+
+    def _status(self):
+        hot = list(
+            Book.objects.filter(hot_inventory=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        checkpoint = InventoryCheckpoint.objects.filter(
+            name=inventory.CHECKPOINT
+        ).first()
+        self.stdout.write(f"Hot books: {hot}")
+        self.stdout.write(
+            f"Journal: {inventory.pending()} pending, checkpoint "
+            f"{checkpoint.last_id if checkpoint else '0-0'}"
+        )
@@ -1,36 +1,88 @@
-from faker import Faker
+import time
+
 from django.core.management.base import BaseCommand
 from apps.books.models import Book
+from apps.books.seeding import can_copy, seed_books, seed_borrows, seed_users
 
 
 class Command(BaseCommand):
-    help = "Populate the Book database with fake data using a fixture file"
+    help = (
+        "Populate the Book database with fake data. Rows are generated in "
+        "chunks (optionally on several processes) and written with bulk "
+        "inserts, or Postgres COPY when available."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100, help="Books to add")
+        parser.add_argument(
+            "--batch-size", type=int, default=5_000, help="Rows per insert"
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Make the generated data reproducible"
+        )
+        parser.add_argument(
+            "--borrows",
+            type=float,
+            default=0,
+            help="Average number of past borrows to generate per new book",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Client users (seed0…) the generated borrows belong to",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Processes generating rows"
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even when Postgres COPY is available",
+        )
 
     def handle(self, *args, **options):
-        fake = Faker()
-
-        books_fixture = [
-            {
-                "title": fake.sentence(nb_words=4),
-                "author": fake.name(),
-                "isbn": fake.isbn13(),
-                "copies": fake.random_int(min=1, max=10),
-            }
-            for _ in range(100)
-        ]
-
-        added, skipped = 0, 0
-        for book_data in books_fixture:
-            isbn = book_data.get("isbn", "").replace("-", "").strip()
-            if not isbn or Book.objects.filter(isbn=isbn).exists():
-                skipped += 1
-                continue
-
-            book_data.setdefault("copies", 1)
-            try:
-                Book.objects.create(**book_data)
-                added += 1
-            except Exception as ex:
-                self.stderr.write(f"Error saving book {book_data.get('title')}: {ex}")
-
-        self.stdout.write(f"Books added: {added}; skipped (duplicates): {skipped}")
+        # Migrations pass their historical model; the live one may have
+        # columns that do not exist yet at that point of the history.
+        book_model = options.get("book_model") or Book
+        count = options.get("count", 100)
+        batch_size = options.get("batch_size", 5_000)
+        workers = options.get("workers", 1)
+        use_copy = not options.get("no_copy", False) and can_copy(book_model)
+        started = time.perf_counter()
+
+        last_id = (
+            book_model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        )
+        added = seed_books(
+            count,
+            batch_size=batch_size,
+            seed=options.get("seed"),
+            workers=workers,
+            use_copy=use_copy,
+            book_model=book_model,
+        )
+        self.stdout.write(
+            f"Books added: {added}; skipped (duplicates): {count - added}"
+        )
+
+        if options.get("borrows"):
+            new_ids = book_model.objects.filter(pk__gt=last_id).values_list(
+                "pk", flat=True
+            )
+            borrows = seed_borrows(
+                new_ids.iterator(chunk_size=batch_size),
+                seed_users(options.get("users", 100)),
+                per_book=options["borrows"],
+                batch_size=batch_size,
+                seed=options.get("seed"),
+                workers=workers,
+                use_copy=use_copy,
+            )
+            self.stdout.write(f"Borrows added: {borrows}")
+
+        if options.get("verbosity", 1) > 1:
+            method = "COPY" if use_copy else "bulk_create"
+            self.stdout.write(
+                f"Done in {time.perf_counter() - started:.1f}s using {method}"
+            )
@@ -6,7 +6,7 @@ from apps.books.management.commands.populate_book import Command as PopulateBook
 
 def populate_books(apps, schema_editor):
     cmd = PopulateBookCommand()
-    cmd.handle()
+    cmd.handle(book_model=apps.get_model("books", "Book"))
 
 
 class Migration(migrations.Migration):
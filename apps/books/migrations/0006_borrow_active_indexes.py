@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-18 07:31
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_active_borrows(apps, schema_editor):
+    """
+    Stop before the partial unique constraint if any user holds more than one
+    open borrow of a book. Which of those loans is real is for an operator to
+    decide; closing them here would record returns that never happened.
+    """
+    Borrow = apps.get_model("books", "Borrow")
+    duplicates = list(
+        Borrow.objects.filter(status="borrowed")
+        .values_list("user_id", "book_id")
+        .annotate(open_count=Count("id"))
+        .filter(open_count__gt=1)
+        .order_by("user_id", "book_id")
+    )
+    if duplicates:
+        pairs = ", ".join(
+            f"user {user} / book {book} ({count} open)"
+            for user, book, count in duplicates
+        )
+        raise RuntimeError(
+            "Resolve the duplicate open borrows before migrating; each (user, "
+            f"book) may have only one with status 'borrowed': {pairs}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0005_book_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_duplicate_active_borrows, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name="borrow",
+            index=models.Index(
+                condition=models.Q(("status", "borrowed")),
+                fields=["due_date"],
+                name="borrow_active_due_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="borrow",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "borrowed")),
+                fields=("user", "book"),
+                name="borrow_one_active_per_user_book",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+def set_column_default(apps, schema_editor):
+    # Seeding COPYs books without listing this column (see apps/books/seeding.py).
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE books_book ALTER COLUMN hot_inventory SET DEFAULT false"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_borrow_active_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCheckpoint',
+            fields=[
+                (
+                    'name',
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ('last_id', models.CharField(default='0-0', max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='hot_inventory',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(set_column_default, migrations.RunPython.noop),
+    ]
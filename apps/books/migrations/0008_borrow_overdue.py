@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_hot_inventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrow',
+            name='overdue_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(
+                condition=models.Q(
+                    ('overdue_at__isnull', True), ('status', 'borrowed')
+                ),
+                fields=['due_date', 'id'],
+                name='borrow_overdue_sweep_idx',
+            ),
+        ),
+    ]
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 
+from apps.books.availability import publish_availability
+from apps.books.cache import invalidate_books
 from apps.books.choices import BorrowStatus
 
 
@@ -21,6 +26,37 @@ class Book(models.Model):
     publisher = models.CharField(max_length=255, blank=True, null=True)
     page_count = models.PositiveIntegerField(blank=True, null=True)
     copies = models.PositiveIntegerField(default=1)
+    # Available copies live in Redis while set (apps/books/inventory.py); the
+    # database borrow/return paths refuse such books.
+    hot_inventory = models.BooleanField(default=False)
+    # Weighted title/author/publisher/description document, maintained by the
+    # ``books_book_search_vector_update`` trigger (migration 0004).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination: WHERE (key, id) > (%s, %s) ORDER BY key, id
+            models.Index(fields=["title", "id"], name="book_title_id_idx"),
+            models.Index(fields=["author", "id"], name="book_author_id_idx"),
+            GinIndex(fields=["search_vector"], name="book_search_vector_idx"),
+            # autocomplete: ordered prefix scans and fuzzy (pg_trgm) fallback
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                name="book_title_prefix_idx",
+            ),
+            models.Index(
+                OpClass(Upper("author"), name="text_pattern_ops"),
+                name="book_author_prefix_idx",
+            ),
+            GinIndex(
+                fields=["title"], opclasses=["gin_trgm_ops"], name="book_title_trgm_idx"
+            ),
+            GinIndex(
+                fields=["author"],
+                opclasses=["gin_trgm_ops"],
+                name="book_author_trgm_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.isbn})"
@@ -38,6 +74,38 @@ class Borrow(models.Model):
     borrowed_at = models.DateTimeField(default=timezone.now)
     due_date = models.DateField()
     returned_at = models.DateTimeField(blank=True, null=True)
+    # Set by the overdue sweep (apps/books/overdue.py) and kept after return.
+    overdue_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # A user holds at most one copy of a book at a time. The index
+            # behind it is the composite index for active borrows: it serves
+            # return_it's (user, book, status="borrowed") lookup and, through
+            # its leading column, "open borrows of this user".
+            models.UniqueConstraint(
+                fields=["user", "book"],
+                condition=models.Q(status=BorrowStatus.BORROWED),
+                name="borrow_one_active_per_user_book",
+            ),
+        ]
+        indexes = [
+            # overdue scans across all users
+            models.Index(
+                fields=["due_date"],
+                condition=models.Q(status=BorrowStatus.BORROWED),
+                name="borrow_active_due_idx",
+            ),
+            # the overdue sweep's keyset walk; rows leave it once flagged, so
+            # it holds only the backlog, not the whole ledger
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(
+                    status=BorrowStatus.BORROWED, overdue_at__isnull=True
+                ),
+                name="borrow_overdue_sweep_idx",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.user} – {self.book} ({self.status})"
@@ -47,8 +115,37 @@ class Borrow(models.Model):
     def mark_returned(self) -> None:
         if self.status == BorrowStatus.RETURNED:
             return
+        # Locking the book keeps it from switching to hot inventory meanwhile.
+        hot = (
+            Book.objects.select_for_update()
+            .values_list("hot_inventory", flat=True)
+            .get(pk=self.book_id)
+        )
+        if hot:
+            # The copy goes back to the Redis counter; reconciling the journal
+            # closes this row.
+            from apps.books.circulation import return_book
+
+            return_book(self.user_id, self.book_id)
+            return
         self.status = BorrowStatus.RETURNED
         self.returned_at = timezone.now()
         self.save(update_fields=["status", "returned_at"])
-        self.book.copies = models.F("copies") + 1
-        self.book.save(update_fields=["copies"])
+        Book.objects.filter(pk=self.book_id).update(copies=models.F("copies") + 1)
+        invalidate_books(self.book_id)
+        copies = Book.objects.values_list("copies", flat=True).get(pk=self.book_id)
+        publish_availability({self.book_id: copies})
+
+
+class InventoryCheckpoint(models.Model):
+    """
+    Last hot-inventory journal entry applied to the database, updated in the
+    same transaction as the rows it stands for.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    last_id = models.CharField(max_length=64, default="0-0")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from apps.books.choices import BorrowStatus
+from apps.books.models import Borrow
+from apps.core.metrics import OVERDUE_FLAGGED
+
+logger = logging.getLogger(__name__)
+
+
+def overdue_chunk(
+    today: date, chunk_size: int, after: Optional[Tuple[date, int]] = None
+) -> QuerySet:
+    """
+    ``(due_date, id)`` of the next *chunk_size* open borrows due before
+    *today*, in index order, starting after the key *after*.
+    """
+    page = Borrow.objects.filter(
+        status=BorrowStatus.BORROWED, overdue_at__isnull=True, due_date__lt=today
+    ).order_by("due_date", "id")
+    if after is not None:
+        # The leading bound starts the index range scan at the cursor.
+        page = page.filter(
+            Q(due_date__gte=after[0])
+            & (Q(due_date__gt=after[0]) | Q(due_date=after[0], id__gt=after[1]))
+        )
+    return page.values_list("due_date", "id")[:chunk_size]
+
+
+def sweep_overdue(
+    *, today: Optional[date] = None, chunk_size: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Flag every open borrow due before *today* by setting ``overdue_at``.
+
+    Walks the candidates in ``(due_date, id)`` order over
+    ``borrow_overdue_sweep_idx``, one chunk per round trip: a keyset read of
+    the next ids, then one ``UPDATE`` for the whole chunk. Flagged rows drop
+    out of that partial index, so a run costs what is newly overdue, however
+    large the ledger grows. Each chunk commits on its own; a borrow returned
+    meanwhile is left alone.
+    """
+    today = today or timezone.localdate()
+    chunk_size = chunk_size or settings.BOOKS_OVERDUE_SWEEP_CHUNK
+    now = timezone.now()
+
+    started = time.perf_counter()
+    stats = {"flagged": 0, "chunks": 0}
+    last = None
+    while True:
+        keys = list(overdue_chunk(today, chunk_size, last))
+        if not keys:
+            break
+        stats["flagged"] += Borrow.objects.filter(
+            pk__in=[pk for _, pk in keys],
+            status=BorrowStatus.BORROWED,
+            overdue_at__isnull=True,
+        ).update(overdue_at=now)
+        stats["chunks"] += 1
+        last = keys[-1]
+        if len(keys) < chunk_size:
+            break
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    OVERDUE_FLAGGED.inc(stats["flagged"])
+    logger.info(
+        "Overdue sweep flagged %d borrow(s) in %d chunk(s), %.3fs",
+        stats["flagged"],
+        stats["chunks"],
+        stats["seconds"],
+    )
+    return stats
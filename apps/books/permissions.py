@@ -11,3 +11,18 @@ class IsClientUser(permissions.BasePermission):
         if hasattr(user, "user_type"):
             return user.user_type == "client"
         return True
+
+
+class IsStaffUser(permissions.BasePermission):
+    """
+    Staff by account type (``user_type == "staff"``), as the staff-only book
+    actions check it; ``is_staff`` only governs the Django admin.
+    """
+
+    def has_permission(self, req: request.Request, _: object) -> bool:
+        user = req.user
+        return bool(
+            user
+            and user.is_authenticated
+            and getattr(user, "user_type", None) == "staff"
+        )
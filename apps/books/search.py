@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Upper
+from django.utils.module_loading import import_string
+
+from apps.books.models import Book
+
+SEARCH_FIELDS = ("title", "author", "publisher", "description")
+
+
+class PostgresSearchBackend:
+    """
+    Ranked full-text search over the trigger-maintained ``search_vector``.
+
+    Matches are found through the GIN index and capped at
+    ``BOOKS_SEARCH_MAX_CANDIDATES`` before ranking, so the cost of a query is
+    bounded by that cap rather than by the size of the catalog.
+    """
+
+    config = "english"
+
+    def search(self, queryset: QuerySet, terms: str) -> QuerySet:
+        query = SearchQuery(terms, search_type="websearch", config=self.config)
+        candidates = (
+            queryset.model.objects.filter(search_vector=query)
+            .order_by()
+            .values("pk")[: settings.BOOKS_SEARCH_MAX_CANDIDATES]
+        )
+        return (
+            queryset.filter(pk__in=candidates)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "id")
+        )
+
+
+class SimpleSearchBackend:
+    """
+    Portable ``icontains`` fallback for databases without full-text search.
+
+    Rank is a fixed weight per matching field, mirroring the A-D weights of the
+    Postgres document.
+    """
+
+    weights = {"title": 1.0, "author": 0.4, "publisher": 0.2, "description": 0.1}
+
+    def search(self, queryset: QuerySet, terms: str) -> QuerySet:
+        matches = Q()
+        rank = Value(0.0)
+        for field in SEARCH_FIELDS:
+            lookup = Q(**{f"{field}__icontains": terms})
+            matches |= lookup
+            rank = rank + Case(
+                When(lookup, then=Value(self.weights[field])),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        return queryset.filter(matches).annotate(rank=rank).order_by("-rank", "id")
+
+
+def get_search_backend():
+    return import_string(settings.BOOKS_SEARCH_BACKEND)()
+
+
+# ------------------------------- autocomplete ------------------------------- #
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LENGTH = 64
+FUZZY_MIN_LENGTH = 3
+
+
+def normalize_fragment(fragment: str) -> str:
+    return " ".join(fragment.split()).lower()[:AUTOCOMPLETE_MAX_LENGTH]
+
+
+def suggest(fragment: str, limit: int) -> Dict[str, Any]:
+    """
+    Top *limit* titles and authors for a typed *fragment*.
+
+    Prefix matches come first and are read in index order from the
+    ``UPPER(field) text_pattern_ops`` indexes, so they cost O(limit). When those
+    run short, ``pg_trgm`` word similarity fills the rest from the trigram
+    indexes. Results are cached for ``BOOKS_AUTOCOMPLETE_TTL`` seconds per
+    normalised fragment.
+    """
+    normalized = normalize_fragment(fragment)
+    if len(normalized) < AUTOCOMPLETE_MIN_LENGTH:
+        return {"query": normalized, "titles": [], "authors": []}
+
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    cache_key = f"books:autocomplete:{limit}:{digest}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    titles = _matches("title", normalized, limit, values=("id", "title"))
+    authors = [
+        row["author"]
+        for row in _matches("author", normalized, limit, values=("author",))
+    ]
+    result = {"query": normalized, "titles": titles, "authors": authors}
+    cache.set(cache_key, result, timeout=settings.BOOKS_AUTOCOMPLETE_TTL)
+    return result
+
+
+def _matches(field: str, fragment: str, limit: int, values) -> List[Dict[str, Any]]:
+    # Over-fetch so duplicates (same author on many books) can be dropped.
+    window = limit * 3
+    prefix = (
+        Book.objects.filter(**{f"{field}__istartswith": fragment})
+        .order_by(Upper(field))
+        .values(*values)[:window]
+    )
+    rows = _unique(prefix, field, limit)
+    if len(rows) < limit and _fuzzy_enabled(fragment):
+        fuzzy = (
+            Book.objects.filter(**{f"{field}__trigram_word_similar": fragment})
+            .annotate(similarity=TrigramWordSimilarity(fragment, field))
+            .order_by("-similarity", Upper(field))
+            .values(*values)[:window]
+        )
+        rows = _unique([*rows, *fuzzy], field, limit)
+    return rows
+
+
+def _unique(rows, field: str, limit: int) -> List[Dict[str, Any]]:
+    seen, unique = set(), []
+    for row in rows:
+        key = row[field].lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+        if len(unique) == limit:
+            break
+    return unique
+
+
+def _fuzzy_enabled(fragment: str) -> bool:
+    return len(fragment) >= FUZZY_MIN_LENGTH and connection.vendor == "postgresql"
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import io
+import multiprocessing
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from faker import Faker
+
+from apps.api.counting import invalidate_counts
+from apps.books.cache import invalidate_books
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+
+SEED_PASSWORD = "admin123"
+# Seeded ISBNs are "979" + a 10-digit running index, so topping a catalog up
+# never collides with books seeded earlier.
+ISBN_PREFIX = "979"
+BOOK_COLUMNS = (
+    "isbn",
+    "title",
+    "author",
+    "description",
+    "published_date",
+    "publisher",
+    "page_count",
+    "copies",
+)
+BORROW_COLUMNS = (
+    "user_id",
+    "book_id",
+    "status",
+    "borrowed_at",
+    "due_date",
+    "returned_at",
+)
+
+
+class _Vocabulary:
+    """
+    Small pools of Faker output sampled per row; calling Faker for every field
+    of a million rows would dominate the run time.
+    """
+
+    def __init__(self, seed: Optional[int]):
+        fake = Faker()
+        if seed is not None:
+            fake.seed_instance(seed)
+        self.words = [fake.word() for _ in range(2_000)]
+        self.names = [fake.name() for _ in range(1_000)]
+        self.publishers = [fake.company() for _ in range(200)]
+        self.sentences = [fake.paragraph() for _ in range(500)]
+
+
+@lru_cache(maxsize=4)
+def _vocabulary(seed: Optional[int]) -> _Vocabulary:
+    return _Vocabulary(seed)
+
+
+def _rng(seed: Optional[int], chunk: int) -> random.Random:
+    # One stream per chunk: output depends on the seed, not on the workers.
+    return random.Random(None if seed is None else f"{seed}:{chunk}")
+
+
+# ------------------------------- generation ------------------------------- #
+def generate_book_rows(start: int, count: int, seed: Optional[int] = None) -> List:
+    """
+    Rows (in :data:`BOOK_COLUMNS` order) for books ``start`` … ``start + count``.
+    """
+    rng = _rng(seed, start)
+    vocab = _vocabulary(seed)
+    return [
+        (
+            f"{ISBN_PREFIX}{index:010d}",
+            " ".join(rng.choices(vocab.words, k=rng.randint(2, 6))).title(),
+            rng.choice(vocab.names),
+            rng.choice(vocab.sentences),
+            str(rng.randint(1950, 2024)),
+            rng.choice(vocab.publishers),
+            rng.randint(80, 900),
+            rng.randint(1, 10),
+        )
+        for index in range(start, start + count)
+    ]
+
+
+def generate_borrow_rows(
+    book_ids: Sequence[int],
+    user_ids: Sequence[int],
+    per_book: float,
+    active_ratio: float,
+    seed: Optional[int],
+    now: datetime,
+) -> List:
+    """
+    Rows (in :data:`BORROW_COLUMNS` order) with about *per_book* borrows of
+    each book.
+
+    The most recent borrow of a book is still open with probability
+    *active_ratio*; every other one is returned. At most one borrow per book is
+    open, so no user ever holds two copies of the same book.
+    """
+    rng = _rng(seed, book_ids[0] if book_ids else 0)
+    rows = []
+    for book_id in book_ids:
+        history = int(per_book) + (rng.random() < per_book % 1)
+        borrowed_at = now - timedelta(days=rng.randint(15, 30) * (history + 1))
+        for position in range(history):
+            borrowed_at += timedelta(days=rng.randint(1, 14))
+            active = position == history - 1 and rng.random() < active_ratio
+            rows.append(
+                (
+                    rng.choice(user_ids),
+                    book_id,
+                    BorrowStatus.BORROWED if active else BorrowStatus.RETURNED,
+                    borrowed_at,
+                    (borrowed_at + timedelta(days=14)).date(),
+                    (
+                        None
+                        if active
+                        else borrowed_at + timedelta(days=rng.randint(1, 14))
+                    ),
+                )
+            )
+    return rows
+
+
+def _generate(
+    func: Callable[..., List], jobs: Iterable[tuple], workers: int
+) -> Iterator[List]:
+    """
+    ``func(*job)`` for every job, in order, on up to *workers* forked processes.
+
+    At most two chunks per worker are in flight, so memory stays bounded while
+    the caller inserts. Without ``fork`` (or with one worker) rows are made
+    in-process.
+    """
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for job in jobs:
+            yield func(*job)
+        return
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending: deque = deque()
+        for job in jobs:
+            pending.append(pool.submit(func, *job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --------------------------------- writing -------------------------------- #
+def can_copy(model) -> bool:
+    """
+    Whether rows for *model* can be streamed with Postgres ``COPY``.
+    """
+    connection = connections[model.objects.db]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, "copy_expert")
+
+
+def insert_rows(
+    model,
+    columns: Sequence[str],
+    rows: List,
+    *,
+    use_copy: bool = False,
+    ignore_conflicts: bool = False,
+) -> None:
+    """
+    Insert *rows* with ``COPY`` or ``bulk_create``.
+
+    ``COPY`` cannot skip conflicting rows, so with *ignore_conflicts* the rows
+    are copied into a temporary table first and moved over with
+    ``INSERT … ON CONFLICT DO NOTHING``.
+    """
+    if not rows:
+        return
+    if not use_copy:
+        model.objects.bulk_create(
+            [model(**dict(zip(columns, row))) for row in rows],
+            ignore_conflicts=ignore_conflicts,
+        )
+        return
+
+    connection = connections[model.objects.db]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = ", ".join(quote(model._meta.get_field(c).column) for c in columns)
+    data = io.StringIO("".join(_copy_line(row) for row in rows))
+    with connection.cursor() as cursor:
+        if not ignore_conflicts:
+            cursor.cursor.copy_expert(f"COPY {table} ({names}) FROM STDIN", data)
+            return
+        staging = quote(f"{model._meta.db_table}_seed")
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS "
+            f"SELECT {names} FROM {table} WITH NO DATA"
+        )
+        cursor.cursor.copy_expert(f"COPY {staging} ({names}) FROM STDIN", data)
+        cursor.execute(
+            f"INSERT INTO {table} ({names}) SELECT {names} FROM {staging} "
+            f"ON CONFLICT DO NOTHING"
+        )
+        cursor.execute(f"TRUNCATE {staging}")
+
+
+def _copy_line(row: Sequence[Any]) -> str:
+    return "\t".join(_copy_value(value) for value in row) + "\n"
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+# --------------------------------- seeding -------------------------------- #
+def seed_books(
+    count: int,
+    *,
+    batch_size: int = 5_000,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    use_copy: bool = False,
+    book_model=Book,
+) -> int:
+    """
+    Insert *count* generated books after the ones already seeded, in batches of
+    *batch_size* generated on *workers* processes.
+
+    Returns the number of rows written (ISBNs that already exist are skipped).
+    COPY and ``bulk_create`` send no signals, so cached counts and list pages
+    are retired here.
+    """
+    start = book_model.objects.filter(isbn__startswith=ISBN_PREFIX).count()
+    before = book_model.objects.count()
+    jobs = [
+        (start + offset, min(batch_size, count - offset), seed)
+        for offset in range(0, count, batch_size)
+    ]
+    for rows in _generate(generate_book_rows, jobs, workers):
+        insert_rows(
+            book_model, BOOK_COLUMNS, rows, use_copy=use_copy, ignore_conflicts=True
+        )
+    added = book_model.objects.count() - before
+    # Migrations seed with their historical model, before anything is cached
+    # (and possibly without Redis).
+    if added and book_model is Book:
+        invalidate_counts(Book)
+        invalidate_books()
+    return added
+
+
+def seed_users(count: int, *, prefix: str = "seed") -> List:
+    """
+    Get or create *count* client users ``<prefix>0``… sharing one password hash.
+    """
+    User = get_user_model()
+    usernames = [f"{prefix}{i}" for i in range(count)]
+    existing = set(
+        User.objects.filter(username__in=usernames).values_list("username", flat=True)
+    )
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(username=name, user_type="client", password=password)
+            for name in usernames
+            if name not in existing
+        ]
+    )
+    return list(User.objects.filter(username__in=usernames).order_by("pk"))
+
+
+def seed_borrows(
+    book_ids: Iterable[int],
+    users: Sequence,
+    *,
+    per_book: float = 1.0,
+    active_ratio: float = 0.05,
+    batch_size: int = 5_000,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    use_copy: bool = False,
+) -> int:
+    """
+    Give each book a borrow history of about *per_book* past borrows (see
+    :func:`generate_borrow_rows`). Returns the number of borrows written.
+
+    Each open borrow takes a copy of its book, with one ``UPDATE`` per batch;
+    one generated for a book with no copies left is written returned instead.
+    """
+    user_ids = [user.pk for user in users]
+    books_per_batch = max(1, int(batch_size / max(per_book, 1)))
+    now = timezone.now()
+
+    def jobs():
+        batch: List[int] = []
+        for book_id in book_ids:
+            batch.append(book_id)
+            if len(batch) >= books_per_batch:
+                yield (batch, user_ids, per_book, active_ratio, seed, now)
+                batch = []
+        if batch:
+            yield (batch, user_ids, per_book, active_ratio, seed, now)
+
+    created, taken = 0, []
+    for rows in _generate(generate_borrow_rows, jobs(), workers):
+        opened = _take_copies(rows)
+        insert_rows(Borrow, BORROW_COLUMNS, rows, use_copy=use_copy)
+        Book.objects.filter(pk__in=opened).update(copies=F("copies") - 1)
+        created += len(rows)
+        taken.extend(opened)
+    if created:
+        invalidate_counts(Borrow)
+        invalidate_books(*taken)
+    return created
+
+
+def _take_copies(rows: List) -> List[int]:
+    # Books of the open borrows in *rows* that have a copy to lend; the other
+    # open borrows are turned into returned ones, in place.
+    active = {row[1] for row in rows if row[2] == BorrowStatus.BORROWED}
+    available = set(
+        Book.objects.filter(pk__in=active, copies__gt=0).values_list("pk", flat=True)
+    )
+    for index, row in enumerate(rows):
+        if row[2] == BorrowStatus.BORROWED and row[1] not in available:
+            user_id, book_id, _, borrowed_at, due_date, _ = row
+            rows[index] = (
+                user_id,
+                book_id,
+                BorrowStatus.RETURNED,
+                borrowed_at,
+                due_date,
+                borrowed_at + timedelta(days=1),
+            )
+    return sorted(available)
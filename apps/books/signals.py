@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.api.counting import invalidate_counts
+from apps.books.cache import invalidate_books
+from apps.books.models import Book
+
+
+@receiver(post_save, sender=Book)
+def book_created(sender, instance: Book, created: bool, **kwargs) -> None:
+    if created:
+        transaction.on_commit(lambda: invalidate_counts(Book))
+    invalidate_books(instance.pk)
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance: Book, **kwargs) -> None:
+    transaction.on_commit(lambda: invalidate_counts(Book))
+    invalidate_books(instance.pk)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+
+from celery import shared_task
+from django.db import IntegrityError
+from rest_framework.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@shared_task(ignore_result=False)
+def enrich_book(isbn: str, copies: int = 1) -> Dict[str, Any]:
+    """
+    Enrich *isbn* from Google Books and create the ``Book`` row.
+
+    The row only appears once enrichment succeeded, so readers never see a
+    half-filled book. Business failures are returned (not raised) so the job
+    status can report them.
+    """
+    from apps.books.api.v1.serializers import BookCreateSerializer
+
+    serializer = BookCreateSerializer(data={"isbn": isbn, "copies": copies})
+    try:
+        serializer.is_valid(raise_exception=True)
+        book = serializer.save()
+    except ValidationError as exc:
+        return {"status": FAILED, "errors": exc.detail}
+    except IntegrityError:
+        return {"status": FAILED, "errors": {"isbn": ["Book already exists."]}}
+
+    logger.info("Enriched book %s created from ISBN %s", book.pk, isbn)
+    return {"status": SUCCEEDED, "book_id": book.pk}
+
+
+@shared_task(ignore_result=False)
+def import_books(rows: List[Dict[str, Any]], update: bool = False) -> Dict[str, Any]:
+    """
+    Run a bulk ISBN import and keep the per-row report as the job result.
+    """
+    from apps.books.importer import import_isbns, summarize
+
+    results = import_isbns(rows, update=update)
+    return {"status": SUCCEEDED, "summary": summarize(results), "results": results}
+
+
+@shared_task
+def reconcile_inventory() -> Dict[str, int]:
+    """
+    Write journaled hot-inventory borrows and returns back to the database.
+    """
+    from apps.books.inventory import reconcile
+
+    stats = reconcile()
+    if stats:
+        logger.info("Reconciled hot inventory: %s", stats)
+    return stats
+
+
+@shared_task
+def sweep_overdue_borrows() -> Dict[str, float]:
+    """
+    Flag open borrows past their due date; returns the run's stats.
+    """
+    from apps.books.overdue import sweep_overdue
+
+    return sweep_overdue()
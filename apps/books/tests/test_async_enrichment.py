@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+from apps.books.models import Book
+from apps.books.tasks import enrich_book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, StaffFactory, UserFactory
+
+ENRICHED = {
+    "title": "E",
+    "author": "Z",
+    "published_date": "2021",
+    "description": "Desc",
+}
+
+
+class AsyncEnrichmentTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.staff = StaffFactory()
+        self.client_user = UserFactory()
+        self.books_url = "/v1/books/books/"
+
+    def test_async_create_returns_job_without_touching_upstream(self):
+        self.authenticate_as(self.staff)
+        with patch(
+            "apps.books.api.v1.views.enrich_book.delay",
+            return_value=SimpleNamespace(id="job-1"),
+        ) as mock_delay, patch(
+            "apps.books.api.v1.serializers.fetch_google_books_info"
+        ) as mock_fetch:
+            res = self.client.post(
+                f"{self.books_url}?async=true",
+                {"isbn": "978-0-00-000000-1", "copies": 3},
+                format="json",
+            )
+        self.assertEqual(res.status_code, 202, res.content)
+        body = res.json()
+        self.assertEqual(body["job_id"], "job-1")
+        self.assertEqual(body["status"], "pending")
+        self.assertTrue(body["status_url"].endswith("/v1/books/books/jobs/job-1/"))
+        self.assertEqual(res["Location"], body["status_url"])
+        mock_delay.assert_called_once_with("9780000000001", 3)
+        mock_fetch.assert_not_called()
+
+    def test_async_create_requires_staff(self):
+        self.authenticate_as(self.client_user)
+        res = self.client.post(
+            f"{self.books_url}?async=true", {"isbn": "1"}, format="json"
+        )
+        self.assertEqual(res.status_code, 403)
+
+    def test_task_creates_enriched_book(self):
+        with patch(
+            "apps.books.api.v1.serializers.fetch_google_books_info",
+            return_value=ENRICHED,
+        ):
+            result = enrich_book.apply(args=("9780000000002", 2)).get()
+        self.assertEqual(result["status"], "succeeded")
+        book = Book.objects.get(pk=result["book_id"])
+        self.assertEqual((book.title, book.copies), ("E", 2))
+
+    def test_task_reports_enrichment_failure(self):
+        with patch(
+            "apps.books.api.v1.serializers.fetch_google_books_info", return_value={}
+        ):
+            result = enrich_book.apply(args=("9780000000003",)).get()
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("detail", result["errors"])
+        self.assertFalse(Book.objects.filter(isbn="9780000000003").exists())
+
+    def _job(self, state, result=None):
+        fake = SimpleNamespace(state=state, result=result, ready=lambda: True)
+        with patch("apps.books.api.v1.views.AsyncResult", return_value=fake):
+            return self.client.get(f"{self.books_url}jobs/job-1/?wait=1")
+
+    def test_job_status(self):
+        self.authenticate_as(self.staff)
+        book = BookFactory()
+
+        body = self._job("SUCCESS", {"status": "succeeded", "book_id": book.pk}).json()
+        self.assertEqual(body["status"], "succeeded")
+        self.assertEqual(body["book"]["id"], book.pk)
+
+        body = self._job("SUCCESS", {"status": "failed", "errors": {"x": 1}}).json()
+        self.assertEqual(
+            body, {"job_id": "job-1", "status": "failed", "errors": {"x": 1}}
+        )
+
+        self.assertEqual(self._job("STARTED").json()["status"], "running")
+        self.assertEqual(self._job("PENDING").json()["status"], "pending")
+        self.assertEqual(self._job("FAILURE", ValueError()).json()["status"], "failed")
+
+    def test_job_status_requires_staff(self):
+        self.authenticate_as(self.client_user)
+        self.assertEqual(self._job("PENDING").status_code, 403)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.functions import Upper
+
+from apps.books.models import Book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+
+
+class AutocompleteTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        Book.objects.all().delete()
+        self.url = "/v1/books/autocomplete/"
+        self.hobbit = BookFactory(title="The Hobbit", author="J. R. R. Tolkien")
+        self.towers = BookFactory(title="The Two Towers", author="J. R. R. Tolkien")
+        self.harry = BookFactory(title="Harry Potter", author="J. K. Rowling")
+        self.authenticate_as(UserFactory())
+
+    def _get(self, **params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()
+
+    def test_prefix_matches_titles_and_distinct_authors(self):
+        body = self._get(q="  THE  ")
+        self.assertEqual(body["query"], "the")
+        self.assertEqual(
+            body["titles"],
+            [
+                {"id": self.hobbit.id, "title": "The Hobbit"},
+                {"id": self.towers.id, "title": "The Two Towers"},
+            ],
+        )
+        self.assertEqual(self._get(q="j. r")["authors"], ["J. R. R. Tolkien"])
+
+    def test_limit_and_short_fragments(self):
+        self.assertEqual(len(self._get(q="the", limit=1)["titles"]), 1)
+        self.assertEqual(self._get(q="t"), {"query": "t", "titles": [], "authors": []})
+        self.assertEqual(self.client.get(self.url, {"limit": 5}).status_code, 400)
+
+    def test_results_are_cached_and_skip_the_database(self):
+        self._get(q="harry")
+        with self.assertNumQueries(0):
+            body = self._get(q="Harry")
+        self.assertEqual(
+            body["titles"], [{"id": self.harry.id, "title": "Harry Potter"}]
+        )
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url, {"q": "the"}).status_code, 401)
+
+    @skipUnless(connection.vendor == "postgresql", "trigram matching needs Postgres")
+    def test_fuzzy_fragment_fills_remaining_slots(self):
+        body = self._get(q="potter")
+        self.assertEqual(
+            body["titles"], [{"id": self.harry.id, "title": "Harry Potter"}]
+        )
+        self.assertEqual(self._get(q="tolkie")["authors"], ["J. R. R. Tolkien"])
+
+    @skipUnless(connection.vendor == "postgresql", "index plans need Postgres")
+    def test_prefix_query_reads_the_prefix_index(self):
+        queryset = (
+            Book.objects.filter(title__istartswith="the")
+            .order_by(Upper("title"))
+            .values("id", "title")[:30]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            self.assertIn("book_title_prefix_idx", queryset.explain())
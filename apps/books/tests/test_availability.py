@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.availability import (
+    STREAM_PATH,
+    AvailabilityHub,
+    availability_stream,
+    get_hub,
+)
+from apps.books.circulation import borrow_book
+from apps.books.models import Borrow
+from .factories import BookFactory, UserFactory
+
+
+class StreamClient:
+    """
+    Drives the ASGI app like a server would and collects the SSE events.
+    """
+
+    def __init__(self, query: str, token: str = ""):
+        self.scope = {
+            "type": "http",
+            "method": "GET",
+            "path": STREAM_PATH,
+            "query_string": query.encode(),
+            "headers": (
+                [(b"authorization", f"Bearer {token}".encode())] if token else []
+            ),
+        }
+        self.messages = []
+        self.received = asyncio.Event()
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        self.messages.append(message)
+        self.received.set()
+
+    def start(self) -> asyncio.Task:
+        return asyncio.ensure_future(
+            availability_stream(self.scope, self.receive, self.send)
+        )
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(m.get("body", b"") for m in self.messages)
+
+    def events(self):
+        return [
+            json.loads(line.removeprefix(b"data: "))
+            for line in self.body.splitlines()
+            if line.startswith(b"data: ")
+        ]
+
+    async def wait_for_events(self, count: int, timeout: float = 5) -> list:
+        async def wait():
+            while len(self.events()) < count:
+                self.received.clear()
+                await self.received.wait()
+
+        await asyncio.wait_for(wait(), timeout)
+        return self.events()
+
+
+class AvailabilityStreamTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.book = BookFactory(copies=1)
+        self.other = BookFactory(copies=3)
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _borrow(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            borrow_book(self.user.pk, self.book.pk)
+
+    def _mark_returned(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Borrow.objects.get(user=self.user, book=self.book).mark_returned()
+
+    async def test_streams_snapshot_then_changes(self):
+        client = StreamClient(f"books={self.book.pk},{self.other.pk}", self.token)
+        task = client.start()
+        try:
+            snapshot = await client.wait_for_events(2)
+            self.assertEqual(client.messages[0]["status"], 200)
+            self.assertIn(
+                (b"content-type", b"text/event-stream"), client.messages[0]["headers"]
+            )
+            self.assertEqual(
+                {e["book"]: e["copies"] for e in snapshot},
+                {self.book.pk: 1, self.other.pk: 3},
+            )
+
+            await sync_to_async(self._borrow)()
+            events = await client.wait_for_events(3)
+            self.assertEqual(events[2], {"book": self.book.pk, "copies": 0})
+
+            await sync_to_async(self._mark_returned)()
+            events = await client.wait_for_events(4)
+            self.assertEqual(events[3], {"book": self.book.pk, "copies": 1})
+        finally:
+            client.gone.set()
+            await asyncio.wait_for(task, 5)
+        hub = get_hub()
+        self.assertEqual(hub.subscriber_count(), 0)
+        await hub.close()
+
+    async def test_rejects_bad_requests(self):
+        for query, token, code in [
+            (f"books={self.book.pk}", "", 401),
+            (f"books={self.book.pk}", "not-a-jwt", 401),
+            ("", self.token, 400),
+            ("books=", self.token, 400),
+            ("books=1,x", self.token, 400),
+        ]:
+            client = StreamClient(query, token)
+            await client.start()
+            self.assertEqual(client.messages[0]["status"], code, query)
+            self.assertIn("detail", json.loads(client.body))
+
+    async def test_token_in_query_string(self):
+        client = StreamClient(f"books={self.book.pk}&token={self.token}")
+        task = client.start()
+        try:
+            self.assertEqual(
+                await client.wait_for_events(1), [{"book": self.book.pk, "copies": 1}]
+            )
+        finally:
+            client.gone.set()
+            await asyncio.wait_for(task, 5)
+        await get_hub().close()
+
+
+class AvailabilityHubTests(SimpleTestCase):
+    def test_fans_out_to_many_idle_subscriptions_without_threads(self):
+        async def run():
+            hub = AvailabilityHub()
+            threads = threading.active_count()
+            subscriptions = [hub.subscribe([n % 50, 1000]) for n in range(5_000)]
+            self.assertLessEqual(threading.active_count(), threads)
+            self.assertEqual(hub.subscriber_count(), 5_000)
+
+            hub.dispatch(json.dumps({"book": 7, "copies": 2}))
+            hub.dispatch(json.dumps({"book": 7, "copies": 1}))
+            hub.dispatch(json.dumps({"book": 1000, "copies": 0}))
+            hub.dispatch(b"not json")
+            drained = [s.drain() for s in subscriptions]
+            self.assertEqual(drained[7], {7: 1, 1000: 0})
+            self.assertEqual(drained[8], {1000: 0})
+            self.assertEqual(sum(7 in changes for changes in drained), 100)
+
+            for subscription in subscriptions:
+                hub.unsubscribe(subscription)
+            self.assertEqual(hub.subscriber_count(), 0)
+            await hub.close()
+
+        asyncio.run(run())
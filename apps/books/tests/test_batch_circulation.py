@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, BorrowFactory, StaffFactory, UserFactory
+
+BORROW_URL = "/v1/books/books/batch_borrow/"
+RETURN_URL = "/v1/books/books/batch_return/"
+
+
+class BatchCirculationTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = UserFactory()
+        self.books = BookFactory.create_batch(3, copies=1)
+        self.ids = [book.pk for book in self.books]
+
+    def copies(self):
+        return list(
+            Book.objects.filter(pk__in=self.ids)
+            .order_by("pk")
+            .values_list("copies", flat=True)
+        )
+
+    def test_requires_client(self):
+        self.assertEqual(
+            self.client.post(BORROW_URL, {"book_ids": self.ids}).status_code, 401
+        )
+        self.authenticate_as(StaffFactory())
+        self.assertEqual(
+            self.client.post(BORROW_URL, {"book_ids": self.ids}).status_code, 403
+        )
+
+    def test_borrow_then_return_all(self):
+        self.authenticate_as(self.user)
+        res = self.client.post(BORROW_URL, {"book_ids": self.ids}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["summary"], {"borrowed": 3})
+        result = res.json()["results"][0]
+        self.assertEqual(result["book"], self.ids[0])
+        self.assertEqual(result["borrow"]["copies"], 0)
+        self.assertEqual(self.copies(), [0, 0, 0])
+        self.assertEqual(
+            Borrow.objects.filter(user=self.user, status=BorrowStatus.BORROWED).count(),
+            3,
+        )
+
+        res = self.client.post(RETURN_URL, {"book_ids": self.ids}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["summary"], {"returned": 3})
+        self.assertEqual(res.json()["results"][2]["borrow"]["status"], "returned")
+        self.assertEqual(self.copies(), [1, 1, 1])
+
+    def test_atomic_batch_changes_nothing_on_failure(self):
+        Book.objects.filter(pk=self.ids[1]).update(copies=0)
+        self.authenticate_as(self.user)
+        res = self.client.post(
+            BORROW_URL, {"book_ids": self.ids + [self.ids[-1] + 1000]}, format="json"
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["summary"], {"skipped": 2, "failed": 2})
+        details = [r.get("detail") for r in res.json()["results"]]
+        self.assertEqual(details, [None, "No copies available.", None, "Not found."])
+        self.assertEqual(self.copies(), [1, 0, 1])
+        self.assertFalse(Borrow.objects.filter(user=self.user).exists())
+
+    def test_best_effort_batch_keeps_what_succeeded(self):
+        BorrowFactory(user=self.user, book=self.books[0])
+        self.authenticate_as(self.user)
+        res = self.client.post(
+            RETURN_URL,
+            {"book_ids": self.ids, "mode": "best_effort"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["summary"], {"returned": 1, "failed": 2})
+        self.assertEqual(
+            res.json()["results"][1]["detail"], "No active borrow for this book."
+        )
+        self.assertEqual(self.copies(), [2, 1, 1])
+
+    def test_duplicates_and_active_borrows(self):
+        BorrowFactory(user=self.user, book=self.books[2])
+        self.authenticate_as(self.user)
+        res = self.client.post(
+            BORROW_URL,
+            {
+                "book_ids": [self.ids[0], self.ids[0], self.ids[2]],
+                "mode": "best_effort",
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        results = res.json()["results"]
+        self.assertEqual([r["book"] for r in results], [self.ids[0], self.ids[2]])
+        self.assertEqual(results[1]["status"], "failed")
+        self.assertIn("active borrow", results[1]["detail"])
+
+    @override_settings(BOOKS_CIRCULATION_BATCH_MAX=2)
+    def test_batch_size_is_capped(self):
+        self.authenticate_as(self.user)
+        res = self.client.post(BORROW_URL, {"book_ids": self.ids}, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("book_ids", res.json())
+
+    def test_batch_is_a_fixed_number_of_queries(self):
+        self.authenticate_as(self.user)
+        # user, savepoint, lock books, active borrows, update copies,
+        # insert borrows, release
+        with self.assertNumQueries(7):
+            res = self.client.post(BORROW_URL, {"book_ids": self.ids}, format="json")
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.books.benchmark import compare, run_benchmark, run_size
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+from apps.books.seeding import seed_books, seed_borrows, seed_users
+
+
+class SeedingTests(TestCase):
+    def test_seed_books_tops_up_without_duplicates(self):
+        before = Book.objects.count()
+        self.assertEqual(seed_books(30, batch_size=7, seed=1), 30)
+        self.assertEqual(seed_books(5, seed=1), 5)
+        self.assertEqual(Book.objects.count(), before + 35)
+
+    def test_borrow_history_keeps_one_open_borrow_per_book(self):
+        seed_books(20, seed=2)
+        ids = list(Book.objects.values_list("pk", flat=True)[:20])
+        created = seed_borrows(ids, seed_users(3), per_book=3, active_ratio=1, seed=2)
+        self.assertEqual(created, 60)
+        active = Borrow.objects.filter(status=BorrowStatus.BORROWED)
+        self.assertEqual(active.count(), 20)
+        self.assertFalse(active.exclude(returned_at=None).exists())
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_run_reports_every_scenario(self):
+        report = run_benchmark([150], iterations=3, borrows_per_book=0.5, seed=3)
+        self.assertGreaterEqual(Book.objects.count(), 150)
+        scenarios = {row["scenario"] for row in report["results"]}
+        self.assertIn("list limit=10 offset=75 (cold)", scenarios)
+        self.assertIn("retrieve (cached)", scenarios)
+        self.assertTrue(
+            {"borrow", "return", "create (enrichment stubbed)"} <= scenarios
+        )
+        cold = next(r for r in report["results"] if r["scenario"].endswith("(cold)"))
+        self.assertGreater(cold["queries"], 0)
+        self.assertEqual(cold["size"], 150)
+        self.assertFalse(
+            Borrow.objects.filter(
+                user__username="bench-reader", status=BorrowStatus.BORROWED
+            ).exists()
+        )
+
+    def test_borrows_only_books_with_copies_left(self):
+        seed_books(40, seed=4)
+        ids = list(Book.objects.order_by("pk").values_list("pk", flat=True))
+        Book.objects.exclude(pk__in=ids[:3]).update(copies=0)
+        results = {row["scenario"]: row for row in run_size(40, iterations=5, seed=4)}
+        self.assertEqual(results["borrow"]["iterations"], 3)
+
+    # The test runner allows "testserver"; a real deployment does not.
+    @override_settings(ALLOWED_HOSTS=["bookstore.example"])
+    @patch("apps.books.management.commands.bench_api.teardown_databases")
+    @patch("apps.books.management.commands.bench_api.setup_databases")
+    def test_command_runs_outside_the_test_environment(self, setup, teardown):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            call_command(
+                "bench_api",
+                "--sizes=60",
+                "--iterations=2",
+                "--borrows-per-book=0.5",
+                f"--output={output}",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+            with open(output, encoding="utf-8") as stream:
+                report = json.load(stream)
+        self.assertTrue(setup.called and teardown.called)
+        self.assertIn(
+            "retrieve (cached)", {row["scenario"] for row in report["results"]}
+        )
+
+    def test_compare_flags_slower_results_and_extra_queries(self):
+        def report(*rows):
+            return {
+                "results": [
+                    dict(size=10, scenario=n, p50_ms=p, queries=q) for n, p, q in rows
+                ]
+            }
+
+        rows = compare(
+            report(("a", 11.0, 3), ("b", 20.0, 3), ("c", 10.0, 4), ("new", 1.0, 1)),
+            report(("a", 10.0, 3), ("b", 10.0, 3), ("c", 10.0, 3)),
+            tolerance=0.2,
+        )
+        self.assertEqual(
+            {row["scenario"]: row["regression"] for row in rows},
+            {"a": False, "b": True, "c": True},
+        )
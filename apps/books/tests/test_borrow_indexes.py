@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+from apps.books.seeding import seed_books, seed_borrows, seed_users
+from .factories import BookFactory, BorrowFactory, UserFactory
+
+
+class ActiveBorrowConstraintTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.book = BookFactory()
+
+    def test_one_active_borrow_per_user_and_book(self):
+        BorrowFactory(user=self.user, book=self.book)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BorrowFactory(user=self.user, book=self.book)
+
+    def test_returned_borrows_do_not_count(self):
+        BorrowFactory(
+            user=self.user,
+            book=self.book,
+            status=BorrowStatus.RETURNED,
+            returned_at=timezone.now(),
+        )
+        BorrowFactory(user=self.user, book=self.book)
+        BorrowFactory(book=self.book)
+        self.assertEqual(Borrow.objects.filter(book=self.book).count(), 3)
+
+
+@skipUnless(connection.vendor == "postgresql", "index plans need Postgres")
+class ActiveBorrowPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_books(500, seed=1)
+        users = seed_users(20)
+        seed_borrows(
+            Book.objects.values_list("pk", flat=True),
+            users,
+            per_book=2,
+            active_ratio=0.3,
+            seed=1,
+        )
+        cls.user = users[0]
+        cls.book = Borrow.objects.filter(user=cls.user).first().book
+        # most open borrows are not due yet, a few are overdue
+        today = timezone.now().date()
+        active = Borrow.objects.filter(status=BorrowStatus.BORROWED)
+        active.update(due_date=today + timedelta(days=7))
+        active.filter(pk__in=active.values("pk")[:5]).update(due_date=today)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_borrow")
+
+    def _plan(self, queryset) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def test_return_lookup_uses_the_unique_constraint(self):
+        plan = self._plan(
+            Borrow.objects.filter(
+                user=self.user, book=self.book, status=BorrowStatus.BORROWED
+            )
+        )
+        self.assertIn("borrow_one_active_per_user_book", plan)
+
+    def test_active_borrows_of_a_user(self):
+        plan = self._plan(
+            Borrow.objects.filter(user=self.user, status=BorrowStatus.BORROWED)
+        )
+        self.assertIn("borrow_one_active_per_user_book", plan)
+
+    def test_overdue_scan(self):
+        plan = self._plan(
+            Borrow.objects.filter(
+                status=BorrowStatus.BORROWED, due_date__lt=timezone.now().date()
+            )
+        )
+        self.assertIn("borrow_active_due_idx", plan)
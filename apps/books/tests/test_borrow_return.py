@@ -43,3 +43,18 @@ class BookBorrowReturnTests(JWTAuthMixin):
     def test_return_without_borrow(self):
         self.authenticate_as(self.other)
         self.assertEqual(self.client.post(self.return_url).status_code, 400)
+
+    def test_second_active_borrow_is_rejected(self):
+        self.book.copies = 2
+        self.book.save(update_fields=["copies"])
+        self.authenticate_as(self.user)
+        self.assertEqual(self.client.post(self.borrow_url).status_code, 200)
+
+        again = self.client.post(self.borrow_url)
+        self.assertEqual(again.status_code, 400)
+        self.assertIn("active borrow", again.json()["detail"])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.copies, 1)
+
+        self.client.post(self.return_url)
+        self.assertEqual(self.client.post(self.borrow_url).status_code, 200)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import io
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.books.importer import import_isbns, read_rows, summarize
+from apps.books.models import Book
+from apps.books.utils import fetch_google_books_info
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, StaffFactory, UserFactory
+
+
+def fake_enrichment(isbn):
+    if isbn.endswith("0"):
+        return {}
+    return {
+        "title": f"Title {isbn}",
+        "author": "Author",
+        "description": "Desc",
+        "published_date": "2020",
+        "page_count": 10,
+    }
+
+
+def fake_google_books(url, params):
+    data = fake_enrichment(params["q"].removeprefix("isbn:"))
+    volume = {
+        "title": data.get("title"),
+        "authors": [data["author"]] if data else [],
+        "description": data.get("description"),
+        "publishedDate": data.get("published_date"),
+        "pageCount": data.get("page_count"),
+    }
+    return SimpleNamespace(
+        json=lambda: {"items": [{"volumeInfo": volume}]} if data else {}
+    )
+
+
+@patch("apps.books.utils.google_books.get", side_effect=fake_google_books)
+class ImportIsbnsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.existing = BookFactory(isbn="9781111111111", title="Old", copies=1)
+
+    def test_reports_every_row_in_order(self, mock_fetch):
+        results = import_isbns(
+            [
+                {"isbn": "978-2222222221", "copies": "3"},
+                {"isbn": "9781111111111"},
+                {"isbn": "9782222222221"},
+                {"isbn": "9783333333330"},
+                {"isbn": ""},
+                {"isbn": "9784444444441", "copies": "zero"},
+            ],
+            batch_size=2,
+            rate_limit=None,
+        )
+        self.assertEqual(
+            [(r["row"], r["status"]) for r in results],
+            [
+                (1, "created"),
+                (2, "exists"),
+                (3, "duplicate"),
+                (4, "not_found"),
+                (5, "invalid"),
+                (6, "invalid"),
+            ],
+        )
+        self.assertEqual(mock_fetch.call_count, 2)
+        book = Book.objects.get(isbn="9782222222221")
+        self.assertEqual((book.title, book.copies), ("Title 9782222222221", 3))
+        self.assertEqual(summarize(results)["invalid"], 2)
+
+    def test_one_existence_query_and_one_insert_per_batch(self, mock_fetch):
+        rows = [{"isbn": f"97850000000{n:02d}1"} for n in range(20)]
+        # The insert runs in a savepoint: SAVEPOINT, INSERT, RELEASE.
+        with self.assertNumQueries(4):
+            results = import_isbns(rows, batch_size=100, rate_limit=None)
+        self.assertEqual(summarize(results), {"created": 20})
+
+    def test_isbn_imported_concurrently_is_reported_as_existing(self, mock_fetch):
+        def racing(url, params):
+            # Another import inserts this ISBN while it is being enriched.
+            if params["q"] == "isbn:9788888888881":
+                BookFactory(isbn="9788888888881", title="Raced")
+            return fake_google_books(url, params)
+
+        mock_fetch.side_effect = racing
+        results = import_isbns(
+            [{"isbn": "9788888888881"}, {"isbn": "9789999999991"}],
+            workers=1,
+            rate_limit=None,
+        )
+        self.assertEqual([r["status"] for r in results], ["exists", "created"])
+        self.assertEqual(Book.objects.get(isbn="9788888888881").title, "Raced")
+        self.assertTrue(Book.objects.filter(isbn="9789999999991").exists())
+
+    def test_update_upserts_existing_books(self, mock_fetch):
+        Book.objects.filter(pk=self.existing.pk).update(publisher="Kept")
+        results = import_isbns(
+            [{"isbn": "9781111111111", "copies": 4}], update=True, rate_limit=None
+        )
+        self.assertEqual(results[0]["status"], "updated")
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.title, "Title 9781111111111")
+        # copies is live stock and fields Google left out are not blanked
+        self.assertEqual(self.existing.copies, 1)
+        self.assertEqual(self.existing.publisher, "Kept")
+        self.assertEqual(Book.objects.filter(isbn="9781111111111").count(), 1)
+
+    def test_update_skips_hot_inventory_books(self, mock_fetch):
+        Book.objects.filter(pk=self.existing.pk).update(hot_inventory=True)
+        results = import_isbns(
+            [{"isbn": "9781111111111"}], update=True, rate_limit=None
+        )
+        self.assertEqual(results[0]["status"], "exists")
+        self.assertIn("Hot inventory", results[0]["detail"])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.title, "Old")
+        mock_fetch.assert_not_called()
+
+    def test_cached_isbns_skip_upstream_and_rate_limit(self, mock_fetch):
+        fetch_google_books_info("9782222222221")
+        with patch("apps.books.importer.RateLimiter.wait") as mock_wait:
+            results = import_isbns(
+                [{"isbn": "9782222222221"}, {"isbn": "9787777777771"}], workers=2
+            )
+        self.assertEqual(summarize(results), {"created": 2})
+        self.assertEqual(mock_fetch.call_count, 2)
+        mock_wait.assert_called_once()
+
+    def test_read_rows_with_and_without_header(self, mock_fetch):
+        self.assertEqual(
+            list(read_rows(["isbn,copies", "1,2", "", "3,"])),
+            [{"isbn": "1", "copies": "2"}, {"isbn": "3", "copies": ""}],
+        )
+        self.assertEqual(
+            list(read_rows(["1,2", "3"])),
+            [{"isbn": "1", "copies": "2"}, {"isbn": "3", "copies": None}],
+        )
+
+    def test_management_command(self, mock_fetch):
+        out = io.StringIO()
+        stdin = io.StringIO("isbn,copies\n9786666666661,2\n9781111111111,1\n")
+        with patch("sys.stdin", stdin):
+            call_command("import_books", "-", rate=0, stdout=out)
+        self.assertFalse(stdin.closed)
+        self.assertTrue(Book.objects.filter(isbn="9786666666661").exists())
+        self.assertIn('"status": "exists"', out.getvalue())
+        self.assertIn("Import finished: created=1, exists=1", out.getvalue())
+
+
+class BulkImportApiTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        self.url = "/v1/books/books/import/"
+
+    def _post(self, data, format="json"):
+        with patch(
+            "apps.books.api.v1.views.import_books.delay",
+            return_value=SimpleNamespace(id="job-9"),
+        ) as mock_delay:
+            res = self.client.post(self.url, data, format=format)
+        return res, mock_delay
+
+    def test_json_rows_are_queued(self):
+        self.authenticate_as(StaffFactory())
+        res, mock_delay = self._post({"rows": [{"isbn": "1", "copies": 2}]})
+        self.assertEqual(res.status_code, 202, res.content)
+        self.assertEqual(res.json()["job_id"], "job-9")
+        mock_delay.assert_called_once_with([{"isbn": "1", "copies": 2}], False)
+
+    def test_csv_file_is_queued(self):
+        self.authenticate_as(StaffFactory())
+        upload = SimpleUploadedFile("books.csv", b"isbn,copies\n1,2\n3,\n")
+        res, mock_delay = self._post({"file": upload, "update": "true"}, "multipart")
+        self.assertEqual(res.status_code, 202, res.content)
+        mock_delay.assert_called_once_with(
+            [{"isbn": "1", "copies": "2"}, {"isbn": "3", "copies": ""}], True
+        )
+
+    def test_requires_staff_and_payload(self):
+        self.authenticate_as(UserFactory())
+        self.assertEqual(self._post({"rows": [{"isbn": "1"}]})[0].status_code, 403)
+        self.authenticate_as(StaffFactory())
+        self.assertEqual(self._post({})[0].status_code, 400)
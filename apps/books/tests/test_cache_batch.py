@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.cache_utils import redis_cached
+
+calls = []
+
+
+@redis_cached(ttl=600, negative_ttl=5)
+def square(x):
+    calls.append(x)
+    return x * x
+
+
+class RedisCachedManyTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_returns_results_in_input_order(self):
+        square(3)
+        self.assertEqual(square.many([4, 3, 2, 4], workers=4), [16, 9, 4, 16])
+        self.assertEqual(sorted(calls), [2, 3, 4])
+
+    def test_one_round_trip_each_way(self):
+        square(1)
+        with (
+            patch.object(cache, "get_many", wraps=cache.get_many) as mock_get_many,
+            patch.object(cache, "set_many", wraps=cache.set_many) as mock_set_many,
+        ):
+            square.many([1, 2, 3])
+        mock_get_many.assert_called_once()
+        mock_set_many.assert_called_once()
+
+    def test_results_are_shared_with_single_calls(self):
+        square.many([5, 0])
+        self.assertEqual(square(5), 25)
+        self.assertEqual(calls, [5, 0])
+
+    def test_negative_results_use_their_own_ttl(self):
+        with patch.object(cache, "set_many", wraps=cache.set_many) as mock_set_many:
+            square.many([0, 2])
+        timeouts = sorted(c.kwargs["timeout"] for c in mock_set_many.call_args_list)
+        self.assertEqual(timeouts, [5, 600])
+
+    def test_throttle_runs_only_for_misses(self):
+        square(1)
+        seen = []
+        square.many([1, 2, 3], throttle=lambda: seen.append(1))
+        self.assertEqual(len(seen), 2)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from apps.core.cache_utils import (
+    SERIALIZERS,
+    EntryCodec,
+    _redis_cached_key,
+    redis_cached,
+)
+
+calls = []
+
+
+@redis_cached(ttl=600, serializer="json", compress_threshold=64)
+def describe(isbn):
+    calls.append(isbn)
+    return {"isbn": isbn, "description": "word " * 100}
+
+
+class RedisCachedKeyTests(SimpleTestCase):
+    def test_short_primitive_arguments_stay_readable(self):
+        self.assertEqual(
+            _redis_cached_key("f", ("978",), {}), "redis_cached:f:('978',)"
+        )
+
+    def test_keys_distinguish_types_and_ignore_kwarg_order(self):
+        self.assertNotEqual(
+            _redis_cached_key("f", (1,), {}), _redis_cached_key("f", ("1",), {})
+        )
+        self.assertEqual(
+            _redis_cached_key("f", (), {"a": 1, "b": 2}),
+            _redis_cached_key("f", (), {"b": 2, "a": 1}),
+        )
+
+    def test_long_or_complex_arguments_are_hashed(self):
+        for args in (("x" * 100,), ("a b",), ([1, 2],)):
+            key = _redis_cached_key("f", args, {})
+            self.assertRegex(key, r"^redis_cached:f:[0-9a-f]{32}$")
+
+
+class EntryCodecTests(SimpleTestCase):
+    entry = ({"title": "T", "description": "text " * 200}, 0.5, 1_700_000_000.0)
+
+    def test_round_trip_for_every_serializer(self):
+        for serializer in SERIALIZERS:
+            with self.subTest(serializer=serializer):
+                codec = EntryCodec(serializer, compress_threshold=512)
+                self.assertEqual(codec.loads(codec.dumps(self.entry)), self.entry)
+
+    def test_compresses_only_above_threshold(self):
+        self.assertTrue(EntryCodec("pickle", 512).dumps(self.entry).startswith(b"\x01"))
+        self.assertTrue(
+            EntryCodec("pickle", 10**6).dumps(self.entry).startswith(b"\x00")
+        )
+        self.assertTrue(EntryCodec("pickle").dumps(self.entry).startswith(b"\x00"))
+
+    def test_unreadable_entries_are_misses(self):
+        self.assertIsNone(EntryCodec("json").loads(b"\x01not zlib"))
+
+
+class RedisCachedCodecTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_decorator_stores_compressed_json(self):
+        first = describe("978")
+        self.assertEqual(describe("978"), first)
+        self.assertEqual(calls, ["978"])
+        stored = cache.get(describe.cache_key("978"))
+        self.assertTrue(stored.startswith(EntryCodec.ZLIB))
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("bench_cache", iterations=10, stdout=out)
+        self.assertIn("value: marshal + zlib>=512", out.getvalue())
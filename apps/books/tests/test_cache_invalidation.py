@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import override_settings
+
+from apps.books.models import Book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+
+
+@override_settings(PAGINATION_COUNT_STRATEGY="exact")
+class VersionedPageCacheTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        caches["tiered"].clear()
+        Book.objects.all().delete()
+        self.user = UserFactory()
+        self.book = BookFactory(copies=2)
+        self.other = BookFactory(copies=5)
+        self.list_url = "/v1/books/books/"
+        self.detail_url = f"/v1/books/books/{self.book.id}/"
+        self.authenticate_as(self.user)
+
+    def _copies_in_list(self):
+        rows = self.client.get(self.list_url).json()["results"]
+        return {row["id"]: row["copies"] for row in rows}
+
+    def _post(self, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url)
+
+    def test_pages_are_cached_without_long_client_max_age(self):
+        self.client.get(self.list_url)
+        with self.assertNumQueries(1):  # JWT user only
+            res = self.client.get(self.list_url)
+        self.assertIn("max-age=0", res["Cache-Control"])
+        self.assertFalse(res.has_header("Expires"))
+
+    def test_local_page_hits_skip_redis(self):
+        first = self.client.get(self.detail_url)
+        with patch.object(type(caches["default"]), "get") as redis_get:
+            second = self.client.get(self.detail_url)
+        redis_get.assert_not_called()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.json(), first.json())
+
+    def test_borrow_and_return_refresh_list_and_detail(self):
+        self.assertEqual(self._copies_in_list()[self.book.id], 2)
+        self.assertEqual(self.client.get(self.detail_url).json()["copies"], 2)
+
+        self.assertEqual(self._post(f"{self.detail_url}borrow/").status_code, 200)
+        self.assertEqual(self._copies_in_list()[self.book.id], 1)
+        self.assertEqual(self.client.get(self.detail_url).json()["copies"], 1)
+
+        self.assertEqual(self._post(f"{self.detail_url}return_it/").status_code, 200)
+        self.assertEqual(self._copies_in_list()[self.book.id], 2)
+        self.assertEqual(self.client.get(self.detail_url).json()["copies"], 2)
+
+    def test_borrow_keeps_other_detail_pages_cached(self):
+        other_url = f"/v1/books/books/{self.other.id}/"
+        self.client.get(other_url)
+        self._post(f"{self.detail_url}borrow/")
+        with self.assertNumQueries(1):  # JWT user only
+            self.client.get(other_url)
+
+    def test_create_and_delete_refresh_list(self):
+        self.assertEqual(len(self._copies_in_list()), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = BookFactory()
+        self.assertIn(created.id, self._copies_in_list())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(f"/v1/books/books/{created.id}/")
+        self.assertEqual(res.status_code, 204)
+        self.assertNotIn(created.id, self._copies_in_list())
+        self.assertEqual(
+            self.client.get(f"/v1/books/books/{created.id}/").status_code, 404
+        )
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import io
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from apps.books.utils import fetch_google_books_info
+from apps.core.cache_utils import cached_functions, redis_cached
+
+calls = []
+
+
+@redis_cached(ttl=600, namespace="tests:lookup")
+def lookup(key):
+    calls.append(key)
+    return {"key": key, "n": len(calls)}
+
+
+class RedisCachedNamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_invalidate_drops_one_entry(self):
+        lookup("a")
+        lookup("b")
+        lookup.invalidate("a")
+        lookup("a")
+        lookup("b")
+        self.assertEqual(calls, ["a", "b", "a"])
+
+    def test_invalidate_all_bumps_generation(self):
+        lookup("a")
+        old_key = lookup.cache_key("a")
+        generation = lookup.generation()
+
+        self.assertGreater(lookup.invalidate_all(), generation)
+        self.assertNotEqual(lookup.cache_key("a"), old_key)
+        lookup("a")
+        self.assertEqual(calls, ["a", "a"])
+
+    def test_keys_carry_namespace_and_generation(self):
+        self.assertTrue(
+            lookup.cache_key("a").startswith(
+                f"redis_cached:tests:lookup:g{lookup.generation()}:"
+            )
+        )
+        self.assertIs(cached_functions()["tests:lookup"], lookup)
+
+    def test_peek(self):
+        self.assertIsNone(lookup.peek("a"))
+        lookup("a")
+        self.assertEqual(lookup.peek("a")["value"], {"key": "a", "n": 1})
+
+
+class RedisCacheCommandTests(SimpleTestCase):
+    namespace = "apps.books.utils.fetch_google_books_info"
+
+    def setUp(self):
+        cache.clear()
+
+    def _call(self, *args):
+        out = io.StringIO()
+        call_command("redis_cache", *args, stdout=out)
+        return out.getvalue()
+
+    @patch("apps.books.utils.google_books.get")
+    def test_inspect_and_purge_one_isbn(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            "items": [{"volumeInfo": {"title": "Bad title"}}]
+        }
+        fetch_google_books_info("9781111111111")
+
+        self.assertIn(
+            "Bad title", self._call("inspect", self.namespace, "9781111111111")
+        )
+        self.assertIn("Purged", self._call("purge", self.namespace, "9781111111111"))
+        self.assertIsNone(fetch_google_books_info.peek("9781111111111"))
+
+    def test_list_and_purge_namespace(self):
+        self.assertIn(self.namespace, self._call("list"))
+        generation = fetch_google_books_info.generation()
+        self.assertIn("Purged", self._call("purge", self.namespace))
+        self.assertGreater(fetch_google_books_info.generation(), generation)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.cache_utils import EntryCodec, redis_cached
+
+answers = []
+codec = EntryCodec()
+
+
+@redis_cached(ttl=600, negative_ttl=5, stale_ttl=600)
+def lookup(x):
+    return answers.pop(0)
+
+
+def run_inline(target, *args):
+    target(*args)
+
+
+class RedisCachedRevalidationTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        answers.clear()
+        self.key = lookup.cache_key(1)
+
+    def _expire(self):
+        value, delta, _ = codec.loads(cache.get(self.key))
+        cache.set(self.key, codec.dumps((value, delta, time.time() - 1)), timeout=600)
+
+    def test_negative_results_use_negative_ttl(self):
+        answers.extend([{}, {"title": "T"}])
+        with patch("apps.core.cache_utils.cache.set", wraps=cache.set) as mock_set:
+            self.assertEqual(lookup(1), {})
+        self.assertEqual(mock_set.call_args.kwargs["timeout"], 5)
+
+    def test_positive_results_keep_stale_window(self):
+        answers.append({"title": "T"})
+        with patch("apps.core.cache_utils.cache.set", wraps=cache.set) as mock_set:
+            lookup(1)
+        self.assertEqual(mock_set.call_args.kwargs["timeout"], 1200)
+
+    def test_custom_negative_predicate(self):
+        @redis_cached(ttl=600, negative_ttl=5, is_negative=lambda r: r == "error")
+        def status():
+            return "error"
+
+        with patch("apps.core.cache_utils.cache.set", wraps=cache.set) as mock_set:
+            status()
+        self.assertEqual(mock_set.call_args.kwargs["timeout"], 5)
+
+    @patch("apps.core.cache_utils._run_in_background", side_effect=run_inline)
+    def test_stale_value_served_while_refreshing(self, mock_bg):
+        answers.extend(["old", "new"])
+        self.assertEqual(lookup(1), "old")
+        self._expire()
+
+        self.assertEqual(lookup(1), "old")
+        mock_bg.assert_called_once()
+        self.assertEqual(lookup(1), "new")
+        self.assertIsNone(cache.get(f"{self.key}:lock"))
+
+    @patch("apps.core.cache_utils._run_in_background")
+    def test_single_background_refresh(self, mock_bg):
+        answers.append("old")
+        lookup(1)
+        self._expire()
+
+        for _ in range(3):
+            self.assertEqual(lookup(1), "old")
+        mock_bg.assert_called_once()
+
+    @patch("apps.core.cache_utils._run_in_background", side_effect=run_inline)
+    def test_failed_refresh_keeps_stale_value(self, mock_bg):
+        answers.append("old")
+        lookup(1)
+        self._expire()
+
+        self.assertEqual(lookup(1), "old")  # refresh raises IndexError
+        self.assertEqual(codec.loads(cache.get(self.key))[0], "old")
+        self.assertIsNone(cache.get(f"{self.key}:lock"))
+
+    @patch("apps.core.cache_utils._run_in_background")
+    def test_batch_refreshes_stale_entries_in_bounded_workers(self, mock_bg):
+        keys = [lookup.cache_key(n) for n in range(6)]
+        answers.extend(f"old {n}" for n in range(6))
+        lookup.many(range(6))
+        for key in keys:
+            value, delta, _ = codec.loads(cache.get(key))
+            cache.set(key, codec.dumps((value, delta, time.time() - 1)), timeout=600)
+
+        answers.extend(f"new {n}" for n in range(6))
+        throttled, peak, lock = [], [0], threading.Lock()
+
+        def throttle():
+            with lock:
+                throttled.append(1)
+                peak[0] = max(peak[0], threading.active_count())
+
+        threads = threading.active_count()
+        results = lookup.many(range(6), workers=2, throttle=throttle)
+
+        self.assertEqual(sorted(results), sorted(f"new {n}" for n in range(6)))
+        self.assertEqual(len(throttled), 6)
+        self.assertLessEqual(peak[0], threads + 2)
+        mock_bg.assert_not_called()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.cache_utils import _should_recompute, redis_cached
+
+calls = []
+
+
+@redis_cached(ttl=60, lock_wait=5)
+def slow_square(x):
+    calls.append(x)
+    time.sleep(0.2)
+    return x * x
+
+
+@redis_cached(ttl=60, early_recompute=1.0)
+def counter(x):
+    calls.append(x)
+    return len(calls)
+
+
+@redis_cached(ttl=60)
+def broken(x):
+    calls.append(x)
+    raise RuntimeError("boom")
+
+
+class RedisCachedStampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(slow_square(7)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [7])
+        self.assertEqual(results, [49] * 8)
+
+    def test_early_recompute_refreshes_hot_key(self):
+        self.assertEqual(counter(1), 1)
+        with patch("apps.core.cache_utils._should_recompute", return_value=True):
+            self.assertEqual(counter(1), 2)
+        self.assertEqual(counter(1), 2)
+
+    def test_early_recompute_serves_cached_value_while_locked(self):
+        counter(1)
+        key = counter.cache_key(1)
+        cache.add(f"{key}:lock", "other", timeout=30)
+        with patch("apps.core.cache_utils._should_recompute", return_value=True):
+            self.assertEqual(counter(1), 1)
+        self.assertEqual(calls, [1])
+
+    def test_failure_releases_lock(self):
+        with self.assertRaises(RuntimeError):
+            broken(1)
+        key = broken.cache_key(1)
+        self.assertIsNone(cache.get(f"{key}:lock"))
+
+    def test_should_recompute_probability(self):
+        now = time.time()
+        self.assertFalse(_should_recompute(1.0, now - 1, beta=0.0))
+        self.assertTrue(_should_recompute(1.0, now - 1, beta=1.0))
+        self.assertFalse(_should_recompute(0.01, now + 3600, beta=1.0))
@@ -56,7 +56,7 @@ class TestCachingEnrichment(JWTAuthMixin):
         }
 
         with patch(
-            "apps.books.utils.requests.get", return_value=self._resp_dummy(payload)
+            "apps.books.utils.google_books.get", return_value=self._resp_dummy(payload)
         ) as mock_get:
             r1 = fetch_google_books_info(isbn)
             r2 = fetch_google_books_info(isbn)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from unittest import skipUnless
+
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+
+from apps.books.choices import BorrowStatus
+from apps.books.circulation import (
+    AlreadyBorrowed,
+    BookNotFound,
+    NoCopiesAvailable,
+    NotBorrowed,
+    borrow_book,
+    borrow_books,
+    return_book,
+    return_books,
+)
+from apps.books.models import Book, Borrow
+from .factories import BookFactory, UserFactory
+
+logger = logging.getLogger(__name__)
+
+
+class CirculationTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.book = BookFactory(copies=1)
+
+    def test_borrow_then_return_reports_copies(self):
+        borrow = borrow_book(self.user.pk, self.book.pk)
+        self.assertEqual(borrow.copies, 0)
+        self.assertEqual(borrow.status, BorrowStatus.BORROWED)
+        self.assertEqual(Borrow.objects.get(pk=borrow.pk).user_id, self.user.pk)
+
+        returned = return_book(self.user.pk, self.book.pk)
+        self.assertEqual(returned.pk, borrow.pk)
+        self.assertEqual(returned.copies, 1)
+        self.assertEqual(Borrow.objects.get(pk=borrow.pk).status, BorrowStatus.RETURNED)
+
+    def test_errors(self):
+        with self.assertRaises(BookNotFound):
+            borrow_book(self.user.pk, self.book.pk + 1000)
+        with self.assertRaises(BookNotFound):
+            return_book(self.user.pk, self.book.pk + 1000)
+        with self.assertRaises(NotBorrowed):
+            return_book(self.user.pk, self.book.pk)
+
+        self.book.copies = 2
+        self.book.save()
+        borrow_book(self.user.pk, self.book.pk)
+        with self.assertRaises(AlreadyBorrowed):
+            borrow_book(self.user.pk, self.book.pk)
+        borrow_book(UserFactory().pk, self.book.pk)
+        with self.assertRaises(NoCopiesAvailable):
+            borrow_book(UserFactory().pk, self.book.pk)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.copies, 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs concurrent connections")
+class ConcurrentCirculationTests(TransactionTestCase):
+    def _run(self, threads, target):
+        barrier = threading.Barrier(len(threads))
+
+        def run(*args):
+            try:
+                barrier.wait()
+                target(*args)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=run, args=args) for args in threads]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_copies_are_never_oversold(self):
+        book = BookFactory(copies=5)
+        users = UserFactory.create_batch(20)
+        outcomes = []
+
+        def borrow(user):
+            try:
+                borrow_book(user.pk, book.pk)
+                outcomes.append("borrowed")
+            except NoCopiesAvailable:
+                outcomes.append("no copies")
+
+        self._run([(user,) for user in users], borrow)
+
+        self.assertEqual(Counter(outcomes), {"borrowed": 5, "no copies": 15})
+        book.refresh_from_db()
+        self.assertEqual(book.copies, 0)
+        self.assertEqual(
+            Borrow.objects.filter(book=book, status=BorrowStatus.BORROWED).count(), 5
+        )
+
+    def test_same_user_borrows_once(self):
+        book = BookFactory(copies=10)
+        user = UserFactory()
+        outcomes = []
+
+        def borrow():
+            try:
+                borrow_book(user.pk, book.pk)
+                outcomes.append("borrowed")
+            except AlreadyBorrowed:
+                outcomes.append("already")
+
+        self._run([()] * 8, borrow)
+
+        self.assertEqual(Counter(outcomes), {"borrowed": 1, "already": 7})
+        book.refresh_from_db()
+        self.assertEqual(book.copies, 9)
+
+    def test_hot_book_throughput(self):
+        rounds = 25
+        users = UserFactory.create_batch(8)
+        book = BookFactory(copies=len(users))
+
+        def churn(user):
+            for _ in range(rounds):
+                borrow_book(user.pk, book.pk)
+                return_book(user.pk, book.pk)
+
+        started = time.perf_counter()
+        self._run([(user,) for user in users], churn)
+        elapsed = time.perf_counter() - started
+
+        book.refresh_from_db()
+        self.assertEqual(book.copies, len(users))
+        self.assertEqual(
+            Borrow.objects.filter(book=book, status=BorrowStatus.RETURNED).count(),
+            rounds * len(users),
+        )
+        logger.info(
+            "%.0f borrows/s on one book (%d threads, borrow + return each)",
+            rounds * len(users) / elapsed,
+            len(users),
+        )
+
+    def test_overlapping_batches_do_not_deadlock(self):
+        books = BookFactory.create_batch(6, copies=100)
+        ids = [book.pk for book in books]
+        users = UserFactory.create_batch(6)
+
+        def churn(user, order):
+            for _ in range(10):
+                borrow_books(user.pk, order)
+                return_books(user.pk, order[::-1])
+
+        self._run(
+            [(user, ids if n % 2 else ids[::-1]) for n, user in enumerate(users)],
+            churn,
+        )
+
+        self.assertEqual(
+            list(Book.objects.filter(pk__in=ids).values_list("copies", flat=True)),
+            [100] * len(ids),
+        )
+        self.assertEqual(
+            Borrow.objects.filter(book__in=ids, status=BorrowStatus.RETURNED).count(),
+            10 * len(ids) * len(users),
+        )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from unittest import skipUnless
+
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from apps.api.counting import count_queryset
+from apps.books.models import Book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+
+
+class CountStrategyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Book.objects.all().delete()
+        BookFactory.create_batch(3)
+
+    def test_exact(self):
+        self.assertEqual(count_queryset(Book.objects.all(), "exact"), (3, "exact"))
+
+    def test_cached_is_served_from_redis_until_books_change(self):
+        queryset = Book.objects.all()
+        self.assertEqual(count_queryset(queryset, "cached"), (3, "cached"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(queryset, "cached"), (3, "cached"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookFactory()
+        self.assertEqual(count_queryset(queryset, "cached"), (4, "cached"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.first().delete()
+        self.assertEqual(count_queryset(queryset, "cached"), (3, "cached"))
+
+    def test_cached_counts_are_per_filter(self):
+        count_queryset(Book.objects.all(), "cached")
+        filtered = Book.objects.filter(pk=Book.objects.first().pk)
+        self.assertEqual(count_queryset(filtered, "cached"), (1, "cached"))
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=10**9)
+    def test_estimate_falls_back_to_exact_below_threshold(self):
+        self.assertEqual(count_queryset(Book.objects.all(), "estimate"), (3, "exact"))
+
+    @skipUnless(connection.vendor == "postgresql", "planner estimates need Postgres")
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=0)
+    def test_estimate_uses_planner_above_threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Book._meta.db_table}")
+        total, strategy = count_queryset(Book.objects.filter(copies__gte=0), "estimate")
+        self.assertEqual(strategy, "estimate")
+        self.assertGreaterEqual(total, 0)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            count_queryset(Book.objects.all(), "guess")
+
+
+class PaginatedTotalTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        caches["tiered"].clear()
+        Book.objects.all().delete()
+        BookFactory.create_batch(5)
+        self.authenticate_as(UserFactory())
+
+    @override_settings(PAGINATION_COUNT_STRATEGY="exact")
+    def test_envelope_reports_strategy(self):
+        body = self.client.get("/v1/books/books/?limit=2").json()
+        self.assertEqual(body["total"], 5)
+        self.assertEqual(body["total_strategy"], "exact")
+
+    @override_settings(PAGINATION_COUNT_STRATEGY="estimate")
+    def test_next_link_does_not_depend_on_total(self):
+        body = self.client.get("/v1/books/books/?limit=2&offset=4").json()
+        self.assertEqual(body["count"], 1)
+        self.assertIsNone(body["next"])
+        body = self.client.get("/v1/books/books/?limit=2&offset=2").json()
+        self.assertIsNotNone(body["next"])
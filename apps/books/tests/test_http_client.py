@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ConnectionError, HTTPError
+
+from apps.books.utils import fetch_google_books_info
+from apps.core.http import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, HttpClient
+from .auth_utils import JWTAuthMixin
+from .factories import StaffFactory
+
+CLIENTS = {"test": {"failure_threshold": 2, "recovery_timeout": 60}}
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} error")
+
+
+@override_settings(HTTP_CLIENTS=CLIENTS)
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        self.client_ = HttpClient("test")
+
+    def test_session_is_pooled_with_retries(self):
+        session = self.client_.session
+        self.assertIs(session, self.client_.session)
+        retry = session.get_adapter("https://example.com").max_retries
+        self.assertEqual(retry.total, 2)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertEqual(retry.read, 0)
+        self.assertFalse(retry.respect_retry_after_header)
+        self.assertNotIn("POST", retry.allowed_methods)
+
+    def test_split_timeouts_are_applied(self):
+        with patch.object(
+            self.client_.session, "get", return_value=FakeResponse()
+        ) as mock_get:
+            self.client_.get("https://example.com")
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], (3.05, 5.0))
+
+    def test_circuit_opens_and_fails_fast(self):
+        with patch.object(
+            self.client_.session, "get", side_effect=ConnectionError("down")
+        ) as mock_get:
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    self.client_.get("https://example.com")
+            with self.assertRaises(CircuitOpenError):
+                self.client_.get("https://example.com")
+
+        self.assertEqual(mock_get.call_count, 2)
+        snapshot = self.client_.breaker.snapshot()
+        self.assertEqual(snapshot["state"], OPEN)
+        self.assertEqual(snapshot["failures"], 2)
+
+    def test_half_open_trial_closes_circuit(self):
+        breaker = self.client_.breaker
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.opened_at -= 60
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+        with patch.object(self.client_.session, "get", return_value=FakeResponse()):
+            self.client_.get("https://example.com")
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_unexpected_error_in_trial_releases_it(self):
+        breaker = self.client_.breaker
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.opened_at -= 60
+
+        with patch.object(self.client_.session, "get", side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.client_.get("https://example.com")
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.admit(), HALF_OPEN)
+
+    def test_only_the_trial_frees_the_trial_slot(self):
+        breaker = self.client_.breaker
+
+        def get(url, **kwargs):
+            # The circuit opens and turns half-open while this call runs.
+            breaker.record_failure()
+            breaker.record_failure()
+            breaker.opened_at -= 60
+            self.assertEqual(breaker.admit(), HALF_OPEN)
+            return FakeResponse(503)
+
+        with patch.object(self.client_.session, "get", side_effect=get):
+            with self.assertRaises(HTTPError):
+                self.client_.get("https://example.com")
+        self.assertIsNone(breaker.admit())
+
+    def test_client_errors_do_not_trip_circuit(self):
+        with patch.object(self.client_.session, "get", return_value=FakeResponse(404)):
+            for _ in range(3):
+                with self.assertRaises(HTTPError):
+                    self.client_.get("https://example.com")
+        self.assertEqual(self.client_.breaker.state, CLOSED)
+
+
+class GoogleBooksCircuitTests(JWTAuthMixin):
+    def setUp(self):
+        cache.clear()
+
+    def test_open_circuit_returns_empty_enrichment(self):
+        with patch(
+            "apps.books.utils.google_books.get",
+            side_effect=CircuitOpenError("open"),
+        ):
+            self.assertEqual(fetch_google_books_info("9780000000001"), {})
+
+    def test_status_reports_circuits(self):
+        self.authenticate_as(StaffFactory())
+        res = self.client.get("/status/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["circuits"]["google_books"]["state"], CLOSED)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.books import inventory
+from apps.books.choices import BorrowStatus
+from apps.books.circulation import (
+    AlreadyBorrowed,
+    InventoryUnavailable,
+    NoCopiesAvailable,
+    NotBorrowed,
+    borrow_book,
+    borrow_books,
+    return_book,
+)
+from apps.books.models import Book, Borrow
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, BorrowFactory, UserFactory
+
+
+@override_settings(BOOKS_HOT_INVENTORY=True)
+class HotInventoryTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.users = UserFactory.create_batch(3)
+        self.book = BookFactory(copies=2)
+
+    def copies(self):
+        return Book.objects.values_list("copies", flat=True).get(pk=self.book.pk)
+
+    def test_borrows_are_counted_in_redis_then_reconciled(self):
+        BorrowFactory(user=self.users[0], book=self.book)
+        self.assertEqual(inventory.enable([self.book.pk]), [self.book.pk])
+
+        self.authenticate_as(self.users[1])
+        res = self.client.post(f"/v1/books/books/{self.book.pk}/borrow/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["copies"], 1)
+        self.assertIsNone(res.json()["id"])
+        with self.assertRaises(AlreadyBorrowed):
+            borrow_book(self.users[1].pk, self.book.pk)
+        borrow_book(self.users[2].pk, self.book.pk)
+        with self.assertRaises(NoCopiesAvailable):
+            borrow_book(UserFactory().pk, self.book.pk)
+        # The database is only written by reconcile().
+        self.assertEqual(self.copies(), 2)
+        self.assertEqual(Borrow.objects.filter(book=self.book).count(), 1)
+
+        returned = return_book(self.users[0].pk, self.book.pk)
+        self.assertEqual(returned.copies, 1)
+        with self.assertRaises(NotBorrowed):
+            return_book(self.users[0].pk, self.book.pk)
+        self.assertEqual(inventory.pending(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(inventory.reconcile(), {"borrowed": 2, "returned": 1})
+        self.assertEqual(inventory.reconcile(), {})
+        self.assertEqual(inventory.pending(), 0)
+        self.assertEqual(self.copies(), 1)
+        self.assertEqual(
+            sorted(
+                Borrow.objects.filter(
+                    book=self.book, status=BorrowStatus.BORROWED
+                ).values_list("user_id", flat=True)
+            ),
+            [self.users[1].pk, self.users[2].pk],
+        )
+        self.assertEqual(inventory.check(), [])
+
+    def test_journal_is_kept_until_the_checkpoint_commits(self):
+        inventory.enable([self.book.pk])
+        borrow_book(self.users[0].pk, self.book.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                inventory.reconcile()
+                raise RuntimeError("the caller's transaction rolls back")
+        # The trim was dropped with the checkpoint it depended on.
+        self.assertEqual(callbacks, [])
+        self.assertEqual(inventory.pending(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(inventory.reconcile(), {"borrowed": 1})
+        self.assertEqual(inventory.pending(), 0)
+
+    def test_not_held_is_not_held(self):
+        inventory.enable([self.book.pk])
+        self.assertNotEqual(inventory.HELD, inventory.NOT_HELD)
+        self.assertEqual(
+            inventory.give_back(self.users[0].pk, self.book.pk, timezone.now()),
+            (inventory.NOT_HELD, None),
+        )
+
+    def test_borrow_and_return_within_one_batch(self):
+        inventory.enable([self.book.pk])
+        borrow_book(self.users[0].pk, self.book.pk)
+        return_book(self.users[0].pk, self.book.pk)
+        self.assertEqual(inventory.reconcile(), {"borrowed": 1, "returned": 1})
+        borrow = Borrow.objects.get(book=self.book)
+        self.assertEqual(borrow.status, BorrowStatus.RETURNED)
+        self.assertEqual(self.copies(), 2)
+
+    def test_database_paths_refuse_hot_books(self):
+        inventory.enable([self.book.pk])
+        with override_settings(BOOKS_HOT_INVENTORY=False):
+            with self.assertRaises(InventoryUnavailable):
+                borrow_book(self.users[0].pk, self.book.pk)
+        result = borrow_books(self.users[0].pk, [self.book.pk])[0]
+        self.assertIn("on its own", result["detail"])
+
+        # A hot book whose counter is gone waits for a rebuild.
+        cache.clear()
+        self.authenticate_as(self.users[0])
+        res = self.client.post(f"/v1/books/books/{self.book.pk}/borrow/")
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(self.copies(), 2)
+
+    def test_check_detects_lost_and_drifted_counters(self):
+        other = BookFactory(copies=5)
+        inventory.enable([self.book.pk, other.pk])
+        borrow_book(self.users[0].pk, self.book.pk)
+        inventory._redis().delete(inventory.copies_key(self.book.pk))
+        inventory._redis().set(inventory.copies_key(other.pk), 9)
+
+        report = {row["book"]: row for row in inventory.check()}
+        self.assertEqual(report[self.book.pk]["problem"], "missing")
+        self.assertEqual(report[other.pk]["problem"], "drift")
+        self.assertEqual(report[other.pk]["redis_copies"], 9)
+        # The journaled borrow made it to the database before the comparison.
+        self.assertEqual(self.copies(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command("inventory", "check", stdout=StringIO())
+        call_command("inventory", "check", "--repair", stdout=StringIO())
+        self.assertEqual(inventory.check(), [])
+        borrow_book(self.users[1].pk, self.book.pk)
+        with self.assertRaises(AlreadyBorrowed):
+            borrow_book(self.users[0].pk, self.book.pk)
+
+    def test_disable_hands_availability_back_to_the_database(self):
+        call_command("inventory", "enable", str(self.book.pk), stdout=StringIO())
+        borrow_book(self.users[0].pk, self.book.pk)
+        call_command("inventory", "disable", str(self.book.pk), stdout=StringIO())
+
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.hot_inventory)
+        self.assertEqual(self.book.copies, 1)
+        self.assertFalse(inventory._redis().exists(inventory.copies_key(self.book.pk)))
+        returned = return_book(self.users[0].pk, self.book.pk)
+        self.assertIsNotNone(returned.pk)
+        self.assertEqual(returned.copies, 2)
+
+
+class HotInventoryOffTests(TestCase):
+    def test_flag_alone_keeps_books_from_the_database_paths(self):
+        book = BookFactory(copies=1, hot_inventory=True)
+        with self.assertRaises(InventoryUnavailable):
+            borrow_book(UserFactory().pk, book.pk)
+        book.refresh_from_db()
+        self.assertEqual(book.copies, 1)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase
+from django_redis import get_redis_connection
+
+from apps.core.cache_utils import redis_cached
+from apps.core.local_cache import (
+    INVALIDATION_CHANNEL,
+    LocalLRU,
+    apply_invalidation,
+)
+
+calls = []
+
+
+@redis_cached(ttl=600, local=True)
+def hot(x):
+    calls.append(x)
+    return {"x": x}
+
+
+class LocalLRUTests(SimpleTestCase):
+    def test_evicts_least_recently_used_entry(self):
+        lru = LocalLRU(max_entries=2, max_bytes=10_000)
+        lru.set("a", 1, 60)
+        lru.set("b", 2, 60)
+        lru.get("a")
+        lru.set("c", 3, 60)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(len(lru), 2)
+
+    def test_bounded_by_bytes(self):
+        lru = LocalLRU(max_entries=100, max_bytes=300)
+        lru.set("a", "x" * 100, 60)
+        lru.set("b", "y" * 100, 60)
+        lru.set("c", "z" * 100, 60)
+        self.assertIsNone(lru.get("a"))
+        self.assertLessEqual(lru.bytes, 300)
+        lru.set("big", "x" * 1_000, 60)
+        self.assertIsNone(lru.get("big"))
+
+    def test_entries_expire(self):
+        lru = LocalLRU(max_entries=10, max_bytes=10_000)
+        lru.set("a", 1, 5)
+        with patch(
+            "apps.core.local_cache.time.monotonic", return_value=time.monotonic() + 6
+        ):
+            self.assertIsNone(lru.get("a"))
+        self.assertEqual(lru.bytes, 0)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tiered = caches["tiered"]
+        self.tiered.clear()
+        calls.clear()
+
+    def test_local_hit_skips_redis(self):
+        cache.set("k", "v")
+        self.assertEqual(self.tiered.get("k"), "v")
+        with patch.object(type(caches["default"]), "get") as mock_get:
+            self.assertEqual(self.tiered.get("k"), "v")
+        mock_get.assert_not_called()
+
+    def test_local_hits_are_copies(self):
+        self.tiered.set("k", {"ids": [1]})
+        self.tiered.get("k")["ids"].append(2)
+        self.assertEqual(self.tiered.get("k"), {"ids": [1]})
+
+    def test_writes_go_through_to_redis(self):
+        self.tiered.set("k", "v", 30)
+        self.assertEqual(cache.get("k"), "v")
+        self.tiered.delete("k")
+        self.assertIsNone(self.tiered.get("k"))
+        self.assertIsNone(cache.get("k"))
+
+    def test_get_many_mixes_tiers(self):
+        self.tiered.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(self.tiered.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+
+    def test_invalidation_from_other_process(self):
+        self.tiered.set("k", "v")
+        cache.set("k", "new")
+        self.assertEqual(self.tiered.get("k"), "v")
+
+        key = self.tiered.make_key("k")
+        apply_invalidation(json.dumps({"sender": "other", "keys": [key]}))
+        self.assertEqual(self.tiered.get("k"), "new")
+
+    def test_invalidation_arrives_over_pubsub(self):
+        self.tiered.set("k", "v")
+        cache.set("k", "new")
+        message = {"sender": "other", "keys": [self.tiered.make_key("k")]}
+        get_redis_connection("default").publish(
+            INVALIDATION_CHANNEL, json.dumps(message)
+        )
+
+        deadline = time.monotonic() + 2
+        while self.tiered.get("k") == "v" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.tiered.get("k"), "new")
+
+    def test_redis_cached_local_opt_in(self):
+        self.assertEqual(hot(1), {"x": 1})
+        with patch.object(type(caches["default"]), "get") as mock_get:
+            self.assertEqual(hot(1), {"x": 1})
+        mock_get.assert_not_called()
+        self.assertEqual(calls, [1])
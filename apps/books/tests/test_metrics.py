@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from celery import shared_task
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from requests.exceptions import ConnectionError
+
+from apps.books.utils import google_books
+from apps.core.cache_utils import redis_cached
+from apps.core.metrics import (
+    CACHE_REQUESTS,
+    PAGE_CACHE_REQUESTS,
+    REQUEST_LATENCY,
+    TASK_LATENCY,
+    UPSTREAM_LATENCY,
+    Counter,
+    Histogram,
+)
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+
+
+@redis_cached(ttl=60, namespace="tests:metrics")
+def cached_double(x):
+    return x * 2
+
+
+@shared_task
+def ping():
+    return "pong"
+
+
+class MetricTypesTests(SimpleTestCase):
+    def test_counter_render(self):
+        counter = Counter("test_events_total", "Events.", ["kind"])
+        counter.inc(kind="a")
+        counter.inc(2, kind='b"')
+        self.assertEqual(
+            counter.render(),
+            [
+                "# HELP test_events_total Events.",
+                "# TYPE test_events_total counter",
+                'test_events_total{kind="a"} 1',
+                'test_events_total{kind="b\\""} 2',
+            ],
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "Time.", ["op"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value, op="x")
+        self.assertEqual(
+            histogram.samples(),
+            [
+                'test_seconds_bucket{op="x",le="0.1"} 1',
+                'test_seconds_bucket{op="x",le="1.0"} 3',
+                'test_seconds_bucket{op="x",le="+Inf"} 4',
+                'test_seconds_sum{op="x"} 4.25',
+                'test_seconds_count{op="x"} 4',
+            ],
+        )
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_redis_cached_hits_and_misses(self):
+        labels = {"namespace": "tests:metrics"}
+        misses = CACHE_REQUESTS.value(result="miss", **labels)
+        hits = CACHE_REQUESTS.value(result="hit", **labels)
+        cached_double(2)
+        cached_double(2)
+        cached_double.many([2, 3])
+        self.assertEqual(CACHE_REQUESTS.value(result="miss", **labels), misses + 2)
+        self.assertEqual(CACHE_REQUESTS.value(result="hit", **labels), hits + 2)
+
+    def test_upstream_latency(self):
+        before = UPSTREAM_LATENCY.count(client="google_books", outcome="error")
+        with patch.object(google_books.session, "get", side_effect=ConnectionError()):
+            with self.assertRaises(ConnectionError):
+                google_books.get("https://example.com")
+        google_books.breaker.record_success()
+        self.assertEqual(
+            UPSTREAM_LATENCY.count(client="google_books", outcome="error"), before + 1
+        )
+
+    def test_celery_task_latency(self):
+        labels = {"task": ping.name, "state": "SUCCESS"}
+        before = TASK_LATENCY.count(**labels)
+        ping.apply()
+        self.assertEqual(TASK_LATENCY.count(**labels), before + 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/status/")
+        res = self.client.get("/metrics/")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(
+            "# TYPE http_request_duration_seconds histogram", res.content.decode()
+        )
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 401)
+        res = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(res.status_code, 200)
+
+
+class RequestMetricsTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        caches["tiered"].clear()
+        self.authenticate_as(UserFactory())
+
+    def test_view_latency_and_page_cache(self):
+        BookFactory()
+        labels = {"view": "v1:books:book-list"}
+        hits = PAGE_CACHE_REQUESTS.value(result="hit", **labels)
+        for _ in range(2):
+            self.assertEqual(self.client.get("/v1/books/books/").status_code, 200)
+        self.assertEqual(PAGE_CACHE_REQUESTS.value(result="hit", **labels), hits + 1)
+        self.assertGreaterEqual(
+            REQUEST_LATENCY.count(method="GET", route="v1/books/books/$", status="2xx"),
+            2,
+        )
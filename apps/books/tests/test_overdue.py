@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.books.choices import BorrowStatus
+from apps.books.models import Borrow
+from apps.books.overdue import overdue_chunk, sweep_overdue
+from apps.books.tasks import sweep_overdue_borrows
+from apps.core.metrics import OVERDUE_FLAGGED
+from .factories import BorrowFactory
+
+
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.late = [
+            BorrowFactory(due_date=self.today - timedelta(days=days))
+            for days in (1, 3, 3, 3, 10)
+        ]
+        self.on_time = BorrowFactory(due_date=self.today)
+        self.returned = BorrowFactory(
+            due_date=self.today - timedelta(days=5),
+            status=BorrowStatus.RETURNED,
+            returned_at=timezone.now(),
+        )
+
+    def flagged(self):
+        return set(
+            Borrow.objects.filter(overdue_at__isnull=False).values_list("pk", flat=True)
+        )
+
+    def test_flags_open_borrows_past_due_in_chunks(self):
+        before = OVERDUE_FLAGGED.value()
+        # Chunks of two split the three borrows due on the same day.
+        stats = sweep_overdue(chunk_size=2)
+        self.assertEqual(stats["flagged"], 5)
+        self.assertEqual(stats["chunks"], 3)
+        self.assertEqual(self.flagged(), {borrow.pk for borrow in self.late})
+        self.assertEqual(OVERDUE_FLAGGED.value() - before, 5)
+
+    def test_flagged_borrows_are_not_revisited(self):
+        sweep_overdue()
+        late = BorrowFactory(due_date=self.today - timedelta(days=2))
+        with self.assertNumQueries(2):
+            stats = sweep_overdue(chunk_size=10)
+        self.assertEqual((stats["flagged"], stats["chunks"]), (1, 1))
+        self.assertIn(late.pk, self.flagged())
+
+    def test_task_returns_run_stats(self):
+        stats = sweep_overdue_borrows.apply().get()
+        self.assertEqual(stats["flagged"], 5)
+        self.assertIn("seconds", stats)
+
+    def test_return_keeps_the_flag(self):
+        sweep_overdue(today=self.today + timedelta(days=1))
+        borrow = Borrow.objects.get(pk=self.on_time.pk)
+        borrow.mark_returned()
+        borrow.refresh_from_db()
+        self.assertEqual(borrow.status, BorrowStatus.RETURNED)
+        self.assertIsNotNone(borrow.overdue_at)
+
+
+@skipUnless(connection.vendor == "postgresql", "index plans need Postgres")
+class OverdueSweepPlanTests(TestCase):
+    def test_chunk_read_is_a_range_scan_on_the_sweep_index(self):
+        today = timezone.localdate()
+        queryset = overdue_chunk(today, 1000, (today - timedelta(days=9), 10))
+        with connection.cursor() as cursor:
+            # Tiny test tables make any plan cheap; rule out the ones that
+            # do not use the index order, to see which range it can start at.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+            plan = queryset.explain()
+        self.assertIn("borrow_overdue_sweep_idx", plan)
+        # The cursor's bound is part of the range, not a filter after it.
+        self.assertRegex(plan, r"Index Cond: .*due_date >= ")
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from apps.books.models import Book
+from apps.core.http import HttpClient
+from apps.core.profiling import explain, profile_request
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+from .test_http_client import FakeResponse
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_operations_are_counted_once(self):
+        with profile_request() as profile:
+            cache.get("perf:a")
+            cache.set_many({"perf:a": 1, "perf:b": 2})
+        self.assertEqual(profile.counts["cache"], 2)
+        self.assertGreater(profile.durations["cache"], 0)
+
+    def test_http_calls_are_timed(self):
+        client = HttpClient("perf-test")
+        with patch.object(client.session, "get", return_value=FakeResponse()):
+            with profile_request() as profile:
+                client.get("https://example.com")
+        self.assertEqual(profile.counts["http"], 1)
+
+    def test_nothing_is_recorded_outside_a_request(self):
+        with profile_request() as profile:
+            pass
+        cache.get("perf:a")
+        self.assertEqual(profile.counts["cache"], 0)
+
+    def test_explain_only_selects(self):
+        self.assertIsNone(explain("DELETE FROM books_book", (), "default"))
+        sql, params = Book.objects.filter(pk=1).query.sql_with_params()
+        self.assertTrue(explain(sql, params, "default"))
+
+
+class PerformanceMiddlewareTests(JWTAuthMixin):
+    def setUp(self):
+        super().setUp()
+        caches["tiered"].clear()
+        self.authenticate_as(UserFactory())
+        BookFactory()
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        res = self.client.get("/v1/books/books/")
+        self.assertEqual(res.status_code, 200)
+        names = {part.split(";")[0] for part in res["Server-Timing"].split(", ")}
+        self.assertEqual(names, {"db", "cache", "http", "total"})
+        self.assertNotIn('desc="0 queries"', res["Server-Timing"])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get("/v1/books/books/"))
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0, SLOW_REQUEST_EXPLAIN=True)
+    def test_slow_request_is_logged_with_plan(self):
+        with self.assertLogs("apps.core.middleware", "WARNING") as logs:
+            self.client.get("/v1/books/books/")
+        record = logs.records[-1].perf
+        self.assertEqual(record["route"], "v1/books/books/$")
+        self.assertGreater(record["db_count"], 0)
+        self.assertTrue(record["slowest_query"].lstrip().upper().startswith("SELECT"))
+        self.assertTrue(record["slowest_query_plan"])
+        self.assertEqual(json.loads(logs.records[-1].args[0]), record)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=60_000)
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs("apps.core.middleware", "WARNING"):
+            self.client.get("/v1/books/books/")
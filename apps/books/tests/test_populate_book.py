@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.books.choices import BorrowStatus
+from apps.books.models import Book, Borrow
+from apps.books.seeding import (
+    BOOK_COLUMNS,
+    ISBN_PREFIX,
+    generate_book_rows,
+    insert_rows,
+    seed_borrows,
+    seed_users,
+)
+
+
+class PopulateBookTests(TestCase):
+    def populate(self, **options):
+        out = StringIO()
+        call_command("populate_book", stdout=out, **options)
+        return out.getvalue()
+
+    def test_default_adds_one_hundred_books(self):
+        before = Book.objects.count()
+        out = self.populate()
+        self.assertIn("Books added: 100; skipped (duplicates): 0", out)
+        self.assertEqual(Book.objects.count(), before + 100)
+
+    def test_count_batches_and_borrows(self):
+        before = Book.objects.count()
+        out = self.populate(count=250, batch_size=40, borrows=2, users=5, seed=7)
+        self.assertEqual(Book.objects.count(), before + 250)
+        self.assertEqual(Borrow.objects.count(), 500)
+        self.assertIn("Borrows added: 500", out)
+
+    def test_copy_and_bulk_create_write_the_same_rows(self):
+        Book.objects.filter(isbn__startswith=ISBN_PREFIX).delete()
+        self.populate(count=30, seed=3)
+        copied = list(
+            Book.objects.filter(isbn__startswith=ISBN_PREFIX)
+            .order_by("isbn")
+            .values_list(*BOOK_COLUMNS)
+        )
+        Book.objects.filter(isbn__startswith=ISBN_PREFIX).delete()
+        self.populate(count=30, seed=3, no_copy=True)
+        created = list(
+            Book.objects.filter(isbn__startswith=ISBN_PREFIX)
+            .order_by("isbn")
+            .values_list(*BOOK_COLUMNS)
+        )
+        self.assertEqual(copied, created)
+
+    def test_generation_is_reproducible(self):
+        whole = generate_book_rows(0, 10, seed=1)
+        self.assertEqual(whole, generate_book_rows(0, 10, seed=1))
+        self.assertEqual(whole[0][0], f"{ISBN_PREFIX}0000000000")
+
+    def test_conflicting_rows_are_skipped(self):
+        rows = generate_book_rows(0, 5, seed=2)
+        rows[1] = ("x\tescaped\\n",) + rows[1][1:]
+        for use_copy in (True, False):
+            insert_rows(
+                Book, BOOK_COLUMNS, rows, use_copy=use_copy, ignore_conflicts=True
+            )
+        self.assertEqual(Book.objects.filter(isbn__in=[r[0] for r in rows]).count(), 5)
+        self.assertTrue(Book.objects.filter(isbn="x\tescaped\\n").exists())
+
+    def test_open_borrows_take_copies(self):
+        self.populate(count=20, seed=4)
+        books = Book.objects.filter(isbn__startswith=ISBN_PREFIX)
+        books.filter(pk=books.first().pk).update(copies=0)
+        before = dict(books.values_list("pk", "copies"))
+
+        seed_borrows(list(before), seed_users(3), active_ratio=1.0, seed=4)
+
+        open_books = set(
+            Borrow.objects.filter(status=BorrowStatus.BORROWED).values_list(
+                "book_id", flat=True
+            )
+        )
+        for pk, copies in books.values_list("pk", "copies"):
+            if before[pk]:
+                self.assertIn(pk, open_books)
+                self.assertEqual(copies, before[pk] - 1)
+            else:
+                self.assertNotIn(pk, open_books)
+                self.assertEqual(copies, 0)
+
+    def test_seeding_retires_cached_counts_and_pages(self):
+        with (
+            patch("apps.books.seeding.invalidate_counts") as mock_counts,
+            patch("apps.books.seeding.invalidate_books") as mock_pages,
+        ):
+            self.populate(count=5, borrows=1, users=2)
+        self.assertEqual(
+            [c.args[0] for c in mock_counts.call_args_list], [Book, Borrow]
+        )
+        self.assertEqual(mock_pages.call_count, 2)
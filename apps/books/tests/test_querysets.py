@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from django.core.cache import caches
+from django.test import override_settings
+
+from apps.books.models import Book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, BorrowFactory, StaffFactory, UserFactory
+
+
+@override_settings(PAGINATION_COUNT_STRATEGY="exact")
+class BookQuerysetTests(JWTAuthMixin):
+    """
+    Query budgets per action. Every request pays one query for the JWT user.
+    """
+
+    def setUp(self):
+        super().setUp()
+        caches["tiered"].clear()
+        Book.objects.all().delete()
+        self.user = UserFactory()
+        self.staff = StaffFactory()
+        self.books = BookFactory.create_batch(5)
+        for book in self.books:
+            BorrowFactory.create_batch(3, book=book, status="returned")
+        self.book = self.books[0]
+
+    def test_list_does_not_load_borrows(self):
+        self.authenticate_as(self.user)
+        # user + count + page
+        with self.assertNumQueries(3) as ctx:
+            res = self.client.get("/v1/books/books/?limit=1000")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["count"], 5)
+        self.assertFalse(any("books_borrow" in q["sql"] for q in ctx.captured_queries))
+
+    def test_retrieve_does_not_load_borrows(self):
+        self.authenticate_as(self.user)
+        # user + book
+        with self.assertNumQueries(2):
+            res = self.client.get(f"/v1/books/books/{self.book.id}/")
+        self.assertEqual(res.status_code, 200)
+
+    def test_borrow_is_a_single_statement(self):
+        self.authenticate_as(self.user)
+        # user, then one statement (wrapped in a savepoint inside the test's
+        # transaction) that takes the copy and records the borrow
+        with self.assertNumQueries(4) as ctx:
+            res = self.client.post(f"/v1/books/books/{self.book.id}/borrow/")
+        self.assertEqual(res.status_code, 200)
+        statement = ctx.captured_queries[2]["sql"]
+        self.assertIn("UPDATE", statement)
+        self.assertIn("INSERT", statement)
+        self.assertNotIn('"title"', statement)
+
+    def test_return_is_a_single_statement(self):
+        BorrowFactory(user=self.user, book=self.book)
+        self.authenticate_as(self.user)
+        with self.assertNumQueries(4) as ctx:
+            res = self.client.post(f"/v1/books/books/{self.book.id}/return_it/")
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('"title"', ctx.captured_queries[2]["sql"])
+
+    def test_borrow_history_is_staff_only_and_prefetched(self):
+        self.authenticate_as(self.user)
+        url = f"/v1/books/books/{self.book.id}/borrows/"
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.authenticate_as(self.staff)
+        # user + book + borrows joined with their users
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()["borrows"]), 3)
+        self.assertIn("username", res.json()["borrows"][0])
+
+    def test_borrow_history_follows_user_type(self):
+        url = f"/v1/books/books/{self.book.id}/borrows/"
+        self.authenticate_as(StaffFactory(is_staff=False, is_superuser=False))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.authenticate_as(UserFactory(is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 403)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+
+from apps.books.models import Book
+from .auth_utils import JWTAuthMixin
+from .factories import BookFactory, UserFactory
+
+
+class SearchTestsMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        Book.objects.all().delete()
+        self.authenticate_as(UserFactory())
+        self.url = "/v1/books/books/search/"
+        self.in_title = BookFactory(title="Dragons of Autumn", author="Weis")
+        self.in_author = BookFactory(title="Collected Tales", author="Ann Dragons")
+        self.in_description = BookFactory(
+            title="Sea Stories", description="A voyage with dragons and krakens."
+        )
+        BookFactory(title="Gardening", author="Green", description="Roses.")
+
+    def _search(self, query, **params):
+        res = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()
+
+    def test_matches_are_ranked_by_field_weight(self):
+        body = self._search("dragons")
+        ids = [row["id"] for row in body["results"]]
+        self.assertEqual(
+            ids, [self.in_title.id, self.in_author.id, self.in_description.id]
+        )
+        self.assertEqual(body["total"], 3)
+        self.assertIn("rank", body["results"][0])
+
+    def test_results_are_paginated(self):
+        body = self._search("dragons", limit=2)
+        self.assertEqual(body["count"], 2)
+        self.assertIsNotNone(body["next"])
+
+    def test_query_is_required(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 400)
+
+
+@skipUnless(connection.vendor == "postgresql", "full-text search needs Postgres")
+@override_settings(BOOKS_SEARCH_BACKEND="apps.books.search.PostgresSearchBackend")
+class PostgresSearchTests(SearchTestsMixin, JWTAuthMixin):
+    def test_vector_follows_writes(self):
+        book = Book.objects.get(pk=self.in_title.pk)
+        book.title = "Unicorns of Spring"
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+        ids = [row["id"] for row in self._search("unicorns")["results"]]
+        self.assertEqual(ids, [book.id])
+
+    def test_websearch_syntax(self):
+        ids = [row["id"] for row in self._search("dragons -autumn")["results"]]
+        self.assertNotIn(self.in_title.id, ids)
+
+    @override_settings(BOOKS_SEARCH_MAX_CANDIDATES=2)
+    def test_candidates_are_capped(self):
+        self.assertEqual(self._search("dragons")["total"], 2)
+
+    def test_plan_uses_gin_index(self):
+        from apps.books.search import PostgresSearchBackend
+
+        queryset = PostgresSearchBackend().search(Book.objects.all(), "dragons")
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+        self.assertIn("book_search_vector_idx", plan)
+
+
+@override_settings(BOOKS_SEARCH_BACKEND="apps.books.search.SimpleSearchBackend")
+class SimpleSearchTests(SearchTestsMixin, JWTAuthMixin):
+    pass
@@ -3,30 +3,37 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict
 
-import requests
 from requests.exceptions import RequestException
 
 from apps.core.cache_utils import redis_cached
+from apps.core.http import HttpClient
 
 logger = logging.getLogger(__name__)
 
+google_books = HttpClient("google_books")
 
-@redis_cached(ttl=60 * 60 * 24 * 7)  # 7 days
+
+@redis_cached(
+    ttl=60 * 60 * 24 * 7,  # 7 days
+    negative_ttl=60 * 5,
+    stale_ttl=60 * 60 * 24 * 7,
+    early_recompute=1.0,
+    serializer="marshal",
+    compress_threshold=1024,
+)
 def fetch_google_books_info(isbn: str) -> Dict[str, Any]:
     """
     Fetch book metadata from Google Books by ISBN.
-    Cached in Redis for seven days to reduce external calls.
+    Cached in Redis for seven days to reduce external calls; upstream errors
+    (including an open circuit) and unknown ISBNs yield ``{}``, which is only
+    cached for five minutes. Expired entries are served for another week while
+    they are refreshed in the background.
     """
     url = "https://www.googleapis.com/books/v1/volumes"
     params = {"q": f"isbn:{isbn}"}
 
     try:
-        resp = requests.get(
-            url,
-            params=params,
-            timeout=10,
-            hooks={"response": lambda r, *_, **__: r.raise_for_status()},
-        )
+        resp = google_books.get(url, params=params)
     except RequestException as exc:
         logger.warning("Google Books request error for %s → %s", isbn, exc)
         return {}
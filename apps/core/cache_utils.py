@@ -4,10 +4,35 @@ import functools
 import hashlib
 import json
 import logging
+import marshal
+import math
 import pickle
-from typing import Callable, ParamSpec, TypeVar
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    ParamSpec,
+    Tuple,
+    TypeVar,
+)
 
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+
+from apps.core.local_cache import local_store
+from apps.core.metrics import CACHE_REQUESTS, PAGE_CACHE_REQUESTS
 
 logger = logging.getLogger(__name__)
 
@@ -15,41 +40,527 @@ P = ParamSpec("P")
 T = TypeVar("T")
 
 
-def redis_cached(ttl: int = 3_600) -> Callable[[Callable[P, T]], Callable[P, T]]:
+def redis_cached(
+    ttl: int = 3_600,
+    *,
+    negative_ttl: int | None = None,
+    is_negative: Callable[[Any], bool] | None = None,
+    stale_ttl: int = 0,
+    lock_timeout: int = 30,
+    lock_wait: float = 10.0,
+    early_recompute: float = 0.0,
+    local: bool = False,
+    serializer: str = "pickle",
+    compress_threshold: int | None = None,
+    namespace: str | None = None,
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """
     Decorator to cache a function's return value in Redis for *ttl* seconds.
     If the wrapped function is called again with the *same positional and keyword
     arguments*, the cached value is returned instead of executing the function.
 
+    When *negative_ttl* is set, results for which *is_negative* returns true
+    (by default: falsy results such as ``None`` or ``{}``) are only kept for
+    *negative_ttl* seconds, so a transient upstream error is retried soon.
+
+    With *stale_ttl* > 0 an expired value stays in Redis for *stale_ttl* more
+    seconds and is returned immediately while a single background thread
+    recomputes it ("stale-while-revalidate"). Negative results are never
+    served stale.
+
+    Misses are single-flight: the first caller takes a short Redis lock
+    (``cache.add``, expiring after *lock_timeout* seconds) and computes, while
+    concurrent callers poll for its result for up to *lock_wait* seconds before
+    giving up and computing themselves.
+
+    With *early_recompute* > 0 hot keys are refreshed before they expire
+    ("XFetch"): each hit recomputes with a probability that grows as expiry
+    nears, scaled by how long the last computation took. The refresh also goes
+    through the lock, so other callers keep getting the cached value. ``1.0`` is
+    the usual setting; higher values refresh earlier.
+
+    With *local* entries are read and written through the ``"tiered"`` cache
+    (see :class:`apps.core.local_cache.TwoTierCache`), so repeated hits in one
+    process skip Redis for up to its ``LOCAL_TTL``.
+
+    Single-argument functions also get ``func.many(items, workers=...)`` for
+    batch lookups.
+
+    Values are stored as bytes encoded with *serializer* (``"pickle"``,
+    ``"json"`` or ``"marshal"``, see :data:`SERIALIZERS`) and zlib-compressed
+    when the encoded value reaches *compress_threshold* bytes. Keys for
+    primitive arguments (str, int, float, bool, None, bytes) are derived from
+    their ``repr`` rather than a pickle, which is cheaper and stable across
+    Python versions.
+
+    Entries live in a per-function *namespace* (default: the function's dotted
+    path) whose generation counter is part of every key. The wrapper exposes
+    ``invalidate(*args, **kwargs)`` to drop one entry and ``invalidate_all()``
+    to bump the generation, orphaning every entry at once without a SCAN (they
+    expire on their own TTL). Other processes see a bump within
+    :data:`GENERATION_MEMO_TTL` seconds.
+
     Usage
     -----
-    @redis_cached(ttl=86_400)  # 1 day
+    @redis_cached(ttl=86_400, negative_ttl=60, stale_ttl=3_600)  # 1 day
     def expensive_call(x: int, y: str) -> dict[str, Any]:
         ...
     """
+    is_negative = is_negative or _is_empty
+    codec = EntryCodec(serializer, compress_threshold)
 
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
-        prefix = f"{func.__module__}.{func.__qualname__}"
+        name = namespace or f"{func.__module__}.{func.__qualname__}"
+        generation_key = f"redis_cached:{name}:generation"
+        memo = {"generation": 0, "until": 0.0}
 
-        @functools.wraps(func)
-        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            key_data = (prefix, args, kwargs)
+        def generation() -> int:
+            now = time.monotonic()
+            if memo["until"] <= now:
+                memo["generation"] = get_cache_version(generation_key)
+                memo["until"] = now + GENERATION_MEMO_TTL
+            return memo["generation"]
+
+        def _cache_key(args, kwargs) -> str:
+            return _redis_cached_key(f"{name}:g{generation()}", args, kwargs)
+
+        def cache_key(*args, **kwargs) -> str:
+            return _cache_key(args, kwargs)
+
+        def store():
+            return caches[LOCAL_CACHE_ALIAS] if local else cache
+
+        def count(result: str, amount: int = 1) -> None:
+            if amount:
+                CACHE_REQUESTS.inc(amount, namespace=name, result=result)
+
+        def run(args, kwargs) -> Tuple[T, float]:
+            started = time.monotonic()
             try:
-                key_bytes = pickle.dumps(key_data)
+                result: T = func(*args, **kwargs)
             except Exception:
-                key_bytes = json.dumps(str(key_data)).encode()
-            cache_key = f"redis_cached:{hashlib.md5(key_bytes).hexdigest()}"
+                count("error")
+                raise
+            return result, time.monotonic() - started
+
+        def envelope(result: T, delta: float) -> Tuple[bytes, int]:
+            fresh_ttl, grace = ttl, stale_ttl
+            if negative_ttl is not None and is_negative(result):
+                fresh_ttl, grace = negative_ttl, 0
+            entry = codec.dumps((result, delta, time.time() + fresh_ttl))
+            return entry, fresh_ttl + grace
 
-            cached: T | None = cache.get(cache_key)
-            if cached is not None:
-                logger.debug("Redis hit → %s", cache_key)
-                return cached
+        def read(cache_key: str) -> tuple | None:
+            data = store().get(cache_key)
+            if data is None:
+                return None
+            entry = codec.loads(data)
+            if entry is None:
+                count("error")
+            return entry
 
-            result: T = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout=ttl)
-            logger.debug("Redis miss → %s (stored %ss)", cache_key, ttl)
+        def compute(cache_key: str, args, kwargs) -> T:
+            result, delta = run(args, kwargs)
+            entry, timeout = envelope(result, delta)
+            store().set(cache_key, entry, timeout=timeout)
+            logger.debug("Redis miss → %s (stored %ss)", cache_key, timeout)
             return result
 
+        def revalidate(cache_key: str, lock_key: str, token: str, args, kwargs):
+            try:
+                compute(cache_key, args, kwargs)
+            except Exception:
+                logger.exception("Redis revalidation failed → %s", cache_key)
+            finally:
+                _release_lock(lock_key, token)
+
+        def refresh_in_background(cache_key: str, args, kwargs) -> None:
+            lock_key = f"{cache_key}:lock"
+            token = _acquire_lock(lock_key, lock_timeout)
+            if token:
+                _run_in_background(revalidate, cache_key, lock_key, token, args, kwargs)
+            logger.debug("Redis stale → %s", cache_key)
+
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            cache_key = _cache_key(args, kwargs)
+            lock_key = f"{cache_key}:lock"
+
+            entry = read(cache_key)
+            if entry is not None:
+                result, delta, expires_at = entry
+                if time.time() >= expires_at:
+                    if stale_ttl:
+                        count("stale")
+                        refresh_in_background(cache_key, args, kwargs)
+                        return result
+                elif not _should_recompute(delta, expires_at, early_recompute):
+                    count("hit")
+                    logger.debug("Redis hit → %s", cache_key)
+                    return result
+                else:
+                    with _cache_lock(lock_key, lock_timeout) as acquired:
+                        if not acquired:
+                            count("hit")
+                            return result
+                        count("early")
+                        logger.debug("Redis early recompute → %s", cache_key)
+                        return compute(cache_key, args, kwargs)
+
+            with _cache_lock(lock_key, lock_timeout) as acquired:
+                if acquired:
+                    count("miss")
+                    return compute(cache_key, args, kwargs)
+
+            deadline = time.monotonic() + lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                entry = read(cache_key)
+                if entry is not None:
+                    count("hit")
+                    logger.debug("Redis hit after wait → %s", cache_key)
+                    return entry[0]
+            logger.warning("Redis lock wait timed out → %s", cache_key)
+            count("miss")
+            return compute(cache_key, args, kwargs)
+
+        def many(
+            items: Iterable[Any],
+            *,
+            workers: int = 1,
+            throttle: Callable[[], None] | None = None,
+        ) -> List[T]:
+            """
+            ``[wrapper(item) for item in items]`` in two cache round trips.
+
+            Hits come from one ``get_many``; each distinct miss is computed
+            once, by up to *workers* threads, calling *throttle* (e.g. a rate
+            limiter) before every computation, and written back with one
+            ``set_many`` per TTL. Stale entries (see *stale_ttl*) are refreshed
+            the same way, not in background threads, and keep their stale value
+            if the refresh fails. Batch misses skip the single-flight lock and
+            early recompute.
+            """
+            items = list(items)
+            keys = [_cache_key((item,), {}) for item in items]
+            found = store().get_many(list(dict.fromkeys(keys)))
+            entries = {key: codec.loads(data) for key, data in found.items()}
+            count("error", sum(entry is None for entry in entries.values()))
+
+            results: Dict[str, T] = {}
+            misses: Dict[str, Any] = {}
+            stale: Dict[str, Any] = {}
+            now = time.time()
+            for cache_key, item in zip(keys, items):
+                if cache_key in results or cache_key in misses:
+                    continue
+                entry = entries.get(cache_key)
+                if entry is None or (now >= entry[2] and not stale_ttl):
+                    misses[cache_key] = item
+                    continue
+                results[cache_key] = entry[0]
+                if now >= entry[2]:
+                    stale[cache_key] = item
+
+            count("hit", len(results) - len(stale))
+            count("stale", len(stale))
+            count("miss", len(misses))
+            logger.debug("Redis batch → %s hits, %s misses", len(results), len(misses))
+
+            def load(item: Any) -> Tuple[T, float]:
+                if throttle is not None:
+                    throttle()
+                return run((item,), {})
+
+            def refresh(cache_key: str) -> Tuple[T, float] | None:
+                try:
+                    return load(stale[cache_key])
+                except Exception:
+                    logger.exception("Redis revalidation failed → %s", cache_key)
+                    return None
+
+            def work(cache_key: str) -> Tuple[T, float] | None:
+                if cache_key in stale:
+                    return refresh(cache_key)
+                return load(misses[cache_key])
+
+            pending = [*misses, *stale]
+            if pending:
+                if workers > 1 and len(pending) > 1:
+                    with ThreadPoolExecutor(min(workers, len(pending))) as pool:
+                        computed = list(pool.map(work, pending))
+                else:
+                    computed = [work(cache_key) for cache_key in pending]
+
+                by_timeout: Dict[int, Dict[str, bytes]] = defaultdict(dict)
+                for cache_key, outcome in zip(pending, computed):
+                    if outcome is None:
+                        continue
+                    result, delta = outcome
+                    results[cache_key] = result
+                    entry, timeout = envelope(result, delta)
+                    by_timeout[timeout][cache_key] = entry
+                for timeout, data in by_timeout.items():
+                    store().set_many(data, timeout=timeout)
+            return [results[cache_key] for cache_key in keys]
+
+        def invalidate(*args, **kwargs) -> None:
+            store().delete(cache_key(*args, **kwargs))
+
+        def invalidate_all() -> int:
+            memo["generation"] = bump_cache_version(generation_key)
+            memo["until"] = time.monotonic() + GENERATION_MEMO_TTL
+            return memo["generation"]
+
+        def peek(*args, **kwargs) -> Dict[str, Any] | None:
+            key = cache_key(*args, **kwargs)
+            entry = read(key)
+            if entry is None:
+                return None
+            value, delta, expires_at = entry
+            return {
+                "key": key,
+                "value": value,
+                "compute_seconds": delta,
+                "expires_at": expires_at,
+            }
+
+        wrapper.namespace = name
+        wrapper.generation = generation
+        wrapper.cache_key = cache_key
+        wrapper.invalidate = invalidate
+        wrapper.invalidate_all = invalidate_all
+        wrapper.peek = peek
+        wrapper.many = many
+        _registry[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+LOCK_POLL_INTERVAL = 0.05
+LOCAL_CACHE_ALIAS = "tiered"
+GENERATION_MEMO_TTL = 2.0
+
+# Version counters memoized by get_cache_version(memo=True).
+_versions = local_store("cache_utils:versions", 10_000, 1024 * 1024)
+
+_registry: Dict[str, Callable[..., Any]] = {}
+
+
+def cached_functions() -> Dict[str, Callable[..., Any]]:
+    """
+    Every ``redis_cached`` function imported so far, keyed by namespace.
+    """
+    return dict(_registry)
+
+
+def _is_empty(value: Any) -> bool:
+    return not value
+
+
+def _redis_cached_key(prefix: str, args, kwargs) -> str:
+    if _primitive(args) and (not kwargs or _primitive(kwargs.values())):
+        raw = repr((args, sorted(kwargs.items()))) if kwargs else repr(args)
+        # Short arguments stay readable in the key; long ones are hashed.
+        if len(raw) <= 64 and raw.isascii() and raw.isprintable() and " " not in raw:
+            return f"redis_cached:{prefix}:{raw}"
+        data = raw.encode()
+    else:
+        try:
+            data = pickle.dumps((args, kwargs), protocol=4)
+        except Exception:
+            data = repr((args, kwargs)).encode()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return f"redis_cached:{prefix}:{digest}"
+
+
+def _primitive(values) -> bool:
+    for value in values:
+        if type(value) not in _PRIMITIVES:
+            return False
+    return True
+
+
+_PRIMITIVES = frozenset({str, int, float, bool, type(None), bytes})
+
+SERIALIZERS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "pickle": (
+        functools.partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL),
+        pickle.loads,
+    ),
+    # JSON turns tuples into lists and only handles JSON types.
+    "json": (
+        lambda value: json.dumps(value, separators=(",", ":")).encode(),
+        json.loads,
+    ),
+    # marshal only handles builtin types and its format may change between
+    # Python versions; entries are simply recomputed if they cannot be read.
+    "marshal": (marshal.dumps, marshal.loads),
+}
+
+
+class EntryCodec:
+    """
+    Turns ``(value, delta, expires_at)`` cache entries into bytes and back.
+
+    The first byte tells whether the rest is zlib-compressed; compression is
+    only kept when it actually shrinks the payload.
+    """
+
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+
+    def __init__(
+        self,
+        serializer: str = "pickle",
+        compress_threshold: int | None = None,
+        compress_level: int = 6,
+    ):
+        self.dumps_value, self.loads_value = SERIALIZERS[serializer]
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def dumps(self, entry: tuple) -> bytes:
+        data = self.dumps_value(list(entry))
+        if self.compress_threshold is not None and len(data) >= self.compress_threshold:
+            compressed = zlib.compress(data, self.compress_level)
+            if len(compressed) < len(data):
+                return self.ZLIB + compressed
+        return self.RAW + data
+
+    def loads(self, data: bytes) -> tuple | None:
+        body = data[1:]
+        try:
+            if data[:1] == self.ZLIB:
+                body = zlib.decompress(body)
+            return tuple(self.loads_value(body))
+        except Exception:
+            logger.warning("Unreadable redis_cached entry ignored", exc_info=True)
+            return None
+
+
+def _should_recompute(delta: float, expires_at: float, beta: float) -> bool:
+    if beta <= 0:
+        return False
+    # XFetch (Vattani et al.): -log(U) is exponentially distributed, so the
+    # chance of an early refresh rises smoothly as expiry approaches.
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def _run_in_background(target: Callable[..., Any], *args: Any) -> None:
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+
+def _acquire_lock(key: str, timeout: int) -> str | None:
+    token = uuid.uuid4().hex
+    return token if cache.add(key, token, timeout=timeout) else None
+
+
+def _release_lock(key: str, token: str) -> None:
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+@contextmanager
+def _cache_lock(key: str, timeout: int) -> Iterator[bool]:
+    """
+    Try to take a short-lived lock in the cache; yields whether it was taken.
+    """
+    token = _acquire_lock(key, timeout)
+    try:
+        yield token is not None
+    finally:
+        if token:
+            _release_lock(key, token)
+
+
+def get_cache_version(key: str, *, memo: bool = False) -> int:
+    """
+    Return the current value of the version counter stored under *key*.
+
+    Counters never expire. A missing counter (new key or evicted by Redis) is
+    seeded from the wall clock in milliseconds so a re-created counter can never
+    fall back to a value that older cache entries were written under.
+
+    With *memo* the value is remembered in-process for
+    :data:`GENERATION_MEMO_TTL` seconds, like namespace generations: hot paths
+    skip the Redis read, and see bumps made by other processes that much later.
+    """
+    if memo:
+        version = _versions.get(key)
+        if version is not None:
+            return version
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(key)
+    _versions.set(key, version, GENERATION_MEMO_TTL)
+    return version
+
+
+def bump_cache_version(key: str) -> int:
+    """
+    Atomically increment the version counter under *key* and return it.
+    """
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        get_cache_version(key)
+        version = cache.incr(key)
+    _versions.set(key, version, GENERATION_MEMO_TTL)
+    return version
+
+
+def versioned_cache_page(
+    timeout: int,
+    key_prefix: Callable[..., str],
+    max_age: int = 0,
+    local: bool = False,
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
+    """
+    ``cache_page`` whose key prefix is computed per request by *key_prefix*.
+
+    *key_prefix* receives the view arguments and should embed one or more
+    version counters (see :func:`get_cache_version`). Bumping a counter makes
+    every page cached under the old prefix unreachable at once, so entries can
+    use a long *timeout* and still never be served stale. Clients only get
+    ``max-age=max_age`` because they cannot observe those bumps.
+
+    With *local* pages are also kept in the per-process tier of the ``"tiered"``
+    cache; versioned keys make that safe, as a bump changes the key every
+    process looks up. *key_prefix* should then read its counters with
+    ``get_cache_version(..., memo=True)`` so local hits do not wait on Redis.
+
+    Usage
+    -----
+    @method_decorator(versioned_cache_page(86_400, key_prefix=catalog_prefix))
+    def list(self, request, *args, **kwargs):
+        ...
+    """
+
+    def decorator(view: Callable[P, T]) -> Callable[P, T]:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            prefix = key_prefix(request, *args, **kwargs)
+            cached_view = cache_page(
+                timeout,
+                key_prefix=prefix,
+                cache=LOCAL_CACHE_ALIAS if local else None,
+            )(view)
+            response = cached_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                match = getattr(request, "resolver_match", None)
+                hit = not getattr(request, "_cache_update_cache", True)
+                PAGE_CACHE_REQUESTS.inc(
+                    view=match.view_name if match else view.__name__,
+                    result="hit" if hit else "miss",
+                )
+            patch_cache_control(response, max_age=max_age)
+            if response.has_header("Expires"):
+                del response["Expires"]
+            return response
+
         return wrapper
 
     return decorator
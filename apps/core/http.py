@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
+
+from apps.core.metrics import UPSTREAM_LATENCY
+from apps.core.profiling import timed
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULTS: Dict[str, Any] = {
+    "connect_timeout": 3.05,
+    "read_timeout": 5.0,
+    "retries": 2,
+    "backoff_factor": 0.2,
+    "backoff_jitter": 0.2,
+    "pool_maxsize": 20,
+    "failure_threshold": 5,
+    "recovery_timeout": 30.0,
+}
+
+
+class CircuitOpenError(RequestException):
+    """
+    Raised instead of calling an upstream whose circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by every thread of a process.
+
+    After *failure_threshold* failures in a row the circuit opens and calls fail
+    fast for *recovery_timeout* seconds; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def admit(self) -> str | None:
+        """
+        Let one call through: returns ``CLOSED``, or ``HALF_OPEN`` for the single
+        trial call (which must then call :meth:`end_trial`), or ``None`` when
+        the call has to fail fast.
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return CLOSED
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return HALF_OPEN
+            return None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        "Circuit %s opened after %s failures", self.name, self.failures
+                    )
+                self.opened_at = time.monotonic()
+
+    def end_trial(self) -> None:
+        # Only the trial call frees its slot: a call admitted while the
+        # circuit was closed may finish during the trial.
+        with self._lock:
+            self._trial_running = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = round(
+                self.recovery_timeout - (time.monotonic() - self.opened_at), 3
+            )
+        return {"state": state, "failures": self.failures, "retry_in": retry_in}
+
+
+class HttpClient:
+    """
+    Process-wide pooled HTTP client for one upstream.
+
+    Wraps a keep-alive ``requests.Session`` (created lazily, so after a
+    pre-fork) with bounded retries using jittered exponential backoff, separate
+    connect/read timeouts and a :class:`CircuitBreaker`. Options default to
+    :data:`DEFAULTS` overridden by ``settings.HTTP_CLIENTS[name]``.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._session: requests.Session | None = None
+        self._breaker: CircuitBreaker | None = None
+        self._lock = threading.Lock()
+        _clients[name] = self
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return {**DEFAULTS, **getattr(settings, "HTTP_CLIENTS", {}).get(self.name, {})}
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        if self._breaker is None:
+            options = self.options
+            self._breaker = CircuitBreaker(
+                self.name, options["failure_threshold"], options["recovery_timeout"]
+            )
+        return self._breaker
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def _build_session(self) -> requests.Session:
+        options = self.options
+        # A read timeout is not retried: the upstream may still be working on
+        # it, and retrying would block the worker for several read timeouts.
+        # Retry-After is ignored for the same reason: a 429 asking for minutes
+        # would sleep in the worker; the backoff keeps retries short instead.
+        retry = Retry(
+            total=options["retries"],
+            read=0,
+            backoff_factor=options["backoff_factor"],
+            backoff_jitter=options["backoff_jitter"],
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=options["pool_maxsize"], max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        ``GET`` *url*; raises :class:`RequestException` on failure.
+
+        Connection errors, timeouts and 429/5xx answers (after retries) count
+        against the circuit; other 4xx answers are raised but do not.
+        """
+        admitted = self.breaker.admit()
+        if admitted is None:
+            UPSTREAM_LATENCY.observe(0, client=self.name, outcome="circuit_open")
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        try:
+            options = self.options
+            kwargs.setdefault(
+                "timeout", (options["connect_timeout"], options["read_timeout"])
+            )
+            started = time.perf_counter()
+            try:
+                with timed("http"):
+                    response = self.session.get(url, **kwargs)
+            except RequestException:
+                self.breaker.record_failure()
+                UPSTREAM_LATENCY.observe(
+                    time.perf_counter() - started, client=self.name, outcome="error"
+                )
+                raise
+            UPSTREAM_LATENCY.observe(
+                time.perf_counter() - started,
+                client=self.name,
+                outcome=f"{response.status_code // 100}xx",
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        finally:
+            if admitted == HALF_OPEN:
+                self.breaker.end_trial()
+        response.raise_for_status()
+        return response
+
+
+_clients: Dict[str, HttpClient] = {}
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """
+    Circuit breaker state of every HTTP client, keyed by client name.
+    """
+    return {name: client.breaker.snapshot() for name, client in _clients.items()}
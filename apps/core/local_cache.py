@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:local:invalidate"
+_MISSING = object()
+
+
+class LocalLRU:
+    """
+    Thread-safe in-process LRU with per-entry expiry.
+
+    Values are kept pickled and unpickled on every hit, like Django's
+    ``LocMemCache``, so callers never share (and mutate) one live object.
+    Bounded both by number of entries and by the pickled size of the values;
+    the least recently used entries are evicted first once either limit is
+    exceeded. Values larger than *max_bytes* are not stored at all.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: OrderedDict[str, Tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            data, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            self.delete(key)
+            return
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        with self._lock:
+            self._pop(key)
+            if len(data) > self.max_bytes:
+                return
+            self._data[key] = (data, time.monotonic() + ttl)
+            self.bytes += len(data)
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend keeping hot entries in a per-process :class:`LocalLRU` in
+    front of another cache alias (normally the Redis ``default``).
+
+    Reads check the local tier first and fall back to the remote cache, copying
+    hits locally for at most ``LOCAL_TTL`` seconds. Writes and deletes go to
+    the remote cache and are announced over Redis pub/sub, so every other
+    process drops its local copy; ``LOCAL_TTL`` bounds staleness if a message
+    is lost. Locks and counters (``add``/``incr``) are never kept locally.
+
+    OPTIONS: ``REMOTE`` (alias, default ``"default"``), ``LOCAL_TTL`` (60),
+    ``MAX_ENTRIES`` (10 000) and ``MAX_BYTES`` (64 MiB).
+    """
+
+    def __init__(self, name: str, params: Dict[str, Any]):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.remote_alias = options.get("REMOTE", "default")
+        self.local_ttl = options.get("LOCAL_TTL", 60)
+        self.local = local_store(
+            name,
+            options.get("MAX_ENTRIES", 10_000),
+            options.get("MAX_BYTES", 64 * 1024 * 1024),
+        )
+        _ensure_listener(self.remote_alias)
+
+    @property
+    def remote(self) -> BaseCache:
+        return caches[self.remote_alias]
+
+    def _local_ttl(self, timeout: Any) -> float:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.local_ttl if timeout is None else min(self.local_ttl, timeout)
+
+    # --------------------------------- reads -------------------------------- #
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.local.get(local_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = self.remote.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.local.set(local_key, value, self.local_ttl)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(self.make_and_validate_key(key, version), _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.remote.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self.local.set(self.make_key(key, version), value, self.local_ttl)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if self.local.get(local_key, _MISSING) is not _MISSING:
+            return True
+        return self.remote.has_key(key, version=version)
+
+    # -------------------------------- writes -------------------------------- #
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.remote.set(key, value, timeout=timeout, version=version)
+        self.local.set(local_key, value, self._local_ttl(timeout))
+        publish_invalidation([local_key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.remote.set_many(data, timeout=timeout, version=version)
+        local_keys = []
+        for key, value in data.items():
+            local_key = self.make_and_validate_key(key, version=version)
+            local_keys.append(local_key)
+            if key not in failed:
+                self.local.set(local_key, value, self._local_ttl(timeout))
+        publish_invalidation(local_keys)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.add(key, value, timeout=timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.remote.incr(key, delta, version=version)
+        self._forget([self.make_and_validate_key(key, version=version)])
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.remote.delete(key, version=version)
+        self._forget([self.make_and_validate_key(key, version=version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.remote.delete_many(keys, version=version)
+        self._forget([self.make_and_validate_key(key, version) for key in keys])
+
+    def clear(self):
+        self.remote.clear()
+        for store in list(_stores.values()):
+            store.clear()
+        publish_invalidation(["*"])
+
+    def _forget(self, local_keys):
+        for local_key in local_keys:
+            self.local.delete(local_key)
+        publish_invalidation(local_keys)
+
+
+# ------------------------------ invalidation ------------------------------ #
+_stores: Dict[str, LocalLRU] = {}
+_registry_lock = threading.Lock()
+_listener: Dict[str, Any] = {"pid": None, "alias": None}
+_SENDER = uuid.uuid4().hex
+
+
+def local_store(name: str, max_entries: int, max_bytes: int) -> LocalLRU:
+    """
+    The process-wide :class:`LocalLRU` registered as *name*, created on first
+    use. Every registered store is emptied when ``"*"`` is invalidated.
+    """
+    with _registry_lock:
+        if name not in _stores:
+            _stores[name] = LocalLRU(max_entries, max_bytes)
+        return _stores[name]
+
+
+def publish_invalidation(local_keys: Iterable[str]) -> None:
+    """
+    Tell every other process to drop *local_keys* (``"*"`` drops everything).
+    """
+    alias = _listener["alias"]
+    if alias is None:
+        return
+    message = json.dumps({"sender": _SENDER, "keys": list(local_keys)})
+    try:
+        _redis(alias).publish(INVALIDATION_CHANNEL, message)
+    except Exception as exc:
+        logger.warning("Local cache invalidation publish failed → %s", exc)
+
+
+def apply_invalidation(message: bytes | str) -> None:
+    payload = json.loads(message)
+    if payload.get("sender") == _SENDER:
+        return
+    for store in list(_stores.values()):
+        if "*" in payload["keys"]:
+            store.clear()
+        else:
+            for key in payload["keys"]:
+                store.delete(key)
+
+
+def _redis(alias: str):
+    from django_redis import get_redis_connection
+
+    return get_redis_connection(alias)
+
+
+def _ensure_listener(alias: str) -> None:
+    pid = os.getpid()
+    if _listener["pid"] == pid:
+        return
+    with _registry_lock:
+        if _listener["pid"] == pid:
+            return
+        try:
+            _redis(alias)
+        except Exception:
+            logger.info("Local cache tier without pub/sub for %r", alias)
+            return
+        _listener.update(pid=pid, alias=alias)
+        threading.Thread(
+            target=_listen, args=(alias,), name="local-cache-invalidation", daemon=True
+        ).start()
+
+
+def _listen(alias: str) -> None:
+    while True:
+        try:
+            pubsub = _redis(alias).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages sent while we were not subscribed are lost.
+            for store in list(_stores.values()):
+                store.clear()
+            for message in pubsub.listen():
+                if message.get("type") == "message":
+                    apply_invalidation(message["data"])
+        except Exception as exc:
+            logger.warning("Local cache invalidation listener error → %s", exc)
+            time.sleep(1)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import pickle
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from faker import Faker
+
+from apps.core.cache_utils import EntryCodec, _redis_cached_key
+
+PREFIX = "apps.books.utils.fetch_google_books_info"
+CONFIGS = [
+    ("pickle", None),
+    ("pickle", 512),
+    ("json", None),
+    ("json", 512),
+    ("marshal", None),
+    ("marshal", 512),
+    ("marshal", 1024),
+]
+
+
+def legacy_key(args, kwargs):
+    return (
+        "redis_cached:" + hashlib.md5(pickle.dumps((PREFIX, args, kwargs))).hexdigest()
+    )
+
+
+def per_call_us(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare redis_cached key derivation, serializers and compression on a "
+        "Google Books-like payload: CPU per call and bytes stored in Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5_000)
+        parser.add_argument(
+            "--description-size",
+            type=int,
+            default=2_000,
+            help="Characters of description text in the sample payload",
+        )
+        parser.add_argument(
+            "--redis",
+            action="store_true",
+            help="Also store each variant and report Redis MEMORY USAGE",
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    def handle(self, *args, **options):
+        fake = Faker()
+        Faker.seed(0)
+        n = options["iterations"]
+        isbn = fake.isbn13(separator="")
+        value = {
+            "title": fake.sentence(nb_words=5),
+            "author": fake.name(),
+            "description": fake.text(max_nb_chars=options["description_size"]),
+            "published_date": fake.date(),
+            "publisher": fake.company(),
+            "page_count": 320,
+            "cover_thumbnail": fake.image_url(),
+        }
+        entry = (value, 0.25, time.time() + 3600)
+
+        rows = [
+            {
+                "variant": "key: md5(pickle) (legacy)",
+                "cpu_us": per_call_us(lambda: legacy_key((isbn,), {}), n),
+            },
+            {
+                "variant": "key: repr (short primitives)",
+                "cpu_us": per_call_us(
+                    lambda: _redis_cached_key(PREFIX, (isbn,), {}), n
+                ),
+            },
+            {
+                "variant": "key: blake2b(repr) (long args)",
+                "cpu_us": per_call_us(
+                    lambda: _redis_cached_key(PREFIX, (isbn * 8,), {"full": True}), n
+                ),
+            },
+        ]
+
+        # Legacy storage: django-redis pickles the (value, delta, expiry) tuple.
+        legacy = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        rows.append(
+            {
+                "variant": "value: pickle tuple (legacy)",
+                "cpu_us": per_call_us(lambda: pickle.dumps(entry, -1), n)
+                + per_call_us(lambda: pickle.loads(legacy), n),
+                "bytes": len(legacy),
+                "redis_bytes": self._memory_usage(options, entry),
+            }
+        )
+        for serializer, threshold in CONFIGS:
+            codec = EntryCodec(serializer, threshold)
+            data = codec.dumps(entry)
+            rows.append(
+                {
+                    "variant": f"value: {serializer}"
+                    + (f" + zlib>={threshold}" if threshold else ""),
+                    "cpu_us": per_call_us(lambda: codec.dumps(entry), n)
+                    + per_call_us(lambda: codec.loads(data), n),
+                    "bytes": len(data),
+                    "redis_bytes": self._memory_usage(options, data),
+                }
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(f"{'variant':<34}{'cpu µs/call':>13}{'bytes':>9}{'redis':>9}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['variant']:<34}{row['cpu_us']:>13.2f}"
+                f"{row.get('bytes', ''):>9}{row.get('redis_bytes') or '':>9}"
+            )
+
+    def _memory_usage(self, options, stored):
+        if not options["redis"]:
+            return None
+        from django_redis import get_redis_connection
+
+        key = "bench_cache:probe"
+        cache.set(key, stored, timeout=60)
+        try:
+            return get_redis_connection("default").memory_usage(cache.make_key(key))
+        except Exception:
+            return None
+        finally:
+            cache.delete(key)
@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules, import_string
+
+from apps.core.cache_utils import cached_functions
+
+
+class Command(BaseCommand):
+    help = (
+        "Inspect or purge redis_cached namespaces. Arguments after the "
+        "namespace are passed to the function as strings, e.g. "
+        "`redis_cache purge apps.books.utils.fetch_google_books_info 978...`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["list", "inspect", "purge"])
+        parser.add_argument(
+            "namespace",
+            nargs="?",
+            help="Namespace (defaults to the function's dotted path)",
+        )
+        parser.add_argument(
+            "call_args",
+            nargs="*",
+            metavar="args",
+            help="Call arguments selecting a single entry",
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules("utils")
+        if options["action"] == "list":
+            for name, func in sorted(cached_functions().items()):
+                self.stdout.write(f"{name} generation={func.generation()}")
+            return
+
+        func = self._resolve(options["namespace"])
+        call_args = options["call_args"]
+        if options["action"] == "inspect":
+            self._inspect(func, call_args)
+        elif call_args:
+            func.invalidate(*call_args)
+            self.stdout.write(f"Purged {func.cache_key(*call_args)}")
+        else:
+            generation = func.invalidate_all()
+            self.stdout.write(f"Purged {func.namespace} (generation={generation})")
+
+    def _resolve(self, namespace):
+        if not namespace:
+            raise CommandError("A namespace is required.")
+        functions = cached_functions()
+        if namespace not in functions:
+            try:
+                import_string(namespace)
+            except ImportError:
+                pass
+            functions = cached_functions()
+        if namespace not in functions:
+            raise CommandError(f"Unknown redis_cached namespace: {namespace!r}")
+        return functions[namespace]
+
+    def _inspect(self, func, call_args):
+        self.stdout.write(f"{func.namespace} generation={func.generation()}")
+        if not call_args:
+            return
+        entry = func.peek(*call_args)
+        if entry is None:
+            self.stdout.write(f"{func.cache_key(*call_args)}: not cached")
+            return
+        self.stdout.write(json.dumps(entry, indent=2, default=str))
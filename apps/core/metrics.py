@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """
+    Base for in-process metrics with a fixed set of label names.
+
+    Values live in plain dicts keyed by label tuples behind one lock, so an
+    update costs a dict lookup; label values must come from a small, bounded
+    set (route patterns, not raw paths).
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        return lines + self.samples()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {value}" for key, value in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label key: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = self._labels(key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_registry: Dict[str, Metric] = {}
+
+
+def render() -> str:
+    """
+    All metrics of this process in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for metric in list(_registry.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------- metrics -------------------------------- #
+CACHE_REQUESTS = Counter(
+    "redis_cached_requests_total",
+    "redis_cached lookups by namespace and result (hit, miss, stale, early, error).",
+    ["namespace", "result"],
+)
+PAGE_CACHE_REQUESTS = Counter(
+    "page_cache_requests_total",
+    "Cached page lookups by view and result (hit, miss).",
+    ["view", "result"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of requests handled by Django, by route pattern.",
+    ["method", "route", "status"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of outgoing HTTP calls by client and outcome.",
+    ["client", "outcome"],
+)
+OVERDUE_FLAGGED = Counter(
+    "books_overdue_flagged_total",
+    "Borrows flagged overdue by the overdue sweep.",
+)
+TASK_LATENCY = Histogram(
+    "celery_task_duration_seconds",
+    "Runtime of Celery tasks by task name and final state.",
+    ["task", "state"],
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0, 300.0),
+)
+
+
+# ---------------------------------- celery -------------------------------- #
+_task_started: Dict[str, float] = {}
+
+
+def instrument_celery(port: int | None = None) -> None:
+    """
+    Time every task run in this worker. With *port*, each worker process also
+    serves its metrics on ``port + process index`` (prefork children do not
+    share memory with the web process).
+    """
+    from celery.signals import task_postrun, task_prerun, worker_process_init
+
+    def started(task_id=None, **kwargs):
+        _task_started[task_id] = time.perf_counter()
+
+    def finished(task_id=None, task=None, state=None, **kwargs):
+        began = _task_started.pop(task_id, None)
+        if began is not None:
+            TASK_LATENCY.observe(
+                time.perf_counter() - began, task=task.name, state=state or "UNKNOWN"
+            )
+
+    def serve(**kwargs):
+        from billiard.process import current_process
+
+        serve_metrics(port + (current_process().index or 0))
+
+    task_prerun.connect(started, weak=False)
+    task_postrun.connect(finished, weak=False)
+    if port:
+        worker_process_init.connect(serve, weak=False)
+
+
+def serve_metrics(port: int) -> None:
+    """
+    Serve :func:`render` on ``http://0.0.0.0:<port>/metrics`` from a thread.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    except OSError as exc:
+        logger.warning("Metrics server on port %s not started → %s", port, exc)
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
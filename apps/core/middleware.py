@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from apps.core.metrics import REQUEST_LATENCY
+from apps.core.profiling import QueryTimer, explain, profile_request
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of every request, labelled by method, route pattern
+    (never the raw path, to keep label cardinality bounded) and status class.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=match.route if match else "<unmatched>",
+            status=f"{response.status_code // 100}xx",
+        )
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Break each request's time down into SQL, Redis and outgoing HTTP.
+
+    Queries are timed through ``connection.execute_wrapper``, cache operations
+    by :class:`~apps.core.profiling.ProfilingRedisClient` and upstream calls by
+    :class:`~apps.core.http.HttpClient`. Totals are sent in a ``Server-Timing``
+    header (``SERVER_TIMING``) and requests slower than
+    ``SLOW_REQUEST_THRESHOLD_MS`` are logged as one JSON record, with the plan
+    of the slowest query when ``SLOW_REQUEST_EXPLAIN`` is on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_request() as profile:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(QueryTimer(profile, alias))
+                    )
+                response = self.get_response(request)
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = profile.server_timing()
+        if profile.elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            self._log_slow(request, response, profile)
+        return response
+
+    def _log_slow(self, request, response, profile):
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": match.route if match else None,
+            "status": response.status_code,
+            **profile.as_dict(),
+        }
+        if settings.SLOW_REQUEST_EXPLAIN and profile.slowest_query is not None:
+            _, sql, params, alias = profile.slowest_query
+            record["slowest_query_plan"] = explain(sql, params, alias)
+        logger.warning("Slow request %s", json.dumps(record), extra={"perf": record})
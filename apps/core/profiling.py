@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.db import DatabaseError, connections, transaction
+from django_redis.client import DefaultClient
+
+# Kinds reported in Server-Timing, in header order.
+KINDS = ("db", "cache", "http")
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+class RequestProfile:
+    """
+    Time spent per backend (``db``, ``cache``, ``http``) during one request.
+
+    Only the slowest SQL statement is kept, with its parameters, so it can be
+    EXPLAINed after the response is built.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts: Dict[str, int] = dict.fromkeys(KINDS, 0)
+        self.durations: Dict[str, float] = dict.fromkeys(KINDS, 0.0)
+        self.slowest_query: Optional[Tuple[float, str, Any, str]] = None
+        self._open: set = set()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add(self, kind: str, seconds: float) -> None:
+        self.counts[kind] += 1
+        self.durations[kind] += seconds
+
+    def add_query(self, seconds: float, sql: str, params: Any, alias: str) -> None:
+        self.add("db", seconds)
+        if self.slowest_query is None or seconds > self.slowest_query[0]:
+            self.slowest_query = (seconds, sql, params, alias)
+
+    def server_timing(self) -> str:
+        units = {"db": "queries", "cache": "ops", "http": "calls"}
+        parts = [
+            f'{kind};dur={self.durations[kind] * 1000:.1f};'
+            f'desc="{self.counts[kind]} {units[kind]}"'
+            for kind in KINDS
+        ]
+        parts.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"duration_ms": round(self.elapsed * 1000, 1)}
+        for kind in KINDS:
+            data[f"{kind}_count"] = self.counts[kind]
+            data[f"{kind}_ms"] = round(self.durations[kind] * 1000, 1)
+        if self.slowest_query is not None:
+            seconds, sql, _, _ = self.slowest_query
+            data["slowest_query_ms"] = round(seconds * 1000, 1)
+            data["slowest_query"] = sql
+        return data
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+@contextmanager
+def profile_request() -> Iterator[RequestProfile]:
+    """
+    Make a fresh :class:`RequestProfile` current for the enclosed block.
+    """
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(kind: str) -> Iterator[None]:
+    """
+    Add the enclosed block to the current request's *kind* total; nested
+    blocks of the same kind (``set_many`` calling ``set``) count once.
+    """
+    profile = _current.get()
+    if profile is None or kind in profile._open:
+        yield
+        return
+    profile._open.add(kind)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._open.discard(kind)
+        profile.add(kind, time.perf_counter() - started)
+
+
+class QueryTimer:
+    """
+    ``connection.execute_wrapper`` callable recording every statement on
+    *profile*.
+    """
+
+    def __init__(self, profile: RequestProfile, alias: str):
+        self.profile = profile
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if many:
+                self.profile.add("db", elapsed)
+            else:
+                self.profile.add_query(elapsed, sql, params, self.alias)
+
+
+# ------------------------------ redis client ------------------------------ #
+def _timed_method(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with timed("cache"):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class ProfilingRedisClient(DefaultClient):
+    """
+    django-redis client that adds each cache operation to the current
+    request's ``cache`` timing. Outside a request it behaves as
+    :class:`DefaultClient`.
+    """
+
+
+TIMED_REDIS_METHODS: List[str] = [
+    "get",
+    "set",
+    "add",
+    "delete",
+    "get_many",
+    "set_many",
+    "delete_many",
+    "delete_pattern",
+    "has_key",
+    "incr",
+    "decr",
+    "touch",
+    "expire",
+    "ttl",
+    "keys",
+    "clear",
+]
+for _name in TIMED_REDIS_METHODS:
+    setattr(ProfilingRedisClient, _name, _timed_method(getattr(DefaultClient, _name)))
+
+
+def explain(sql: str, params: Any, alias: str) -> Optional[str]:
+    """
+    The database's plan for a ``SELECT`` (plain EXPLAIN, nothing is executed),
+    or ``None`` for other statements or when the plan cannot be produced.
+    """
+    if sql.lstrip()[:6].upper() != "SELECT":
+        return None
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    return "\n".join(" ".join(str(col) for col in row) for row in rows)
@@ -2,6 +2,8 @@
 ASGI config for gab_bookstore project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to the book availability stream are served by an async SSE app
+(apps/books/availability.py); everything else goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gab_bookstore.settings.api_local")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up by get_asgi_application().
+from apps.books.availability import STREAM_PATH, availability_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == STREAM_PATH:
+        return await availability_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,8 +1,11 @@
 import os
 from celery import Celery
 
+from apps.core.metrics import instrument_celery
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gab_bookstore.settings.api_local")
 
 app = Celery("gab_bookstore")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+instrument_celery(port=int(os.getenv("METRICS_WORKER_PORT", "0")) or None)
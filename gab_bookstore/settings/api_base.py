@@ -12,6 +12,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # third-party apps
     "rest_framework",
     "rest_framework_simplejwt",
@@ -31,6 +32,23 @@ WSGI_APPLICATION = "gab_bookstore.wsgi.application"
 # Celery settings
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+CELERY_TASK_TRACK_STARTED = True
+CELERY_BEAT_SCHEDULE = {
+    "sweep-overdue-borrows": {
+        "task": "apps.books.tasks.sweep_overdue_borrows",
+        "schedule": BOOKS_OVERDUE_SWEEP_SECONDS,
+        "options": {"expires": BOOKS_OVERDUE_SWEEP_SECONDS},
+    },
+}
+if BOOKS_HOT_INVENTORY:
+    CELERY_BEAT_SCHEDULE["reconcile-hot-inventory"] = {
+        "task": "apps.books.tasks.reconcile_inventory",
+        "schedule": BOOKS_HOT_INVENTORY_RECONCILE_SECONDS,
+        "options": {"expires": BOOKS_HOT_INVENTORY_RECONCILE_SECONDS},
+    }
+
+# Upper bound for ``?wait=`` on the enrichment job status endpoint (seconds).
+BOOKS_ENRICHMENT_MAX_WAIT = 10
 
 # Swagger settings
 SWAGGER_SETTINGS = {
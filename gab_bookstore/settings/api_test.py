@@ -1,4 +1,6 @@
-from api_base import *  # noqa: F403,F401
+from .api_base import *  # noqa: F403,F401
 
 DEBUG = True
 TESTING = True
+
+BOOKS_SEARCH_BACKEND = "apps.books.search.SimpleSearchBackend"
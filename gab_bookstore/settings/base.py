@@ -12,6 +12,8 @@ ALLOWED_HOSTS = (
 )
 
 MIDDLEWARE = [
+    "apps.core.middleware.MetricsMiddleware",
+    "apps.core.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -63,9 +65,21 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://redis:6379/0",
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # DefaultClient that reports cache time to PerformanceMiddleware.
+            "CLIENT_CLASS": "apps.core.profiling.ProfilingRedisClient",
         },
-    }
+    },
+    # In-process LRU in front of "default" (apps/core/local_cache.py); used by
+    # redis_cached(local=True) and versioned_cache_page(local=True).
+    "tiered": {
+        "BACKEND": "apps.core.local_cache.TwoTierCache",
+        "OPTIONS": {
+            "REMOTE": "default",
+            "LOCAL_TTL": int(os.getenv("LOCAL_CACHE_TTL", "60")),
+            "MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "10000")),
+            "MAX_BYTES": int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        },
+    },
 }
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
@@ -79,3 +93,84 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "apps.api.pagination.LimitOffsetPagination",
 }
+
+# Strategy used for the ``total`` of paginated responses: "exact" (COUNT(*)),
+# "cached" (COUNT(*) memoised in Redis, dropped on create/delete) or
+# "estimate" (Postgres planner estimate once it exceeds the threshold).
+PAGINATION_COUNT_STRATEGY = os.getenv("PAGINATION_COUNT_STRATEGY", "cached")
+PAGINATION_COUNT_CACHE_TTL = int(os.getenv("PAGINATION_COUNT_CACHE_TTL", "3600"))
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", "100000")
+)
+
+# Catalog search (see apps/books/search.py). The Postgres backend ranks at most
+# BOOKS_SEARCH_MAX_CANDIDATES index matches per query.
+BOOKS_SEARCH_BACKEND = "apps.books.search.PostgresSearchBackend"
+BOOKS_SEARCH_MAX_CANDIDATES = int(os.getenv("BOOKS_SEARCH_MAX_CANDIDATES", "1000"))
+BOOKS_AUTOCOMPLETE_TTL = int(os.getenv("BOOKS_AUTOCOMPLETE_TTL", "60"))
+
+# Bulk ISBN import (apps/books/importer.py). BOOKS_IMPORT_RATE_LIMIT caps
+# Google Books calls per second; empty means unlimited.
+BOOKS_IMPORT_WORKERS = int(os.getenv("BOOKS_IMPORT_WORKERS", "8"))
+BOOKS_IMPORT_BATCH_SIZE = int(os.getenv("BOOKS_IMPORT_BATCH_SIZE", "500"))
+BOOKS_IMPORT_RATE_LIMIT = float(os.getenv("BOOKS_IMPORT_RATE_LIMIT", "10") or 0) or None
+
+# Batch borrow/return (apps/books/circulation.py): most books per request.
+BOOKS_CIRCULATION_BATCH_MAX = int(os.getenv("BOOKS_CIRCULATION_BATCH_MAX", "50"))
+
+# Book availability events (apps/books/availability.py): borrow/return publish
+# copies on BOOKS_AVAILABILITY_CHANNEL and the ASGI app streams them as
+# server-sent events, with a keep-alive comment every HEARTBEAT seconds.
+BOOKS_AVAILABILITY_EVENTS = os.getenv("BOOKS_AVAILABILITY_EVENTS", "True") == "True"
+BOOKS_AVAILABILITY_CHANNEL = os.getenv(
+    "BOOKS_AVAILABILITY_CHANNEL", "books:availability"
+)
+BOOKS_AVAILABILITY_REDIS_URL = os.getenv(
+    "BOOKS_AVAILABILITY_REDIS_URL", CACHES["default"]["LOCATION"]
+)
+BOOKS_AVAILABILITY_HEARTBEAT = float(os.getenv("BOOKS_AVAILABILITY_HEARTBEAT", "15"))
+BOOKS_AVAILABILITY_MAX_BOOKS = int(os.getenv("BOOKS_AVAILABILITY_MAX_BOOKS", "100"))
+
+# Overdue sweep (apps/books/overdue.py): a Celery beat task flags open borrows
+# past their due date every BOOKS_OVERDUE_SWEEP_SECONDS, CHUNK rows per UPDATE.
+BOOKS_OVERDUE_SWEEP_SECONDS = float(os.getenv("BOOKS_OVERDUE_SWEEP_SECONDS", "3600"))
+BOOKS_OVERDUE_SWEEP_CHUNK = int(os.getenv("BOOKS_OVERDUE_SWEEP_CHUNK", "1000"))
+
+# Hot inventory (apps/books/inventory.py): copies of books flagged with
+# ``manage.py inventory enable`` are counted in Redis (the
+# BOOKS_HOT_INVENTORY_CACHE connection, which should not evict keys) and
+# written back to Postgres by a Celery beat task every RECONCILE_SECONDS.
+BOOKS_HOT_INVENTORY = os.getenv("BOOKS_HOT_INVENTORY", "False") == "True"
+BOOKS_HOT_INVENTORY_CACHE = os.getenv("BOOKS_HOT_INVENTORY_CACHE", "default")
+BOOKS_HOT_INVENTORY_RECONCILE_BATCH = int(
+    os.getenv("BOOKS_HOT_INVENTORY_RECONCILE_BATCH", "1000")
+)
+BOOKS_HOT_INVENTORY_RECONCILE_SECONDS = float(
+    os.getenv("BOOKS_HOT_INVENTORY_RECONCILE_SECONDS", "5")
+)
+
+# Pooled upstream HTTP clients (apps/core/http.py), keyed by client name.
+# Unset options fall back to apps.core.http.DEFAULTS.
+HTTP_CLIENTS = {
+    "google_books": {
+        "connect_timeout": float(os.getenv("GOOGLE_BOOKS_CONNECT_TIMEOUT", "3.05")),
+        "read_timeout": float(os.getenv("GOOGLE_BOOKS_READ_TIMEOUT", "5")),
+        "retries": int(os.getenv("GOOGLE_BOOKS_RETRIES", "2")),
+        "failure_threshold": int(os.getenv("GOOGLE_BOOKS_FAILURE_THRESHOLD", "5")),
+        "recovery_timeout": float(os.getenv("GOOGLE_BOOKS_RECOVERY_TIMEOUT", "30")),
+    },
+}
+
+# Prometheus metrics (apps/core/metrics.py), served at /metrics/. When
+# METRICS_TOKEN is set, scrapers must send "Authorization: Bearer <token>".
+# Celery worker processes serve their own metrics on METRICS_WORKER_PORT + n
+# (read in gab_bookstore/celery_wsgi.py).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Per-request profiling (apps.core.middleware.PerformanceMiddleware). Requests
+# slower than SLOW_REQUEST_THRESHOLD_MS are logged with their SQL / Redis /
+# HTTP breakdown; SLOW_REQUEST_EXPLAIN adds the plan of the slowest query.
+# The Server-Timing header is on by default only when DEBUG is.
+SERVER_TIMING = os.getenv("SERVER_TIMING", os.getenv("DJANGO_DEBUG", "True")) == "True"
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+SLOW_REQUEST_EXPLAIN = os.getenv("SLOW_REQUEST_EXPLAIN", "False") == "True"